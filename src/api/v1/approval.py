@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
 
-from src.models.session import get_db
+from src.models.session import get_db, get_read_db
 from src.models.employee_profile import ProfileEditRequest
+from src.services.dashboard_service import DashboardService
 
 router = APIRouter()
 
@@ -24,7 +25,7 @@ def get_all_profile_requests(db: Session = Depends(get_db)):
     } for req in requests]
 
 @router.get("/cards")
-def get_approval_cards(db: Session = Depends(get_db)):
+def get_approval_cards(db: Session = Depends(get_read_db)):
     query = text("""
         SELECT 
             COUNT(*) as total_requests,
@@ -133,4 +134,6 @@ def update_employee_requests(employee_id: str, status: str = Query(...), comment
         processed_count += 1
     
     db.commit()
+    if status.upper() == "APPROVED":
+        DashboardService.invalidate_org_widgets()
     return {"message": f"Updated {processed_count} requests to {status.upper()}"}
\ No newline at end of file
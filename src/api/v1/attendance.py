@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Header, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import Optional
-from datetime import datetime, date
+from datetime import date
 from decimal import Decimal
-from src.models.session import get_db
+import calendar
+from src.models.session import get_db, get_async_db, get_async_read_db
 from src.models.hrms_models import Attendance, PolicyMaster, LeaveManagement
-from src.models import Employee, Department
+from src.models import Employee, Department, ShiftMaster
+from src.services.dashboard_service import DashboardService
+from src.services.calendar_service import CalendarService
+from src.services.attendance_rollup_service import AttendanceRollupService
+from src.services.punch_service import PunchService
 from src.schemas.attendance import AttendanceResponse, AttendanceRecord, AttendanceSummary, AttendanceBreakdown, DailyAttendanceRecord
 
 router = APIRouter()
@@ -28,59 +34,56 @@ def check_hr_access(current_employee: dict = Depends(get_current_employee)):
         )
     return current_employee
 
+def attendance_period(month: Optional[int], year: Optional[int]):
+    """Date range for the month/year filters (a month alone means this year's), or None when unfiltered"""
+    if not month and not year:
+        return None
+    year = year or date.today().year
+    if month:
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    return date(year, 1, 1), date(year, 12, 31)
+
 @router.post("/attendance/punch-in")
-def punch_in(employee_id: str, db: Session = Depends(get_db)):
+def punch_in(employee_id: str, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"), db: Session = Depends(get_db)):
     try:
-        active = db.query(Attendance).filter(Attendance.employee_id == employee_id, Attendance.attendance_date == date.today(), Attendance.punch_out == None).first()
-        if active:
-            raise HTTPException(status_code=400, detail="Already punched in")
-        now = datetime.now()
-        attendance = Attendance(employee_id=employee_id, attendance_date=now.date(), punch_in=now.time(), status="Present")
-        db.add(attendance)
-        db.commit()
-        db.refresh(attendance)
-        return {"success": True, "message": "Punched in successfully", "attendance_id": attendance.attendance_id, "punch_in": attendance.punch_in}
+        result = PunchService.punch_in(db, employee_id, idempotency_key)
+        DashboardService.invalidate(employee_id)
+        return {"success": True, "message": "Punched in successfully", "attendance_id": result.attendance_id, "punch_in": result.punch_in}
     except HTTPException:
         raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/attendance/punch-out")
-def punch_out(employee_id: str, db: Session = Depends(get_db)):
+def punch_out(employee_id: str, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"), db: Session = Depends(get_db)):
     try:
-        active = db.query(Attendance).filter(Attendance.employee_id == employee_id, Attendance.attendance_date == date.today(), Attendance.punch_out == None).first()
-        if not active:
-            raise HTTPException(status_code=400, detail="No active session found")
-        now = datetime.now()
-        punch_in_dt = datetime.combine(active.attendance_date, active.punch_in)
-        time_diff = now - punch_in_dt
-        work_hours = round(time_diff.total_seconds() / 3600, 2)
-        active.punch_out = now.time()
-        active.work_hours = work_hours
-        db.commit()
-        return {"success": True, "message": "Punched out successfully", "attendance_id": active.attendance_id, "punch_out": active.punch_out, "work_hours": work_hours}
+        result = PunchService.punch_out(db, employee_id, idempotency_key)
+        DashboardService.invalidate(employee_id)
+        return {"success": True, "message": "Punched out successfully", "attendance_id": result.attendance_id, "punch_out": result.punch_out, "work_hours": result.work_hours}
     except HTTPException:
         raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/attendance/recent")
-def get_recent_attendance(employee_id: str, db: Session = Depends(get_db)):
+async def get_recent_attendance(employee_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        records = db.query(Attendance).filter(Attendance.employee_id == employee_id).order_by(Attendance.attendance_date.desc()).limit(10).all()
+        records = (await db.execute(select(Attendance).where(Attendance.employee_id == employee_id).order_by(Attendance.attendance_date.desc()).limit(10))).scalars().all()
         return [{"attendance_id": r.attendance_id, "employee_id": r.employee_id, "attendance_date": r.attendance_date, "punch_in": r.punch_in, "punch_out": r.punch_out, "work_hours": r.work_hours, "status": r.status, "created_at": r.created_at} for r in records]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/attendance", response_model=AttendanceResponse)
-def get_attendance(
+async def get_attendance(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_employee: dict = Depends(check_hr_access)
 ):
     query = (
-        db.query(
+        select(
             Attendance.employee_id,
             (Employee.first_name + ' ' + Employee.last_name).label('employee_name'),
             Department.department_name.label('department'),
@@ -95,20 +98,27 @@ def get_attendance(
         .join(Department, Employee.department_id == Department.department_id)
     )
     
-    if month:
-        query = query.filter(extract('month', Attendance.attendance_date) == month)
-    if year:
-        query = query.filter(extract('year', Attendance.attendance_date) == year)
+    # Range predicates keep idx_attendance_date usable
+    period = attendance_period(month, year)
+    if period:
+        query = query.where(Attendance.attendance_date >= period[0], Attendance.attendance_date <= period[1])
     
-    results = query.all()
+    results = (await db.execute(query)).all()
     
-    total_employees = db.query(func.count(func.distinct(Employee.employee_id))).scalar()
+    total_employees = (await db.execute(select(func.count(func.distinct(Employee.employee_id))))).scalar()
     
-    present_count = sum(1 for r in results if r.status and r.status.lower() in ['present', 'late'])
-    absent_count = sum(1 for r in results if r.status and r.status.lower() == 'absent')
-    leave_count = sum(1 for r in results if r.status and r.status.lower() == 'leave')
+    totals = await db.run_sync(AttendanceRollupService.get_daily_totals, *(period or (None, None)))
+    present_count = totals.present + totals.late
+    absent_count = totals.absent
+    leave_count = totals.on_leave
     
-    attendance_rate = (present_count / total_employees * 100) if total_employees > 0 else 0
+    # Rate against the employee-days the workforce was due to work over the period (or the span the records cover)
+    attendance_rate = 0
+    if results:
+        first_day, last_day = period or (min(r.date for r in results), max(r.date for r in results))
+        last_day = min(last_day, date.today())
+        expected_days = await db.run_sync(CalendarService.expected_attendance_days, first_day, last_day)
+        attendance_rate = min(100.0, present_count / expected_days * 100) if expected_days > 0 else 0
     
     summary = AttendanceSummary(
         total_employees=total_employees,
@@ -135,39 +145,51 @@ def get_attendance(
     return AttendanceResponse(summary=summary, records=records)
 
 @router.get("/attendance/breakdown", response_model=AttendanceBreakdown)
-def get_attendance_breakdown(
+async def get_attendance_breakdown(
     employee_id: str = Query(...),
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_employee: dict = Depends(check_hr_access)
 ):
-    emp_result = db.query(Employee, Department.department_name).join(
+    emp_result = (await db.execute(select(Employee, Department.department_name, ShiftMaster.working_days).join(
         Department, Employee.department_id == Department.department_id
-    ).filter(Employee.employee_id == employee_id).first()
+    ).outerjoin(
+        ShiftMaster, Employee.shift_id == ShiftMaster.shift_id
+    ).where(Employee.employee_id == employee_id))).first()
     
     if not emp_result:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    employee, department_name = emp_result
-    
-    att_query = db.query(Attendance).filter(Attendance.employee_id == employee.employee_id)
-    
-    if month:
-        att_query = att_query.filter(extract('month', Attendance.attendance_date) == month)
-    if year:
-        att_query = att_query.filter(extract('year', Attendance.attendance_date) == year)
-    
-    attendance_records = att_query.order_by(Attendance.attendance_date).all()
-    
-    present_days = sum(1 for r in attendance_records if r.status and r.status.lower() == 'present')
-    late_days = sum(1 for r in attendance_records if r.status and r.status.lower() == 'late')
-    absent_days = sum(1 for r in attendance_records if r.status and r.status.lower() == 'absent')
-    half_days = sum(1 for r in attendance_records if r.status and r.status.lower() == 'half day')
-    leave_days = sum(1 for r in attendance_records if r.status and r.status.lower() == 'leave')
-    
-    total_work_days = len(attendance_records)
-    total_work_hours = sum(r.work_hours for r in attendance_records if r.work_hours) or Decimal(0)
+    employee, department_name, working_days = emp_result
+    
+    att_query = select(Attendance).where(Attendance.employee_id == employee.employee_id)
+    
+    period = attendance_period(month, year)
+    if period:
+        att_query = att_query.where(Attendance.attendance_date >= period[0], Attendance.attendance_date <= period[1])
+    
+    attendance_records = (await db.execute(att_query.order_by(Attendance.attendance_date))).scalars().all()
+    
+    totals = await db.run_sync(AttendanceRollupService.get_employee_totals, employee.employee_id, *(period or (None, None)))
+    present_days = totals.present
+    late_days = totals.late
+    absent_days = totals.absent
+    half_days = totals.half_day
+    leave_days = totals.on_leave
+    
+    # Working days due in the requested period (or the span the records cover), per shift pattern and holidays
+    total_work_days = totals.records
+    if period:
+        first_day, last_day = period
+    elif attendance_records:
+        first_day, last_day = attendance_records[0].attendance_date, attendance_records[-1].attendance_date
+    else:
+        first_day = last_day = None
+    if first_day:
+        last_day = min(last_day, date.today())
+        total_work_days = await db.run_sync(CalendarService.business_days, first_day, last_day, working_days)
+    total_work_hours = Decimal(totals.work_hours or 0)
     attendance_rate = ((present_days + late_days) / total_work_days * 100) if total_work_days > 0 else 0
     
     daily_records = [
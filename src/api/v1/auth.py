@@ -10,6 +10,7 @@ from src.models.user import User
 from src.api.deps import get_current_user, get_db
 from src.config.constants import ACCESS_TOKEN_EXPIRE_MINUTES
 from src.services.token_service import TokenService
+from src.core.principal import invalidate_principal
 from datetime import timedelta
  
 router = APIRouter()
@@ -146,6 +147,7 @@ async def change_password(
     # Update password
     current_user.hashed_password = get_password_hash(request.new_password)
     db.commit()
+    invalidate_principal(user_id=current_user.id)
    
     return MessageResponse(message="Password changed successfully")
  
@@ -200,6 +202,7 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db))
     # Update password
     user.hashed_password = get_password_hash(request.new_password)
     db.commit()
+    invalidate_principal(user_id=user.id)
    
     return MessageResponse(message="Password reset successfully")
  
@@ -16,6 +16,8 @@ from src.models.Employee_models import (
 )
 from src.models.Employee_models import EmployeePersonalDetailsModel as EmployeePersonalDetails
 from src.models.user import User
+from src.services.dashboard_service import DashboardService
+from src.services.compensation_service import CompensationService
 
 from schemas.employee_complete_new import CompleteEmployeeCreateResponse
 from core.security import get_password_hash
@@ -593,6 +595,11 @@ async def create_complete_employee(
         )
         db.add(employee)
         db.flush()  # Get the employee_id for foreign keys
+        try:
+            # Numeric, effective-dated CTC used by payroll; annual_ctc above stays as entered
+            CompensationService.record(db, employee_id, annual_ctc, employee.joining_date)
+        except ValueError as e:
+            logger.warning(f"Not recording compensation for {employee_id}: {e}")
 
         # 2. Create Employee Personal Details
         personal_details = EmployeePersonalDetails(
@@ -722,6 +729,7 @@ async def create_complete_employee(
         
         # Commit all changes
         db.commit()
+        DashboardService.invalidate_org_widgets()
 
         # 9. Send onboarding email to personal email
         email_sent = False
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
-from src.models.session import get_db
+from src.models.session import get_db, get_read_db
 from src.models.events_holidays import EventsHolidays
 from src.schemas.events_holidays import EventsHolidaysCreate, EventsHolidaysResponse
+from src.services.dashboard_service import DashboardService
+from src.services.calendar_service import CalendarService
 
 router = APIRouter()
 
@@ -13,6 +15,8 @@ def create_event_holiday(event: EventsHolidaysCreate, db: Session = Depends(get_
     db_obj = EventsHolidays(**event.dict())
     db.add(db_obj)
     db.commit()
+    DashboardService.invalidate_org_widgets()
+    CalendarService.invalidate()
     db.refresh(db_obj)
     return db_obj
 
@@ -23,7 +27,7 @@ def get_all_events_holidays(db: Session = Depends(get_db)):
     return [dict(row._mapping) for row in result]
 
 @router.get("/cards")
-def get_events_holidays_cards(db: Session = Depends(get_db)):
+def get_events_holidays_cards(db: Session = Depends(get_read_db)):
     query = text("""
         SELECT 
             COUNT(*) as total,
@@ -45,6 +49,8 @@ def update_event_holiday(name: str, event: EventsHolidaysCreate, db: Session = D
         setattr(db_obj, key, value)
     
     db.commit()
+    DashboardService.invalidate_org_widgets()
+    CalendarService.invalidate()
     db.refresh(db_obj)
     return db_obj
 
@@ -56,5 +62,7 @@ def delete_event_holiday(name: str, db: Session = Depends(get_db)):
     
     db.delete(db_obj)
     db.commit()
+    DashboardService.invalidate_org_widgets()
+    CalendarService.invalidate()
     return {"message": "Event/Holiday deleted successfully"}
 
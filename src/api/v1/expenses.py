@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, Query
 from sqlalchemy.orm import Session
 from api.deps import get_db
+from src.models.session import get_read_db
 from src.core.security import get_current_user_email, require_employee_manager_hr_roles, require_hr_roles_only
 from schemas.expense import ExpenseResponse, ExpenseStatusResponse
 from services.expense_service import ExpenseService
@@ -110,7 +111,7 @@ def create_expense_request(
 @router.get("/employee-expenses")
 def get_all_expenses(
     current_user: dict = Depends(require_hr_roles_only),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         expenses = ExpenseService.get_all_expenses(db)
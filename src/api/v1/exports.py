@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import date
+
+from src.core.security import require_hr_roles_only
+from src.services.export_service import ExportService, DATASETS, FORMATS
+
+router = APIRouter()
+
+@router.get("/exports/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="csv or ndjson"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    employee_id: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    current_user: dict = Depends(require_hr_roles_only)
+):
+    """Stream attendance, time entries or expenses for a period (HR only)"""
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{dataset}'. Available: {', '.join(DATASETS)}")
+    fmt = format.lower()
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use csv or ndjson")
+    if start_date and end_date and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date")
+
+    period = "_".join(str(day) for day in (start_date, end_date) if day) or "all"
+    filename = f"{dataset}_{period}.{fmt}"
+    return StreamingResponse(
+        ExportService.stream(dataset, fmt, start_date, end_date, employee_id, status),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
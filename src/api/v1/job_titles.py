@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
 
-from src.models.session import get_db
+from src.models.session import get_db, get_read_db
 from src.core.security import require_hr_roles_only
 from src.models.job_title import JobTitle
 from src.schemas.job_title import JobTitleCreate, JobTitleResponse, JobTitleUpdate
@@ -25,7 +25,7 @@ def create_job_title(
     return db_job_title
 
 @router.get("/cards")
-def get_job_title_cards(db: Session = Depends(get_db)):
+def get_job_title_cards(db: Session = Depends(get_read_db)):
     query = text("""
         SELECT 
             COUNT(DISTINCT jt.job_title_id) as total_roles,
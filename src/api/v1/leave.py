@@ -1,14 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List
-from src.models.session import get_db
-from src.services.leave_service import LeaveService, ManagerService, HRExecutiveService
+from typing import List, Optional
+from datetime import date
+from src.models.session import get_db, get_async_db
+from src.services.leave_service import LeaveService, ManagerService, HRExecutiveService, DEFAULT_PAGE_SIZE
+from src.services.leave_balance_service import LeaveBalanceService
 from src.schemas.leave import LeaveCreate, LeaveResponse, LeaveBalance, ManagerLeaveCreate, ManagerLeaveResponse, ManagerBalanceResponse, HRExecutiveLeaveCreate, HRExecutiveLeaveResponse, HRExecutiveBalanceResponse
 from src.models.leave import Leave
+from src.services.dashboard_service import DashboardService
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 500
+
+
+class LeavePage:
+    """Keyset pagination and filter query parameters shared by the leave listings"""
+
+    def __init__(
+        self,
+        after: Optional[int] = Query(None, description="Return leaves older than this leave_id (the X-Next-Cursor of the previous page)"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        status: Optional[str] = Query(None, description="Only leaves with this status, e.g. PENDING"),
+        from_date: Optional[date] = Query(None, description="Only leaves ending on or after this date"),
+        to_date: Optional[date] = Query(None, description="Only leaves starting on or before this date")
+    ):
+        self.after = after
+        self.limit = limit
+        self.status = status
+        self.from_date = from_date
+        self.to_date = to_date
+
+    def kwargs(self) -> dict:
+        return {"after": self.after, "limit": self.limit, "status": self.status, "from_date": self.from_date, "to_date": self.to_date}
+
+    def set_next_cursor(self, response: Response, items: list) -> list:
+        """A full page means there may be more; point the client at the last leave_id"""
+        if len(items) == self.limit:
+            response.headers["X-Next-Cursor"] = str(items[-1].leave_id)
+        return items
+
 # Employee Leave Routes
 @router.post("/leave/apply", response_model=LeaveResponse, tags=["Leave Management"])
 def apply_leave(leave: LeaveCreate, db: Session = Depends(get_db)):
@@ -18,30 +51,32 @@ def apply_leave(leave: LeaveCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/leave/history/{employee_id}", response_model=List[LeaveResponse], tags=["Leave Management"])
-def get_leave_history(employee_id: str, db: Session = Depends(get_db)):
+async def get_leave_history(employee_id: str, response: Response, page: LeavePage = Depends(), db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": employee_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": employee_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="Employee not found")
         designation = emp_result[0]
         if designation and any(role in designation.lower() for role in ['manager', 'executive', 'admin']):
             raise HTTPException(status_code=403, detail="Access denied. This endpoint is only for employees.")
-        return LeaveService.get_leaves(db, employee_id=employee_id)
+        leaves = await db.run_sync(LeaveService.get_leaves, employee_id=employee_id, **page.kwargs())
+        return page.set_next_cursor(response, leaves)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/leave/pending/{manager_id}", response_model=List[LeaveResponse], tags=["Leave Management"])
-def get_pending_leaves_for_manager(manager_id: str, db: Session = Depends(get_db)):
+async def get_pending_leaves_for_manager(manager_id: str, response: Response, page: LeavePage = Depends(), db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="Manager not found")
         designation = emp_result[0]
         if designation and 'manager' not in designation.lower():
             raise HTTPException(status_code=403, detail="Access denied. This endpoint is only for managers.")
-        return LeaveService.get_pending_approvals(db, manager_id)
+        leaves = await db.run_sync(LeaveService.get_pending_approvals, manager_id, **page.kwargs())
+        return page.set_next_cursor(response, leaves)
     except HTTPException:
         raise
     except Exception as e:
@@ -62,12 +97,16 @@ def approve_reject_leave(leave_id: str, action: str = Query(...), manager_id: st
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid leave_id format: '{leave_id}'. Expected numeric leave_id, not employee_id.")
         
-        leave = db.query(Leave).filter(Leave.leave_id == leave_id_int).first()
+        # Row lock: a concurrent approval of the same request waits and then sees the new status
+        leave = db.query(Leave).filter(Leave.leave_id == leave_id_int).with_for_update().first()
         if not leave:
             raise HTTPException(status_code=404, detail="Leave not found")
         
+        previous_status = leave.status
         leave.status = "APPROVED" if action.lower() == "approve" else "REJECTED"
+        LeaveBalanceService.record_status_change(db, leave.employee_id, leave.leave_type, leave.start_date, previous_status, leave.status, LeaveBalanceService.leave_days(db, leave))
         db.commit()
+        DashboardService.invalidate(leave.employee_id)
         db.refresh(leave)
         
         return LeaveResponse(
@@ -85,20 +124,16 @@ def approve_reject_leave(leave_id: str, action: str = Query(...), manager_id: st
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/leave/balance/{employee_id}", response_model=LeaveBalance, tags=["Leave Management"])
-def get_leave_balance(employee_id: str, db: Session = Depends(get_db)):
+async def get_leave_balance(employee_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": employee_id}).fetchone()
-        if not emp_result:
+        balance = await db.run_sync(LeaveBalanceService.get_balance, employee_id)
+        if not balance:
             raise HTTPException(status_code=404, detail="Employee not found")
-        # Get annual leaves from employees table
-        emp_result = db.execute(text("SELECT annual_leaves FROM employees WHERE employee_id = :emp_id"), {"emp_id": employee_id}).fetchone()
-        total_leaves = emp_result[0] if emp_result and emp_result[0] else 18
+        total_leaves = balance.annual_leaves if balance.annual_leaves else 18
         each_leave = total_leaves // 3
         
-        casual_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'casual'"), {"emp_id": employee_id}).fetchone()[0] or 0
-        sick_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'sick'"), {"emp_id": employee_id}).fetchone()[0] or 0
-        earned_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'earned'"), {"emp_id": employee_id}).fetchone()[0] or 0
-        total_used = casual_used + sick_used + earned_used
+        casual_used, sick_used, earned_used = balance.used_casual, balance.used_sick, balance.used_earned
+        total_used = balance.total_used
         
         return LeaveBalance(casual_leave=each_leave, sick_leave=each_leave, earned_leaves=each_leave, total_leaves=total_leaves, employee_used_leaves=total_used, used_casual=casual_used, used_sick=sick_used, used_earned=earned_used, remaining_casual=each_leave-casual_used, remaining_sick=each_leave-sick_used, remaining_earned=each_leave-earned_used)
     except HTTPException:
@@ -126,24 +161,24 @@ def manager_apply_leave(leave: ManagerLeaveCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=500, detail=f"Error applying leave: {str(e)}")
 
 @router.get("/manager/history/{manager_id}", response_model=List[ManagerLeaveResponse], tags=["Manager to HR Executive"])
-def get_manager_leave_history(manager_id: str, db: Session = Depends(get_db)):
+async def get_manager_leave_history(manager_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="Manager not found")
         designation = emp_result[0]
         if designation and 'manager' not in designation.lower():
             raise HTTPException(status_code=403, detail="Access denied. This endpoint is only for managers.")
-        return ManagerService.get_leave_history(db, manager_id)
+        return await db.run_sync(ManagerService.get_leave_history, manager_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/manager/pending/{hr_executive_id}", response_model=List[ManagerLeaveResponse], tags=["Manager to HR Executive"])
-def get_pending_manager_leaves(hr_executive_id: str, db: Session = Depends(get_db)):
+async def get_pending_manager_leaves(hr_executive_id: str, response: Response, page: LeavePage = Depends(), db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="HR Executive not found")
         designation = emp_result[0].lower().replace('_', ' ').replace('-', ' ') if emp_result[0] else ""
@@ -152,26 +187,27 @@ def get_pending_manager_leaves(hr_executive_id: str, db: Session = Depends(get_d
         is_hr_executive = any(keyword in designation for keyword in hr_executive_keywords)
         if not is_hr_executive:
             raise HTTPException(status_code=403, detail=f"Access denied. Employee designation '{emp_result[0]}' is not authorized for this endpoint. This endpoint is only for HR Executives.")
-        return ManagerService.get_pending_approvals(db, hr_executive_id)
+        leaves = await db.run_sync(ManagerService.get_pending_approvals, hr_executive_id, **page.kwargs())
+        return page.set_next_cursor(response, leaves)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/manager/balance/{manager_id}", response_model=ManagerBalanceResponse, tags=["Manager to HR Executive"])
-def get_manager_leave_balance(manager_id: str, db: Session = Depends(get_db)):
+async def get_manager_leave_balance(manager_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="Manager not found")
         designation = emp_result[0]
         if designation and 'manager' not in designation.lower():
             raise HTTPException(status_code=403, detail="Access denied. This endpoint is only for managers.")
-        return ManagerService.get_leave_balance(db, manager_id)
+        return await db.run_sync(ManagerService.get_leave_balance, manager_id)
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/manager/approve/{leave_id}", tags=["Manager to HR Executive"])
@@ -203,9 +239,9 @@ def hr_executive_apply_leave(leave: HRExecutiveLeaveCreate, db: Session = Depend
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/hr-executive/history/{hr_executive_id}", response_model=List[HRExecutiveLeaveResponse], tags=["HR Executive to HR Manager"])
-def get_hr_executive_leave_history(hr_executive_id: str, db: Session = Depends(get_db)):
+async def get_hr_executive_leave_history(hr_executive_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="HR Executive not found")
         designation = emp_result[0].lower().replace('_', ' ').replace('-', ' ') if emp_result[0] else ""
@@ -215,16 +251,16 @@ def get_hr_executive_leave_history(hr_executive_id: str, db: Session = Depends(g
         is_hr_manager = any(keyword in designation for keyword in hr_manager_keywords)
         if not (is_hr_executive or is_hr_manager):
             raise HTTPException(status_code=403, detail=f"Access denied. Employee designation '{emp_result[0]}' is not authorized for this endpoint.")
-        return HRExecutiveService.get_leave_history(db, hr_executive_id)
+        return await db.run_sync(HRExecutiveService.get_leave_history, hr_executive_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/hr-executive/pending/{hr_manager_id}", response_model=List[HRExecutiveLeaveResponse], tags=["HR Executive to HR Manager"])
-def get_pending_hr_executive_leaves(hr_manager_id: str, db: Session = Depends(get_db)):
+async def get_pending_hr_executive_leaves(hr_manager_id: str, response: Response, page: LeavePage = Depends(), db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_manager_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_manager_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="HR Manager not found")
         designation = emp_result[0].lower().replace('_', ' ').replace('-', ' ') if emp_result[0] else ""
@@ -232,16 +268,17 @@ def get_pending_hr_executive_leaves(hr_manager_id: str, db: Session = Depends(ge
         is_hr_manager = any(keyword in designation for keyword in hr_manager_keywords)
         if not is_hr_manager:
             raise HTTPException(status_code=403, detail=f"Access denied. Employee designation '{emp_result[0]}' is not authorized for this endpoint. This endpoint is only for HR Managers.")
-        return HRExecutiveService.get_pending_approvals(db, hr_manager_id)
+        leaves = await db.run_sync(HRExecutiveService.get_pending_approvals, hr_manager_id, **page.kwargs())
+        return page.set_next_cursor(response, leaves)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/hr-executive/balance/{hr_executive_id}", response_model=HRExecutiveBalanceResponse, tags=["HR Executive to HR Manager"])
-def get_hr_executive_leave_balance(hr_executive_id: str, db: Session = Depends(get_db)):
+async def get_hr_executive_leave_balance(hr_executive_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        emp_result = db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id}).fetchone()
+        emp_result = (await db.execute(text("SELECT designation FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id})).fetchone()
         if not emp_result:
             raise HTTPException(status_code=404, detail="HR Executive not found")
         designation = emp_result[0].lower().replace('_', ' ').replace('-', ' ') if emp_result[0] else ""
@@ -251,7 +288,7 @@ def get_hr_executive_leave_balance(hr_executive_id: str, db: Session = Depends(g
         is_hr_manager = any(keyword in designation for keyword in hr_manager_keywords)
         if not (is_hr_executive or is_hr_manager):
             raise HTTPException(status_code=403, detail=f"Access denied. Employee designation '{emp_result[0]}' is not authorized for this endpoint.")
-        return HRExecutiveService.get_leave_balance(db, hr_executive_id)
+        return await db.run_sync(HRExecutiveService.get_leave_balance, hr_executive_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
-from src.models.session import get_db
+from src.models.session import get_db, get_read_db
+from src.core.principal import invalidate_principal
+from src.services.dashboard_service import DashboardService
 from src.models.off_boarding import OffBoarding
 from src.schemas.off_boarding import OffBoardingCreate, OffBoardingResponse
 
@@ -30,7 +32,7 @@ def get_all_off_boarding(db: Session = Depends(get_db)):
     return [dict(row._mapping) for row in result]
 
 @router.get("/cards")
-def get_off_boarding_cards(db: Session = Depends(get_db)):
+def get_off_boarding_cards(db: Session = Depends(get_read_db)):
     query = text("""
         SELECT 
             COUNT(*) as total_exits,
@@ -137,5 +139,9 @@ def update_off_boarding(employee_id: str, off_boarding_update: OffBoardingCreate
             raise HTTPException(status_code=500, detail=f"Error removing employee: {str(e)}")
     
     db.commit()
+    if off_boarding.status == "INITIATED":
+        invalidate_principal(employee_id=off_boarding.employee_id)
+        DashboardService.invalidate(off_boarding.employee_id)
+        DashboardService.invalidate_org_widgets()
     db.refresh(off_boarding)
     return {"message": "Off-boarding updated successfully", "off_boarding": off_boarding}
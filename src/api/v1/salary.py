@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from api.deps import get_db
-from src.core.security import require_hr_roles_only
-from schemas.salary import SalaryCreate, SalaryResponse, PayslipResponse, PayrollSetupUpdate, SalaryComponentUpdate, ComponentDelete
-from services.salary_service import SalaryService
+from src.models.session import get_read_db
+from src.core.security import require_hr_roles_only, get_current_principal, is_hr_role
+from src.core.principal import Principal
+from schemas.salary import SalaryCreate, SalaryResponse, PayslipResponse, PayrollSetupUpdate, SalaryComponentUpdate, ComponentDelete, CompensationCreate, PayrollScenario
+from services.salary_service import SalaryService, DEFAULT_PAGE_SIZE
+from services.payroll_run_service import PayrollRunService
+from services.payroll_simulation_service import PayrollSimulationService
+from services.payslip_service import PayslipService
+from services.compensation_service import CompensationService
+from src.services.export_service import ExportService, FORMATS
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import json
+import subprocess
+import sys
+from pathlib import Path
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 500
+
+GENERATE_PAYSLIPS_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "generate_payslips.py"
+
 
 
 @router.delete("/delete-payslip/{employee_id}/{month}")
@@ -30,7 +45,7 @@ def delete_payslip(
 
 
 @router.get("/get-salary-summary/{employee_id}")
-def get_salary_summary(employee_id: str, db: Session = Depends(get_db)):
+def get_salary_summary(employee_id: str, db: Session = Depends(get_read_db)):
     try:
         return SalaryService.get_salary_summary(db, employee_id)
     except Exception as e:
@@ -40,10 +55,33 @@ def get_salary_summary(employee_id: str, db: Session = Depends(get_db)):
 
 @router.get("/salaries")
 def get_all_salaries(
+    response: Response,
+    month: Optional[str] = Query(None, description="Pay month, e.g. 2026-04 or April 2026"),
+    department_id: Optional[int] = Query(None),
+    search: Optional[str] = Query(None, description="Matches employee name, email or ID"),
+    after: Optional[int] = Query(None, description="Return rows older than this payroll_id (the X-Next-Cursor of the previous page)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", description="json for one page; csv or ndjson to stream every matching row"),
     current_user: dict = Depends(require_hr_roles_only),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    return SalaryService.get_all_salaries(db)
+    """HR salary grid, newest payroll records first"""
+    fmt = format.lower()
+    if fmt in FORMATS:
+        query, params = SalaryService.salary_list_query(month, department_id, search)
+        filename = f"salaries_{month or 'all'}.{fmt}".replace(" ", "_")
+        return StreamingResponse(
+            ExportService.stream_query(query, params, fmt, "salary"),
+            media_type=FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    if fmt != "json":
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use json, csv or ndjson")
+    salaries = SalaryService.get_all_salaries(db, month, department_id, search, after, limit)
+    # A full page means there may be more; point the client at the last payroll_id
+    if len(salaries) == limit:
+        response.headers["X-Next-Cursor"] = str(salaries[-1]["payroll_id"])
+    return salaries
 
 @router.get("/all-employee-ids")
 def get_all_employee_ids(
@@ -100,15 +138,147 @@ def save_salary_structure(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving salary structure: {str(e)}")
 
+@router.post("/payroll-runs/{month}")
+def run_payroll(
+    month: str,
+    pay_cycle: str = Query("Monthly"),
+    employee_ids: List[str] = Query(None),
+    current_user: dict = Depends(require_hr_roles_only),
+    db: Session = Depends(get_db)
+):
+    """Compute payroll for every employee (or the given ones) for a pay month in one transaction"""
+    try:
+        return PayrollRunService.run(db, month, pay_cycle, employee_ids).as_dict()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running payroll: {str(e)}")
+
+@router.post("/payroll-simulations")
+def simulate_payroll(
+    scenario: PayrollScenario,
+    current_user: dict = Depends(require_hr_roles_only),
+    db: Session = Depends(get_read_db)
+):
+    """What-if payroll cost per department and for the organisation under changed rates; writes nothing"""
+    try:
+        return PayrollSimulationService.simulate(db, **scenario.dict()).as_dict()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error simulating payroll: {str(e)}")
+
+@router.get("/payroll-cost")
+def get_payroll_cost(
+    start_month: str = Query(..., description="First pay month, e.g. 2026-04"),
+    end_month: str = Query(None, description="Last pay month; defaults to start_month"),
+    current_user: dict = Depends(require_hr_roles_only),
+    db: Session = Depends(get_read_db)
+):
+    """Payroll cost per department over a range of pay months"""
+    start = CompensationService.parse_pay_period(start_month)
+    end = CompensationService.parse_pay_period(end_month or start_month)
+    if start is None or end is None:
+        raise HTTPException(status_code=400, detail="Pay months must look like 2026-04 or April 2026")
+    try:
+        return {
+            "start_month": start,
+            "end_month": end,
+            "departments": CompensationService.cost_by_department(db, start, CompensationService.period_end(end))
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving payroll cost: {str(e)}")
+
+@router.get("/compensation/{employee_id}")
+def get_compensation_history(
+    employee_id: str,
+    current_user: dict = Depends(require_hr_roles_only),
+    db: Session = Depends(get_read_db)
+):
+    """Effective-dated annual CTC history, newest first"""
+    return {"employee_id": employee_id, "compensation": CompensationService.history(db, employee_id)}
+
+@router.post("/compensation/{employee_id}")
+def record_compensation(
+    employee_id: str,
+    compensation: CompensationCreate,
+    current_user: dict = Depends(require_hr_roles_only),
+    db: Session = Depends(get_db)
+):
+    """Record a CTC change effective from a date; payroll for later pay months uses it"""
+    try:
+        from models.Employee_models import Employee
+        if not db.query(Employee.employee_id).filter(Employee.employee_id == employee_id).first():
+            raise HTTPException(status_code=404, detail="Employee not found")
+        annual_ctc = CompensationService.record(db, employee_id, compensation.annual_ctc, compensation.effective_from)
+        db.commit()
+        SalaryService.invalidate(employee_id)
+        return {
+            "message": "Compensation recorded successfully",
+            "employee_id": employee_id,
+            "annual_ctc": float(annual_ctc),
+            "compensation": CompensationService.history(db, employee_id)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error recording compensation: {str(e)}")
+
 @router.get("/payslip/{employee_id}")
-def get_employee_payslip(employee_id: str, month: str = Query(None), db: Session = Depends(get_db)):
-    """Get employee payslip information"""
+def get_employee_payslip(
+    employee_id: str,
+    month: str = Query(None),
+    format: str = Query("json", description="json or pdf"),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
+):
+    """Get employee payslip information, or the payslip PDF with format=pdf (the employee themselves or HR)"""
+    if principal.employee_id != employee_id and not is_hr_role(principal.role):
+        raise HTTPException(status_code=403, detail="Access denied. Employees can only view their own payslips.")
     try:
+        if format.lower() == "pdf":
+            filename = f"payslip_{employee_id}_{month or 'latest'}.pdf"
+            path, content = PayslipService.get_pdf(db, employee_id, month)
+            if path:
+                return FileResponse(path, media_type="application/pdf", filename=filename)
+            return Response(content, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
         result = SalaryService.get_employee_payslip(db, employee_id, month)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving payslip: {str(e)}")
 
+@router.post("/payslips/{month}/generate", status_code=202)
+def generate_payslips(
+    month: str,
+    background_tasks: BackgroundTasks,
+    force: bool = Query(False),
+    current_user: dict = Depends(require_hr_roles_only)
+):
+    """Start rendering a pay month's payslip PDFs in a separate process; unchanged payroll rows reuse their cached file.
+
+    One run per month at a time: 409 while a run for the month is still in progress.
+    """
+    # The process pool runs in the CLI script, never in the API worker; progress goes to its stdout
+    command = [sys.executable, str(GENERATE_PAYSLIPS_SCRIPT), "--month", month]
+    if force:
+        command.append("--force")
+    lock = PayslipService.claim_generation(month)
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        PayslipService.release_generation(lock)
+        raise HTTPException(status_code=500, detail=f"Error starting payslip generation: {str(e)}")
+    PayslipService.record_generation_pid(lock, process.pid)
+    background_tasks.add_task(_finish_generation, process, lock)
+    return {"month": month, "status": "started", "pid": process.pid}
+
+
+def _finish_generation(process: subprocess.Popen, lock: str):
+    """Reap the generation process so it does not linger as a zombie, then free the month"""
+    try:
+        process.wait()
+    finally:
+        PayslipService.release_generation(lock)
+
 
 
 @router.put("/update-salary-components")
@@ -124,7 +294,7 @@ def update_salary_components(
         raise HTTPException(status_code=500, detail=f"Error updating salary components: {str(e)}")
 
 @router.get("/salary-history/{employee_id}")
-def get_salary_history(employee_id: str, db: Session = Depends(get_db)):
+def get_salary_history(employee_id: str, db: Session = Depends(get_read_db)):
     """Get salary history showing Month, Year, Basic Salary, Allowances, Deductions, Net Pay"""
     try:
         return SalaryService.get_salary_history(db, employee_id)
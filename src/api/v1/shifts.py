@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
 
-from src.models.session import get_db
+from src.models.session import get_db, get_read_db
 from src.models.shift import Shift
 from src.schemas.shift import ShiftResponse, ShiftUpdate
 from src.services.shift_service import ShiftService
@@ -32,7 +32,7 @@ def get_shifts(db: Session = Depends(get_db)):
     return result
 
 @router.get("/cards")
-def get_shift_cards(db: Session = Depends(get_db)):
+def get_shift_cards(db: Session = Depends(get_read_db)):
     # Get total shifts
     total_shifts = db.execute(text("SELECT COUNT(*) FROM shift_master")).scalar()
     
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 from sqlalchemy import text
 from typing import List
 from datetime import date
 
-from src.models.session import get_db
+from src.models.session import get_db, get_async_read_db
 from src.models.timesheet import Timesheet
 from src.schemas.timesheet import TimesheetCreate, TimesheetResponse, TimesheetUpdate
 from src.schemas.timesheet_status import TimesheetStatusUpdate
+from src.services.dashboard_service import DashboardService
 
 router = APIRouter()
 
@@ -69,6 +71,7 @@ def create_timesheet(timesheet: TimesheetCreate, db: Session = Depends(get_db)):
         })
         
         db.commit()
+        DashboardService.invalidate(timesheet.employee_id)
         row = result.fetchone()
         
         return {
@@ -93,9 +96,9 @@ def create_timesheet(timesheet: TimesheetCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/")
-def get_timesheets(db: Session = Depends(get_db)):
+async def get_timesheets(db: AsyncSession = Depends(get_async_read_db)):
     query = text("SELECT * FROM time_entries ORDER BY created_at DESC")
-    result = db.execute(query).fetchall()
+    result = (await db.execute(query)).fetchall()
     
     return [{
         "time_entry_id": row.time_entry_id,
@@ -112,7 +115,7 @@ def get_timesheets(db: Session = Depends(get_db)):
     } for row in result]
 
 @router.get("/cards")
-def get_timesheet_cards(db: Session = Depends(get_db)):
+async def get_timesheet_cards(db: AsyncSession = Depends(get_async_read_db)):
     """Get timesheet analytics cards"""
     query = text("""
         SELECT 
@@ -122,7 +125,7 @@ def get_timesheet_cards(db: Session = Depends(get_db)):
         FROM time_entries
         WHERE status IN ('APPROVED', 'PENDING_MANAGER_APPROVAL', 'PENDING_HR_APPROVAL')
     """)
-    result = db.execute(query).fetchone()
+    result = (await db.execute(query)).fetchone()
     return {
         "total_hours": float(result.total_hours) if result.total_hours else 0,
         "tasks_logged": result.tasks_logged or 0,
@@ -189,6 +192,7 @@ def edit_timesheet(employee_id: str, timesheet_update: TimesheetUpdate, entry_da
             
             result = db.execute(update_query, params)
             db.commit()
+            DashboardService.invalidate(employee_id)
             row = result.fetchone()
             
             return {
@@ -252,6 +256,7 @@ def update_timesheet_status(employee_id: str, status_update: TimesheetStatusUpda
         
         row = result.fetchone()
         db.commit()
+        DashboardService.invalidate(employee_id)
         
         return {
             "time_entry_id": row.time_entry_id,
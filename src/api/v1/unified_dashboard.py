@@ -1,26 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from src.models.session import get_db
+from src.models.session import get_async_db
 from src.services.dashboard_service import DashboardService
 from src.schemas.dashboard import DashboardResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def get_user_role(employee_id: str, db: Session) -> str:
-    """Get employee role from database"""
-    result = db.execute(text(
-        "SELECT designation FROM employees WHERE employee_id = :emp_id"
-    ), {"emp_id": employee_id})
-    
-    employee = result.fetchone()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
-    designation = employee.designation.lower()
+def get_user_role(designation: str) -> str:
+    """Map an employee designation to a dashboard role"""
+    designation = (designation or "").lower()
     
     if "hr manager" in designation:
         return "hr_manager"
@@ -32,22 +23,24 @@ def get_user_role(employee_id: str, db: Session) -> str:
         return "employee"
 
 @router.get("/dashboard/{employee_id}", response_model=DashboardResponse)
-def get_unified_dashboard(employee_id: str, db: Session = Depends(get_db)):
+async def get_unified_dashboard(employee_id: str, db: AsyncSession = Depends(get_async_db)):
     """Unified dashboard endpoint with role-based access control"""
     try:
         logger.info(f"Dashboard request for employee: {employee_id}")
         
-        # Get user role
-        user_role = get_user_role(employee_id, db)
+        # Get dashboard data and designation together (the service runs its
+        # sync queries on the async connection)
+        result = await db.run_sync(
+            lambda session: DashboardService(session).get_dashboard_with_designation(employee_id)
+        )
         
-        # Get dashboard data
-        dashboard_service = DashboardService(db)
-        dashboard_data = dashboard_service.get_dashboard_data(employee_id)
-        
-        if not dashboard_data:
+        if not result:
             logger.warning(f"No dashboard data found for employee: {employee_id}")
             raise HTTPException(status_code=404, detail="Employee not found")
         
+        dashboard_data, designation = result
+        user_role = get_user_role(designation)
+        
         logger.info(f"Dashboard data successfully retrieved for {user_role}: {employee_id}")
         return dashboard_data
         
@@ -5,10 +5,29 @@ class Settings(BaseSettings):
     database_url: str  # Required - must be provided via env var
     secret_key: str  # Required - must be provided via env var
     
+    database_replica_url: Optional[str] = None  # Optional read replica for reporting/dashboard reads
+
+    @staticmethod
+    def _to_sync_url(url: str) -> str:
+        return url.replace("postgresql+asyncpg://", "postgresql://").replace("postgresql+psycopg://", "postgresql://")
+
     @property
     def sync_database_url(self) -> str:
         """Convert async database URL to sync for migrations"""
-        return self.database_url.replace("postgresql+asyncpg://", "postgresql://").replace("postgresql+psycopg://", "postgresql://")
+        return self._to_sync_url(self.database_url)
+
+    @property
+    def async_database_url(self) -> str:
+        """Convert sync database URL to asyncpg for async API endpoints"""
+        return self.sync_database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    @property
+    def sync_replica_url(self) -> Optional[str]:
+        return self._to_sync_url(self.database_replica_url) if self.database_replica_url else None
+
+    @property
+    def async_replica_url(self) -> Optional[str]:
+        return self.sync_replica_url.replace("postgresql://", "postgresql+asyncpg://", 1) if self.sync_replica_url else None
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
@@ -23,6 +42,29 @@ class Settings(BaseSettings):
     from_email: str = ""
     dev_mode: bool = False  # Should be False in production
     frontend_url: str = "http://localhost:3000"  # Default for local dev; override in production
+    db_pool_size: int = 10  # Persistent connections per engine (per worker process)
+    db_max_overflow: int = 20  # Extra connections allowed above db_pool_size under burst load
+    db_pool_recycle: int = 1800  # Seconds before a pooled connection is replaced
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection before failing
+    db_statement_timeout_ms: int = 30000  # Server-side statement_timeout; 0 disables it
+    fast_start: bool = False  # Skip schema inspection/creation and dummy-user setup when the schema fingerprint matches
+    query_stats_enabled: bool = False  # Per-request SQL query counter / N+1 detector
+    query_stats_repeat_threshold: int = 5  # Flag identical statements executed more often than this per request
+    token_cache_size: int = 10000  # Verified JWTs kept per worker
+    token_cache_ttl_seconds: int = 300  # Upper bound on caching a verified JWT (never beyond its exp)
+    principal_cache_size: int = 10000  # Resolved users kept per worker
+    principal_cache_ttl_seconds: int = 60  # Hard upper bound on a cached principal's age
+    principal_cache_sync_seconds: int = 5  # How often a worker revalidates cached principals against users.updated_at
+    dashboard_cache_size: int = 10000  # Per-employee dashboard results kept per worker
+    dashboard_cache_ttl_seconds: int = 30  # Short TTL; writes by the same worker invalidate immediately
+    dashboard_widgets_ttl_seconds: int = 900  # Birthdays/holidays/policies; rebuilt daily and on writes in this worker
+    calendar_cache_ttl_seconds: int = 3600  # Working-day calendars; holiday writes in this worker rebuild sooner
+    idempotency_key_ttl_hours: int = 24  # How long a punch Idempotency-Key replays its first result
+    export_batch_size: int = 1000  # Rows fetched per server-side cursor round trip in streaming exports
+    salary_cache_size: int = 10000  # Payslip/summary/history responses kept per worker
+    salary_cache_ttl_seconds: int = 300  # Entries are also keyed on the payroll rows' version
+    payslip_dir: str = "storage/payslips"  # Content-addressed payslip PDFs
+    payslip_workers: int = 0  # Processes rendering a month's payslips; 0 uses every CPU
     
     class Config:
         env_file = ".env"
@@ -3,12 +3,17 @@ Database initialization and startup functions.
 """
 
 import asyncio
+import hashlib
 import logging
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.ext.asyncio import create_async_engine
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import text, inspect
 from sqlalchemy.exc import ProgrammingError, IntegrityError
 from config.settings import settings
 from models import Base
+from src.models.session import build_engine, engine
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +28,18 @@ async def ensure_database_exists():
         postgres_url = db_url.rsplit('/', 1)[0] + '/postgres'
         sync_postgres_url = postgres_url.replace("postgresql+asyncpg://", "postgresql://")
         
-        engine = create_engine(sync_postgres_url)
-        
-        with engine.connect() as conn:
-            # Check if database exists
-            result = conn.execute(text(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'"))
-            if not result.fetchone():
-                conn.execute(text("COMMIT"))
-                conn.execute(text(f"CREATE DATABASE {db_name}"))
-                logger.info(f"Created database: {db_name}")
+        # One-off maintenance connection: unpooled and disposed straight away
+        admin_engine = build_engine(sync_postgres_url, use_pool=False)
+        try:
+            with admin_engine.connect() as conn:
+                # Check if database exists
+                result = conn.execute(text(f"SELECT 1 FROM pg_database WHERE datname = '{db_name}'"))
+                if not result.fetchone():
+                    conn.execute(text("COMMIT"))
+                    conn.execute(text(f"CREATE DATABASE {db_name}"))
+                    logger.info(f"Created database: {db_name}")
+        finally:
+            admin_engine.dispose()
             
     except Exception as e:
         logger.warning(f"Could not create database: {e}")
@@ -40,9 +48,6 @@ async def ensure_database_exists():
 async def create_tables():
     """Create all tables if they don't exist."""
     try:
-        sync_db_url = settings.sync_database_url
-        engine = create_engine(sync_db_url)
-        
         # Check existing tables first
         inspector = inspect(engine)
         existing_tables = inspector.get_table_names()
@@ -71,40 +76,116 @@ async def create_tables():
         logger.info("Application will continue - database may need manual setup")
 
 
-async def init_database():
-    """Initialize database on startup with complete schema."""
+REQUIRED_TABLES = [
+    'users', 'employees', 'departments', 'shift_master', 'job_titles',
+    'attendance', 'leave_management', 'employee_expenses', 'payroll_setup',
+    'time_entries', 'policy_master', 'events_holidays', 'off_boarding',
+    'onboarding_process', 'compliance_documents_and_policy_management',
+    'employee_personal_details', 'bank_details', 'assets', 
+    'educational_qualifications', 'employee_documents', 'employee_work_experience',
+    'leave_balances', 'attendance_daily_summary', 'attendance_monthly_summary',
+    'idempotency_keys', 'employee_compensation'
+]
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "models" / "migrations"
+
+
+@contextmanager
+def timed_phase(timings: Optional[dict], name: str):
+    """Record how long a startup phase took, in milliseconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def expected_schema_fingerprint() -> str:
+    """Fingerprint of the schema this build expects: Alembic head(s) plus required tables."""
+    try:
+        from alembic.script import ScriptDirectory
+        heads = sorted(ScriptDirectory(str(MIGRATIONS_DIR)).get_heads())
+    except Exception as e:
+        logger.warning(f"Could not read Alembic heads, using migration file names: {e}")
+        heads = sorted(p.name for p in (MIGRATIONS_DIR / "versions").glob("*.py"))
+    payload = "|".join(heads) + "#" + ",".join(sorted(REQUIRED_TABLES))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def schema_is_current(fingerprint: str) -> bool:
+    """One cheap query: has this exact schema already been initialized?"""
+    try:
+        with engine.connect() as conn:
+            stored = conn.execute(
+                text("SELECT fingerprint FROM app_schema_state WHERE id = 1")
+            ).scalar()
+        return stored == fingerprint
+    except Exception:
+        # Table missing on databases initialized before fast-start existed
+        return False
+
+
+def record_schema_fingerprint(fingerprint: str):
+    """Remember the fingerprint after a successful full initialization."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS app_schema_state (
+                id INTEGER PRIMARY KEY,
+                fingerprint VARCHAR(64) NOT NULL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        updated = conn.execute(
+            text("UPDATE app_schema_state SET fingerprint = :fp, recorded_at = CURRENT_TIMESTAMP WHERE id = 1"),
+            {"fp": fingerprint}
+        ).rowcount
+        if not updated:
+            conn.execute(
+                text("INSERT INTO app_schema_state (id, fingerprint) VALUES (1, :fp)"),
+                {"fp": fingerprint}
+            )
+
+
+async def init_database(timings: Optional[dict] = None) -> bool:
+    """Initialize database on startup with complete schema.
+
+    With ``settings.fast_start`` a matching stored schema fingerprint skips
+    database creation, table inspection and schema creation entirely.
+    Returns True when the fast path was taken.
+    """
     logger.info("🚀 Initializing database...")
     
     try:
-        await ensure_database_exists()
+        with timed_phase(timings, "schema_fingerprint"):
+            fingerprint = expected_schema_fingerprint()
+            if settings.fast_start and schema_is_current(fingerprint):
+                logger.info("⚡ Schema fingerprint matches - skipping database initialization")
+                return True
         
-        # Check if tables exist
-        sync_db_url = settings.sync_database_url
-        engine = create_engine(sync_db_url)
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
+        with timed_phase(timings, "ensure_database"):
+            await ensure_database_exists()
         
-        required_tables = [
-            'users', 'employees', 'departments', 'shift_master', 'job_titles',
-            'attendance', 'leave_management', 'employee_expenses', 'payroll_setup',
-            'time_entries', 'policy_master', 'events_holidays', 'off_boarding',
-            'onboarding_process', 'compliance_documents_and_policy_management',
-            'employee_personal_details', 'bank_details', 'assets', 
-            'educational_qualifications', 'employee_documents', 'employee_work_experience'
-        ]
+        # Check if tables exist using the application's shared engine
+        with timed_phase(timings, "inspect_tables"):
+            inspector = inspect(engine)
+            existing_tables = inspector.get_table_names()
         
-        missing_tables = [table for table in required_tables if table not in existing_tables]
+        missing_tables = [table for table in REQUIRED_TABLES if table not in existing_tables]
         
         if not missing_tables:
-            logger.info(f"✅ All {len(required_tables)} tables already exist")
+            logger.info(f"✅ All {len(REQUIRED_TABLES)} tables already exist")
         else:
             logger.info(f"🔨 Creating {len(missing_tables)} missing tables with complete schema...")
             # Use the complete database initialization
-            from scripts.complete_db_init import create_complete_schema
-            await create_complete_schema()
+            with timed_phase(timings, "create_schema"):
+                from scripts.complete_db_init import create_complete_schema
+                await create_complete_schema(engine)
         
+        record_schema_fingerprint(fingerprint)
         logger.info("🎉 Database initialization complete")
         
     except Exception as e:
         logger.warning(f"⚠️ Database initialization warning: {e}")
-        logger.info("📝 Application will continue - some features may not work")
\ No newline at end of file
+        logger.info("📝 Application will continue - some features may not work")
+    return False
@@ -0,0 +1,102 @@
+"""
+Cached principal resolution for authenticated requests.
+
+Principals are cached per worker, keyed by user id. Each worker revalidates
+its cached entries against ``users.updated_at`` at most once every
+``principal_cache_sync_seconds`` with a single query, so password, role and
+deactivation changes made through another worker are picked up within that
+window. Changes made in this worker invalidate immediately.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.core.cache import TTLCache
+from src.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    employee_id: str
+    email: str
+    role: str
+    full_name: str
+    is_active: bool
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            employee_id=user.employee_id,
+            email=user.email,
+            role=user.role,
+            full_name=user.full_name,
+            is_active=bool(user.is_active) if user.is_active is not None else True,
+            updated_at=user.updated_at,
+        )
+
+
+_principals = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl_seconds)
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+
+
+def _revalidate(db: Session) -> None:
+    """Evict cached principals whose users row changed or disappeared (one query)."""
+    global _last_sync
+    now = time.monotonic()
+    if now - _last_sync < settings.principal_cache_sync_seconds:
+        return
+    with _sync_lock:
+        if now - _last_sync < settings.principal_cache_sync_seconds:
+            return
+        _last_sync = now
+    cached = dict(_principals.items())
+    if not cached:
+        return
+    try:
+        rows = db.execute(
+            text("SELECT id, updated_at FROM users WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(cached.keys())}
+        ).fetchall()
+    except Exception as e:
+        logger.warning(f"Principal cache revalidation failed, clearing cache: {e}")
+        _principals.clear()
+        return
+    current = {row.id: row.updated_at for row in rows}
+    stale = [user_id for user_id, principal in cached.items() if current.get(user_id, object()) != principal.updated_at]
+    for user_id in stale:
+        _principals.delete(user_id)
+
+
+def resolve_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Return the principal for ``user_id``, touching ``users`` only on a cache miss."""
+    _revalidate(db)
+    principal = _principals.get(user_id)
+    if principal is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        principal = Principal.from_user(user)
+        _principals.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: Optional[int] = None, employee_id: Optional[str] = None) -> None:
+    """Drop a cached principal after a password, role or activation change."""
+    if user_id is not None:
+        _principals.delete(user_id)
+    if employee_id is not None:
+        _principals.delete_where(lambda key, principal: principal.employee_id == employee_id)
@@ -0,0 +1,102 @@
+"""
+Per-request SQL query counting and N+1 detection.
+
+Engine-level SQLAlchemy events count every statement executed while a
+request is being served, together with the time spent in the database.
+Identical statements (same SQL text, any parameters) executed more often
+than the configured threshold are reported as likely N+1 patterns.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    """Query counters for one request; shared across the request's threads and tasks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        key = _WHITESPACE.sub(" ", statement).strip()
+        with self._lock:
+            self.query_count += 1
+            self.db_time += elapsed
+            self.statements[key] += 1
+
+    def repeated_statements(self, threshold: int):
+        with self._lock:
+            return [(sql, count) for sql, count in self.statements.most_common() if count > threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def install_query_stats():
+    """Attach the counting listeners to every engine (sync and async) once."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+async def query_stats_middleware(request: Request, call_next):
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    db_time_ms = round(stats.db_time * 1000, 2)
+    repeated = stats.repeated_statements(settings.query_stats_repeat_threshold)
+    response.headers["X-DB-Query-Count"] = str(stats.query_count)
+    response.headers["X-DB-Time-Ms"] = str(db_time_ms)
+    if repeated:
+        response.headers["X-DB-Repeated-Statements"] = str(len(repeated))
+        for sql, count in repeated:
+            logger.warning(
+                f"Possible N+1 on {request.method} {request.url.path}: "
+                f"statement executed {count} times: {sql[:300]}"
+            )
+    if stats.query_count:
+        logger.info(
+            f"{request.method} {request.url.path}: {stats.query_count} queries, {db_time_ms} ms in database"
+        )
+    return response
@@ -1,15 +1,25 @@
 import bcrypt
+import hashlib
+import time
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
+from sqlalchemy.orm import Session
 from src.config.settings import settings
+from src.core.cache import TTLCache
+from src.core.principal import Principal, resolve_principal
+from src.models.session import get_db
+from src.models.user import User
 import random
 import string
 
 security = HTTPBearer()
 
+# Verified JWT claims keyed by token hash; an entry never outlives the token's exp
+_verified_tokens = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+
 def verify_password(plain_password, hashed_password):
     if isinstance(plain_password, str):
         plain_password = plain_password.encode('utf-8')[:72]
@@ -40,9 +50,35 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     token = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return token
 
+def decode_token(token: str) -> dict:
+    """Verify the JWT signature and expiry once, then serve the claims from cache"""
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _verified_tokens.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    exp = payload.get("exp")
+    ttl = settings.token_cache_ttl_seconds
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    _verified_tokens.set(key, payload, ttl=ttl)
+    return payload
+
+def get_request_principal(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> dict:
+    """Claims attached by auth_middleware, falling back to decoding the bearer token"""
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+    if not credentials or not credentials.credentials:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    try:
+        return decode_token(credentials.credentials)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = decode_token(token)
         email: str = payload.get("email")
         user_id: str = payload.get("sub")
         if email is None and user_id is None:
@@ -53,25 +89,41 @@ def verify_token(token: str):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token verification failed")
 
-def get_current_user_email(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    if not credentials or not credentials.credentials:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    return verify_token(credentials.credentials)
-
-def get_current_user_with_role(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user with role information from JWT token"""
-    if not credentials or not credentials.credentials:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    
-    try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("email")
-        role: str = payload.get("role")
-        if email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        return {"email": email, "role": role}
-    except JWTError:
+def get_current_principal(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """The token's user as currently stored (cached per worker), so role and deactivation changes apply before the token expires"""
+    payload = get_request_principal(request, credentials)
+    user_id = payload.get("sub")
+    if user_id is not None and str(user_id).isdigit():
+        principal = resolve_principal(db, int(user_id))
+    elif payload.get("email"):
+        # Tokens without a numeric subject fall back to the email lookup
+        user = db.query(User).filter(User.email == payload.get("email")).first()
+        principal = Principal.from_user(user) if user else None
+    else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if not principal:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is deactivated")
+    return principal
+
+def get_current_user_email(principal: Principal = Depends(get_current_principal)):
+    return principal.email
+
+def get_current_user_with_role(principal: Principal = Depends(get_current_principal)):
+    """Get current user with the role stored on the users row (not the token's role claim)"""
+    return {"email": principal.email, "role": principal.role}
+
+def is_hr_role(role: Optional[str]) -> bool:
+    """HR Manager or HR Executive, in any of the spellings roles are stored with"""
+    user_role = (role or "").lower()
+    is_hr_manager = "hr" in user_role and any(keyword in user_role for keyword in ["manager", "head", "director"])
+    is_hr_executive = "hr" in user_role and "executive" in user_role
+    return is_hr_manager or is_hr_executive
 
 def require_employee_role_only(current_user: dict = Depends(get_current_user_with_role)):
     """Dependency to ensure user has Employee role only"""
@@ -89,13 +141,7 @@ def require_employee_role_only(current_user: dict = Depends(get_current_user_wit
 
 def require_hr_roles_only(current_user: dict = Depends(get_current_user_with_role)):
     """Dependency to ensure user has HR Manager or HR Executive role only"""
-    user_role = current_user["role"].lower() if current_user["role"] else ""
-    
-    # Check if role contains HR-related keywords
-    is_hr_manager = "hr" in user_role and any(keyword in user_role for keyword in ["manager", "head", "director"])
-    is_hr_executive = "hr" in user_role and "executive" in user_role
-    
-    if not (is_hr_manager or is_hr_executive):
+    if not is_hr_role(current_user["role"]):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Insufficient permissions. HR Manager or HR Executive role required. Current role: {current_user['role']}"
@@ -112,13 +158,12 @@ def require_employee_manager_hr_roles(current_user: dict = Depends(get_current_u
         )
     return current_user
 
-def get_current_user() -> CurrentUser:
-    """Stub for current user dependency - to be implemented by auth developer"""
-    return CurrentUser(user_id=1, email="hr@company.com", role="HR Manager")
+def get_current_user(principal: Principal = Depends(get_current_principal)) -> CurrentUser:
+    return CurrentUser(user_id=principal.id, email=principal.email, role=principal.role)
 
 def require_hr_role(current_user: CurrentUser = Depends(get_current_user)):
     """Dependency to ensure user has HR Manager or HR Executive role"""
-    if current_user.role not in ["HR Manager", "HR Executive"]:
+    if not is_hr_role(current_user.role):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions. HR role required."
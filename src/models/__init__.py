@@ -7,6 +7,10 @@ from .off_boarding import OffBoarding
 from .events_holidays import EventsHolidays
 from .policy import Policy
 from .leave import Leave
+from .leave_balance import LeaveBalanceLedger
+from .attendance_summary import AttendanceDailySummary, AttendanceMonthlySummary
+from .idempotency_key import IdempotencyKey
+from .compensation import EmployeeCompensation
 # Import from Employee_models first (primary definitions)
 from .Employee_models import (
     Employee, Department, ShiftMaster, Assets, EmployeePersonalDetailsModel as EmployeePersonalDetails, 
@@ -37,6 +41,11 @@ __all__ = [
     "ShiftMaster",
     "LeaveManagement",
     "Leave",
+    "LeaveBalanceLedger",
+    "AttendanceDailySummary",
+    "AttendanceMonthlySummary",
+    "IdempotencyKey",
+    "EmployeeCompensation",
     "Assets",
     "EmployeeDocuments",
     "EmployeePersonalDetails",
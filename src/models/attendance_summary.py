@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, DateTime, Numeric, ForeignKey
+from sqlalchemy.sql import func
+from .base import Base
+
+class AttendanceDailySummary(Base):
+    __tablename__ = "attendance_daily_summary"
+    __table_args__ = {'extend_existing': True}
+
+    # Organisation-wide status counts for one day, maintained by punch-in/out; each day
+    # is spread over several shard rows (by employee) that readers sum
+    attendance_date = Column(Date, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    records = Column(Integer, nullable=False, default=0)
+    present = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    half_day = Column(Integer, nullable=False, default=0)
+    on_leave = Column(Integer, nullable=False, default=0)
+    work_hours = Column(Numeric(10, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class AttendanceMonthlySummary(Base):
+    __tablename__ = "attendance_monthly_summary"
+    __table_args__ = {'extend_existing': True}
+
+    # Per-employee status counts for one calendar month (month_start is the 1st)
+    employee_id = Column(String(50), ForeignKey('employees.employee_id', ondelete='CASCADE'), primary_key=True)
+    month_start = Column(Date, primary_key=True)
+    records = Column(Integer, nullable=False, default=0)
+    present = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    half_day = Column(Integer, nullable=False, default=0)
+    on_leave = Column(Integer, nullable=False, default=0)
+    work_hours = Column(Numeric(10, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, Date, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy.sql import func
+from .base import Base
+
+class EmployeeCompensation(Base):
+    __tablename__ = "employee_compensation"
+
+    # One row per CTC change; the row with the latest effective_from on or before a date applies
+    compensation_id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(String(50), ForeignKey('employees.employee_id', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
+    annual_ctc = Column(Numeric(12,2), nullable=False)
+    effective_from = Column(Date, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index('uq_employee_compensation_effective', 'employee_id', 'effective_from', unique=True),
+        {'extend_existing': True}
+    )
@@ -1,7 +1,7 @@
 from sqlalchemy import (
     Column, String, Integer, Date, ForeignKey, Numeric, Time,
     TIMESTAMP, CheckConstraint, Computed, Text, DateTime, LargeBinary,
-    Boolean, Index, Float
+    Boolean, Index, Float, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -51,6 +51,9 @@ class Attendance(Base):
     __table_args__ = (
         Index('idx_attendance_emp', 'employee_id'),
         Index('idx_attendance_date', 'attendance_date'),
+        # At most one open (not yet punched-out) session per employee per day
+        Index('uq_attendance_open_session', 'employee_id', 'attendance_date', unique=True,
+              postgresql_where=text('punch_out IS NULL'), sqlite_where=text('punch_out IS NULL')),
         {'extend_existing': True}
     )
 
@@ -110,7 +113,7 @@ class PayrollSetup(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     __table_args__ = (
-        Index('idx_employee_month', 'employee_id', 'month'),
+        Index('uq_payroll_employee_month', 'employee_id', 'month', unique=True),
         CheckConstraint('length(employee_id) > 0', name='check_employee_id_not_empty'),
         {'extend_existing': True}
     )
@@ -160,7 +163,8 @@ class TimeEntry(Base):
     __tablename__ = "time_entries"
     __table_args__ = {'extend_existing': True}
 
-    time_entry_id = Column(String(50), primary_key=True, index=True, nullable=False)
+    # Timesheet maps the same table and already declares ix_time_entries_time_entry_id
+    time_entry_id = Column(String(50), primary_key=True, nullable=False)
     employee_id = Column(String(50))
     entry_date = Column(Date)
     project = Column(String(150))
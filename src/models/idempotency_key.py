@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from .base import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = {'extend_existing': True}
+
+    # Client-supplied Idempotency-Key and the result of the request that first used it
+    idempotency_key = Column(String(255), primary_key=True)
+    scope = Column(String(50), nullable=False)
+    employee_id = Column(String(50), nullable=False)
+    response = Column(Text)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
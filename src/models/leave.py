@@ -12,3 +12,5 @@ class Leave(Base):
     end_date = Column(Date, nullable=False)
     reason = Column(Text, nullable=True)
     status = Column(String, default="PENDING", nullable=False)
+    # Working days the leave covers, fixed when it is applied for
+    employee_used_leaves = Column(Integer, nullable=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from .base import Base
+
+class LeaveBalanceLedger(Base):
+    __tablename__ = "leave_balances"
+    __table_args__ = {'extend_existing': True}
+
+    # One row per employee, leave type (casual / sick / earned) and calendar year
+    employee_id = Column(String(50), ForeignKey('employees.employee_id', ondelete='CASCADE'), primary_key=True)
+    leave_type = Column(String(20), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    used = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,34 @@
+"""add leave_balances ledger
+
+Revision ID: 5b1e7c2a9d40
+Revises: 20d7ab4a0824
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7c2a9d40'
+down_revision = '20d7ab4a0824'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leave_balances',
+    sa.Column('employee_id', sa.String(length=50), nullable=False),
+    sa.Column('leave_type', sa.String(length=20), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('used', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('pending', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.employee_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'leave_type', 'year')
+    )
+    # Filled in working days by the b9e4f2a7c3d1 rebuild
+
+
+def downgrade():
+    op.drop_table('leave_balances')
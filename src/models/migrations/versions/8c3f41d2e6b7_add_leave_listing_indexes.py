@@ -0,0 +1,29 @@
+"""add leave listing indexes
+
+Revision ID: 8c3f41d2e6b7
+Revises: 5b1e7c2a9d40
+Create Date: 2026-10-18 11:47:05.218334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f41d2e6b7'
+down_revision = '5b1e7c2a9d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pages: WHERE employee_id = ? / UPPER(status) = ? AND leave_id < ? ORDER BY leave_id DESC
+    op.create_index('idx_leave_employee_leave_id', 'leave_management', ['employee_id', sa.text('leave_id DESC')], unique=False)
+    op.create_index('idx_leave_status_leave_id', 'leave_management', [sa.text('UPPER(status)'), sa.text('leave_id DESC')], unique=False)
+    op.create_index('idx_leave_dates', 'leave_management', ['start_date', 'end_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_leave_dates', table_name='leave_management')
+    op.drop_index('idx_leave_status_leave_id', table_name='leave_management')
+    op.drop_index('idx_leave_employee_leave_id', table_name='leave_management')
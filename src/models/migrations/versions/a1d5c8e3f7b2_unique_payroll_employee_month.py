@@ -0,0 +1,39 @@
+"""make payroll_setup unique per employee and month
+
+Revision ID: a1d5c8e3f7b2
+Revises: f3b8d1c6a2e9
+Create Date: 2026-10-18 17:41:03.220716
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d5c8e3f7b2'
+down_revision = 'f3b8d1c6a2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the newest row of each employee and month, as cleanup_duplicate_records did
+    op.execute("""
+        DELETE FROM payroll_setup p
+        USING (
+            SELECT payroll_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY employee_id, month
+                       ORDER BY created_at DESC NULLS LAST, payroll_id DESC
+                   ) AS position
+            FROM payroll_setup
+            WHERE month IS NOT NULL
+        ) ranked
+        WHERE ranked.payroll_id = p.payroll_id AND ranked.position > 1
+    """)
+    op.drop_index('idx_employee_month', table_name='payroll_setup', if_exists=True)
+    op.create_index('uq_payroll_employee_month', 'payroll_setup', ['employee_id', 'month'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_payroll_employee_month', table_name='payroll_setup')
+    op.create_index('idx_employee_month', 'payroll_setup', ['employee_id', 'month'], unique=False)
@@ -0,0 +1,32 @@
+"""add trigram and full-text indexes for the employee directory search
+
+Revision ID: a8c2e6f0d4b1
+Revises: a1d5c8e3f7b2
+Create Date: 2026-10-18 19:12:48.604385
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c2e6f0d4b1'
+down_revision = 'a1d5c8e3f7b2'
+branch_labels = None
+depends_on = None
+
+# Must stay identical to SEARCH_TEXT in services/employee_search_service.py, or the planner will not use the indexes
+SEARCH_TEXT = ("lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || "
+               "coalesce(employee_id, '') || ' ' || coalesce(email_id, ''))")
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Substring and fuzzy (word similarity) matches
+    op.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_search_trgm ON employees USING gin (({SEARCH_TEXT}) gin_trgm_ops)")
+    # Word-prefix matches
+    op.execute(f"CREATE INDEX IF NOT EXISTS idx_employees_search_tsv ON employees USING gin (to_tsvector('simple', {SEARCH_TEXT}))")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_employees_search_tsv")
+    op.execute("DROP INDEX IF EXISTS idx_employees_search_trgm")
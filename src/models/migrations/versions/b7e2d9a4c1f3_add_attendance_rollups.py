@@ -0,0 +1,72 @@
+"""add attendance rollups
+
+Revision ID: b7e2d9a4c1f3
+Revises: 8c3f41d2e6b7
+Create Date: 2026-10-18 13:05:52.640291
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d9a4c1f3'
+down_revision = '8c3f41d2e6b7'
+branch_labels = None
+depends_on = None
+
+
+def _counter_columns():
+    return [
+        sa.Column('records', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('present', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('late', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('absent', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('half_day', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('on_leave', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('work_hours', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table('attendance_daily_summary',
+    sa.Column('attendance_date', sa.Date(), nullable=False),
+    *_counter_columns(),
+    sa.PrimaryKeyConstraint('attendance_date')
+    )
+    op.create_table('attendance_monthly_summary',
+    sa.Column('employee_id', sa.String(length=50), nullable=False),
+    sa.Column('month_start', sa.Date(), nullable=False),
+    *_counter_columns(),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.employee_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'month_start')
+    )
+    # Backfill both rollups from existing attendance rows
+    aggregates = """
+        COUNT(*),
+        SUM(CASE WHEN LOWER(status) = 'present' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN LOWER(status) = 'late' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN LOWER(status) = 'absent' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN LOWER(status) = 'half day' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN LOWER(status) = 'leave' THEN 1 ELSE 0 END),
+        COALESCE(SUM(work_hours), 0)
+    """
+    op.execute(f"""
+        INSERT INTO attendance_daily_summary (attendance_date, records, present, late, absent, half_day, on_leave, work_hours)
+        SELECT attendance_date, {aggregates}
+        FROM attendance
+        GROUP BY attendance_date
+    """)
+    op.execute(f"""
+        INSERT INTO attendance_monthly_summary (employee_id, month_start, records, present, late, absent, half_day, on_leave, work_hours)
+        SELECT employee_id, CAST(DATE_TRUNC('month', attendance_date) AS DATE), {aggregates}
+        FROM attendance
+        WHERE employee_id IN (SELECT employee_id FROM employees)
+        GROUP BY employee_id, CAST(DATE_TRUNC('month', attendance_date) AS DATE)
+    """)
+
+
+def downgrade():
+    op.drop_table('attendance_monthly_summary')
+    op.drop_table('attendance_daily_summary')
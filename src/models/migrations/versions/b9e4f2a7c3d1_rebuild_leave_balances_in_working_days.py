@@ -0,0 +1,34 @@
+"""rebuild leave_balances in working days
+
+Revision ID: b9e4f2a7c3d1
+Revises: d2a7c4e9f1b3
+Create Date: 2026-10-20 09:14:52.603318
+
+"""
+import sys
+from pathlib import Path
+
+from alembic import op
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4f2a7c3d1'
+down_revision = 'd2a7c4e9f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The ledger is sized by the application's working-day calendar
+    sys.path.append(str(Path(__file__).resolve().parents[4]))
+    from src.services.leave_balance_service import LeaveBalanceService
+
+    # Replaces any ledger seeded as request counts; the session joins the migration's transaction
+    with Session(bind=op.get_bind()) as db:
+        LeaveBalanceService.rebuild(db)
+
+
+def downgrade():
+    # Working-day balances remain valid for the previous revision
+    pass
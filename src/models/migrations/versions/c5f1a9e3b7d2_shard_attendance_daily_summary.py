@@ -0,0 +1,44 @@
+"""spread attendance_daily_summary over per-employee shard rows
+
+Revision ID: c5f1a9e3b7d2
+Revises: a8c2e6f0d4b1
+Create Date: 2026-10-19 09:24:17.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f1a9e3b7d2'
+down_revision = 'a8c2e6f0d4b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows become shard 0; readers sum the shards, so totals are unchanged
+    op.add_column('attendance_daily_summary', sa.Column('shard', sa.SmallInteger(), server_default='0', nullable=False))
+    op.drop_constraint('attendance_daily_summary_pkey', 'attendance_daily_summary', type_='primary')
+    op.create_primary_key('attendance_daily_summary_pkey', 'attendance_daily_summary', ['attendance_date', 'shard'])
+
+
+def downgrade():
+    op.execute("""
+        CREATE TEMPORARY TABLE attendance_daily_totals AS
+        SELECT attendance_date, SUM(records) AS records, SUM(present) AS present, SUM(late) AS late,
+               SUM(absent) AS absent, SUM(half_day) AS half_day, SUM(on_leave) AS on_leave,
+               SUM(work_hours) AS work_hours, MAX(updated_at) AS updated_at
+        FROM attendance_daily_summary
+        GROUP BY attendance_date
+    """)
+    op.execute("DELETE FROM attendance_daily_summary")
+    op.drop_constraint('attendance_daily_summary_pkey', 'attendance_daily_summary', type_='primary')
+    op.drop_column('attendance_daily_summary', 'shard')
+    op.create_primary_key('attendance_daily_summary_pkey', 'attendance_daily_summary', ['attendance_date'])
+    op.execute("""
+        INSERT INTO attendance_daily_summary (attendance_date, records, present, late, absent, half_day, on_leave, work_hours, updated_at)
+        SELECT attendance_date, records, present, late, absent, half_day, on_leave, work_hours, updated_at
+        FROM attendance_daily_totals
+    """)
+    op.execute("DROP TABLE attendance_daily_totals")
@@ -0,0 +1,41 @@
+"""make payroll_setup unique per employee and pay period
+
+Revision ID: d2a7c4e9f1b3
+Revises: c5f1a9e3b7d2
+Create Date: 2026-10-19 10:02:36.915247
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c4e9f1b3'
+down_revision = 'c5f1a9e3b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # "2026-04" and "April 2026" are the same pay period; keep the newest row of each
+    op.execute("""
+        DELETE FROM payroll_setup p
+        USING (
+            SELECT payroll_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY employee_id, pay_period
+                       ORDER BY updated_at DESC NULLS LAST, created_at DESC NULLS LAST, payroll_id DESC
+                   ) AS position
+            FROM payroll_setup
+            WHERE pay_period IS NOT NULL
+        ) ranked
+        WHERE ranked.payroll_id = p.payroll_id AND ranked.position > 1
+    """)
+    op.drop_index('idx_payroll_employee_pay_period', table_name='payroll_setup', if_exists=True)
+    op.create_index('uq_payroll_employee_pay_period', 'payroll_setup', ['employee_id', 'pay_period'], unique=True,
+                    postgresql_where=sa.text('pay_period IS NOT NULL'))
+
+
+def downgrade():
+    op.drop_index('uq_payroll_employee_pay_period', table_name='payroll_setup')
+    op.create_index('idx_payroll_employee_pay_period', 'payroll_setup', ['employee_id', 'pay_period'], unique=False)
@@ -0,0 +1,51 @@
+"""add open attendance session constraint and idempotency keys
+
+Revision ID: e4a9c7b2f158
+Revises: b7e2d9a4c1f3
+Create Date: 2026-10-18 14:22:37.915402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c7b2f158'
+down_revision = 'b7e2d9a4c1f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Close duplicate open sessions left by racing punch-ins, keeping the earliest one open.
+    # They become zero-length sessions, so the attendance rollups stay correct.
+    op.execute("""
+        UPDATE attendance a
+        SET punch_out = a.punch_in, work_hours = 0, updated_at = NOW()
+        WHERE a.punch_out IS NULL
+          AND EXISTS (
+              SELECT 1 FROM attendance earlier
+              WHERE earlier.employee_id = a.employee_id
+                AND earlier.attendance_date = a.attendance_date
+                AND earlier.punch_out IS NULL
+                AND earlier.attendance_id < a.attendance_id
+          )
+    """)
+    op.create_index('uq_attendance_open_session', 'attendance', ['employee_id', 'attendance_date'], unique=True,
+                    postgresql_where=sa.text('punch_out IS NULL'))
+
+    op.create_table('idempotency_keys',
+    sa.Column('idempotency_key', sa.String(length=255), nullable=False),
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('employee_id', sa.String(length=50), nullable=False),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('idempotency_key')
+    )
+    op.create_index('idx_idempotency_keys_created', 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_idempotency_keys_created', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_index('uq_attendance_open_session', table_name='attendance')
@@ -0,0 +1,89 @@
+"""add employee_compensation and payroll_setup.pay_period
+
+Revision ID: f3b8d1c6a2e9
+Revises: e4a9c7b2f158
+Create Date: 2026-10-18 16:05:12.448193
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1c6a2e9'
+down_revision = 'e4a9c7b2f158'
+branch_labels = None
+depends_on = None
+
+# Same formats as CompensationService.parse_pay_period; migrations do not import app code
+PERIOD_FORMATS = ("%Y-%m", "%Y-%m-%d", "%B %Y", "%b %Y", "%B-%Y", "%b-%Y", "%m-%Y", "%m/%Y", "%Y/%m")
+MONTH_NAME_FORMATS = ("%B", "%b")
+
+
+def upgrade():
+    op.create_table('employee_compensation',
+    sa.Column('compensation_id', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.String(length=50), nullable=False),
+    sa.Column('annual_ctc', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('effective_from', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.employee_id'], onupdate='CASCADE', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('compensation_id')
+    )
+    op.create_index('uq_employee_compensation_effective', 'employee_compensation', ['employee_id', 'effective_from'], unique=True)
+
+    # Seed each employee's current CTC from the text column, effective from joining
+    op.execute(r"""
+        INSERT INTO employee_compensation (employee_id, annual_ctc, effective_from)
+        SELECT employee_id, CAST(REPLACE(TRIM(annual_ctc), ',', '') AS NUMERIC(12,2)), COALESCE(joining_date, CURRENT_DATE)
+        FROM employees
+        WHERE TRIM(annual_ctc) ~ '^[0-9][0-9,]*(\.[0-9]+)?$'
+    """)
+
+    op.add_column('payroll_setup', sa.Column('pay_period', sa.Date(), nullable=True))
+    bind = op.get_bind()
+    # month is free text; parse each distinct value once and update its rows together
+    for (month,) in bind.execute(sa.text("SELECT DISTINCT month FROM payroll_setup WHERE month IS NOT NULL")).fetchall():
+        period = _parse_period(month)
+        if period is not None:
+            bind.execute(sa.text("UPDATE payroll_setup SET pay_period = :period WHERE month = :month"),
+                         {"period": period, "month": month})
+            continue
+        month_number = _parse_month_name(month)
+        if month_number is not None:
+            # Month name without a year: take the year the row was created
+            bind.execute(sa.text("""
+                UPDATE payroll_setup
+                SET pay_period = make_date(CAST(EXTRACT(YEAR FROM created_at) AS INTEGER), :month_number, 1)
+                WHERE month = :month AND created_at IS NOT NULL
+            """), {"month_number": month_number, "month": month})
+    op.create_index('idx_payroll_pay_period', 'payroll_setup', ['pay_period'], unique=False)
+    op.create_index('idx_payroll_employee_pay_period', 'payroll_setup', ['employee_id', 'pay_period'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_payroll_employee_pay_period', table_name='payroll_setup')
+    op.drop_index('idx_payroll_pay_period', table_name='payroll_setup')
+    op.drop_column('payroll_setup', 'pay_period')
+    op.drop_index('uq_employee_compensation_effective', table_name='employee_compensation')
+    op.drop_table('employee_compensation')
+
+
+def _parse_period(month):
+    value = month.strip()
+    for fmt in PERIOD_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_month_name(month):
+    for fmt in MONTH_NAME_FORMATS:
+        try:
+            return datetime.strptime(month.strip(), fmt).month
+        except ValueError:
+            continue
+    return None
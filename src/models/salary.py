@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, DateTime, Numeric, Text, CheckConstraint, ForeignKey, Index, JSON
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Integer, Date, DateTime, Numeric, Text, CheckConstraint, ForeignKey, Index, JSON
+from sqlalchemy.sql import func, text
 from .base import Base
 
 class PayrollSetup(Base):
@@ -23,6 +23,7 @@ class PayrollSetup(Base):
     pdf_path = Column(String(255))
     
     month = Column(String(20), index=True)
+    pay_period = Column(Date)  # First day of the pay month, parsed from month for SQL range queries
     basic_salary_type = Column(String(50))
     hra_type = Column(String(50))
     allowance_type = Column(String(50))
@@ -39,7 +40,9 @@ class PayrollSetup(Base):
     __table_args__ = (
         Index('idx_payroll_employee_id', 'employee_id'),
         Index('idx_payroll_month', 'month'),
-        Index('idx_employee_month', 'employee_id', 'month'),
+        Index('uq_payroll_employee_month', 'employee_id', 'month', unique=True),
+        Index('idx_payroll_pay_period', 'pay_period'),
+        Index('uq_payroll_employee_pay_period', 'employee_id', 'pay_period', unique=True, postgresql_where=text('pay_period IS NOT NULL')),
         CheckConstraint('length(employee_id) > 0', name='check_employee_id_not_empty'),
         {'extend_existing': True}
     )
\ No newline at end of file
@@ -1,15 +1,202 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+import re
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class _PoolWaitStatsMixin:
+    """Records how long callers wait for a connection when the pool is exhausted."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkout_count = 0
+        self.timeout_count = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeout_count += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkout_count += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class InstrumentedQueuePool(_PoolWaitStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolWaitStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _connect_args(url: str) -> dict:
+    """Server-side statement_timeout, passed the way each Postgres driver expects it"""
+    timeout_ms = settings.db_statement_timeout_ms
+    if not timeout_ms or not url.startswith("postgresql"):
+        return {}
+    if "+asyncpg" in url:
+        return {"server_settings": {"statement_timeout": str(timeout_ms)}}
+    return {"options": f"-c statement_timeout={timeout_ms}"}
+
+
+def _pool_kwargs(url: str, poolclass, use_pool: bool) -> dict:
+    if not use_pool:
+        return {"poolclass": NullPool}
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite picks its own pool implementation; sizing options do not apply
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
+
+def build_engine(url: Optional[str] = None, use_pool: bool = True, **overrides) -> Engine:
+    """Create a sync engine using the pool settings shared by the whole application"""
+    url = url or settings.sync_database_url
+    kwargs = {"pool_pre_ping": True, "connect_args": _connect_args(url)}
+    kwargs.update(_pool_kwargs(url, InstrumentedQueuePool, use_pool))
+    kwargs.update(overrides)
+    return create_engine(url, **kwargs)
+
+
+def build_async_engine(url: Optional[str] = None, **overrides) -> AsyncEngine:
+    """Create an async engine using the pool settings shared by the whole application"""
+    url = url or settings.async_database_url
+    kwargs = {"pool_pre_ping": True, "connect_args": _connect_args(url)}
+    kwargs.update(_pool_kwargs(url, InstrumentedAsyncQueuePool, True))
+    kwargs.update(overrides)
+    return create_async_engine(url, **kwargs)
+
+
 # Use sync database URL for synchronous API endpoints
 sync_database_url = settings.sync_database_url
-engine = create_engine(sync_database_url, pool_pre_ping=True)
+engine = build_engine(sync_database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replica for reporting/dashboard reads; falls back to the primary when unset
+replica_engine = build_engine(settings.sync_replica_url) if settings.sync_replica_url else None
+
+# Async engine for read-heavy async endpoints. Built on first use so that
+# scripts, Alembic and the SQLite test harness never need an async driver.
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_async_replica_engine: Optional[AsyncEngine] = None
+_async_read_session_factory: Optional[async_sessionmaker] = None
+
+# Per-request routing state. The middleware installs a fresh dict for every
+# request; because the dict is shared (not copied) with the threadpool and
+# task contexts, a write in one session pins later reads to the primary.
+_request_routing: ContextVar[Optional[dict]] = ContextVar("request_routing", default=None)
+
+def begin_request_routing() -> Token:
+    return _request_routing.set({"primary_pinned": False})
+
+def end_request_routing(token: Token) -> None:
+    _request_routing.reset(token)
+
+def pin_primary() -> None:
+    state = _request_routing.get()
+    if state is not None:
+        state["primary_pinned"] = True
+
+def primary_pinned() -> bool:
+    state = _request_routing.get()
+    return bool(state and state["primary_pinned"])
+
+
+_READ_STATEMENT = re.compile(r"\s*\(*\s*(SELECT|WITH)\b", re.IGNORECASE)
+# Data-modifying CTEs, ON CONFLICT ... DO UPDATE and row locks all need the primary
+_WRITE_KEYWORD = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _text_writes(sql: str) -> bool:
+    """Whether raw SQL may write: anything but a plain SELECT/WITH query"""
+    return not _READ_STATEMENT.match(sql) or bool(_WRITE_KEYWORD.search(sql))
+
+
+def _writes(clause) -> bool:
+    if getattr(clause, "is_dml", False):
+        return True
+    return isinstance(clause, TextClause) and _text_writes(clause.text)
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica until something writes.
+
+    Flushes, DML statements (ORM or raw text()) and any earlier commit in
+    the same request (through any session) route to the primary so reads see
+    the request's own writes instead of a lagging replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = self.info["primary_bind"]
+        replica = self.info.get("replica_bind") or primary
+        if _writes(clause):
+            self.info["wrote"] = True
+        if self._flushing or self.info.get("wrote") or primary_pinned():
+            return primary
+        return replica
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _mark_routing_session_wrote(session, flush_context, instances):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_primary_after_commit(session):
+    pin_primary()
+
+
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    info={"primary_bind": engine, "replica_bind": replica_engine},
+)
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = build_async_engine(settings.async_database_url)
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory()
+
 def get_db() -> Session:
     db = SessionLocal()
     try:
@@ -17,3 +204,79 @@ def get_db() -> Session:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db() -> Session:
+    """Session for read-only endpoints, served by the replica when one is configured"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def AsyncReadSessionLocal() -> AsyncSession:
+    global _async_replica_engine, _async_read_session_factory
+    if _async_read_session_factory is None:
+        if settings.async_replica_url and _async_replica_engine is None:
+            _async_replica_engine = build_async_engine(settings.async_replica_url)
+        _async_read_session_factory = async_sessionmaker(
+            sync_session_class=RoutingSession,
+            autoflush=False,
+            expire_on_commit=False,
+            info={
+                "primary_bind": get_async_engine().sync_engine,
+                "replica_bind": _async_replica_engine.sync_engine if _async_replica_engine else None,
+            },
+        )
+    return _async_read_session_factory()
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory, _async_replica_engine, _async_read_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+    if _async_replica_engine is not None:
+        await _async_replica_engine.dispose()
+        _async_replica_engine = None
+    _async_read_session_factory = None
+
+
+def _pool_stats(pool) -> dict:
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, _PoolWaitStatsMixin):
+        with pool._stats_lock:
+            checkouts = pool.checkout_count
+            stats.update({
+                "checkouts": checkouts,
+                "timeouts": pool.timeout_count,
+                "avg_wait_ms": round(pool.total_wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+            })
+    return stats
+
+
+def get_pool_stats() -> dict:
+    """Live connection pool statistics for the primary sync and async engines"""
+    stats = {"sync": _pool_stats(engine.pool)}
+    if replica_engine is not None:
+        stats["sync_replica"] = _pool_stats(replica_engine.pool)
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.sync_engine.pool)
+    if _async_replica_engine is not None:
+        stats["async_replica"] = _pool_stats(_async_replica_engine.sync_engine.pool)
+    return stats
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 
 class SalaryCreate(BaseModel):
     employee_id: str
@@ -98,4 +98,18 @@ class ComponentDelete(BaseModel):
     employee_id: str
     month: str
     component_name: str
-    component_type: str  # "earnings" or "deductions"
\ No newline at end of file
+    component_type: str  # "earnings" or "deductions"
+
+class CompensationCreate(BaseModel):
+    annual_ctc: Decimal = Field(..., ge=0)
+    effective_from: Optional[date] = None  # Today when omitted
+
+class PayrollScenario(BaseModel):
+    # Percentages of annual CTC; omitted fields keep the current rule
+    basic_rate: Optional[float] = Field(None, ge=0, le=100)
+    hra_rate: Optional[float] = Field(None, ge=0, le=100)
+    allowance_rate: Optional[float] = Field(None, ge=0, le=100)
+    pf_percentage: Optional[float] = Field(None, ge=0, le=100)  # Omitted: each employee keeps their own PF %
+    annual_professional_tax: Optional[float] = Field(None, ge=0)
+    pay_cycle: str = "Monthly"
+    as_of: Optional[date] = None  # CTC in effect on this date; today when omitted
@@ -52,11 +52,14 @@ async def create_database_if_not_exists():
         raise
 
 
-async def create_complete_schema():
-    """Create all tables with complete and correct schema."""
+async def create_complete_schema(engine=None):
+    """Create all tables with complete and correct schema.
+
+    Pass the application's shared engine to avoid opening a throwaway one.
+    """
     try:
-        sync_db_url = settings.sync_database_url
-        engine = create_engine(sync_db_url)
+        if engine is None:
+            engine = create_engine(settings.sync_database_url)
         
         # Complete table definitions with all required columns
         table_definitions = {
@@ -339,6 +342,7 @@ async def create_complete_schema():
                     net_salary NUMERIC(12,2),
                     pdf_path TEXT,
                     month VARCHAR(20),
+                    pay_period DATE,
                     basic_salary_type VARCHAR(50),
                     hra_type VARCHAR(50),
                     allowance_type VARCHAR(50),
@@ -433,6 +437,70 @@ async def create_complete_schema():
                     manager_comments TEXT,
                     created_at TIMESTAMP DEFAULT NOW()
                 )
+            """,
+            
+            'leave_balances': """
+                CREATE TABLE IF NOT EXISTS leave_balances (
+                    employee_id VARCHAR(50) REFERENCES employees(employee_id) ON DELETE CASCADE,
+                    leave_type VARCHAR(20) NOT NULL,
+                    year INTEGER NOT NULL,
+                    used INTEGER NOT NULL DEFAULT 0,
+                    pending INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (employee_id, leave_type, year)
+                )
+            """,
+            
+            'attendance_daily_summary': """
+                CREATE TABLE IF NOT EXISTS attendance_daily_summary (
+                    attendance_date DATE NOT NULL,
+                    shard SMALLINT NOT NULL DEFAULT 0,
+                    records INTEGER NOT NULL DEFAULT 0,
+                    present INTEGER NOT NULL DEFAULT 0,
+                    late INTEGER NOT NULL DEFAULT 0,
+                    absent INTEGER NOT NULL DEFAULT 0,
+                    half_day INTEGER NOT NULL DEFAULT 0,
+                    on_leave INTEGER NOT NULL DEFAULT 0,
+                    work_hours NUMERIC(10,2) NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (attendance_date, shard)
+                )
+            """,
+            
+            'attendance_monthly_summary': """
+                CREATE TABLE IF NOT EXISTS attendance_monthly_summary (
+                    employee_id VARCHAR(50) REFERENCES employees(employee_id) ON DELETE CASCADE,
+                    month_start DATE NOT NULL,
+                    records INTEGER NOT NULL DEFAULT 0,
+                    present INTEGER NOT NULL DEFAULT 0,
+                    late INTEGER NOT NULL DEFAULT 0,
+                    absent INTEGER NOT NULL DEFAULT 0,
+                    half_day INTEGER NOT NULL DEFAULT 0,
+                    on_leave INTEGER NOT NULL DEFAULT 0,
+                    work_hours NUMERIC(10,2) NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (employee_id, month_start)
+                )
+            """,
+            
+            'idempotency_keys': """
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    idempotency_key VARCHAR(255) PRIMARY KEY,
+                    scope VARCHAR(50) NOT NULL,
+                    employee_id VARCHAR(50) NOT NULL,
+                    response TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+                )
+            """,
+            
+            'employee_compensation': """
+                CREATE TABLE IF NOT EXISTS employee_compensation (
+                    compensation_id SERIAL PRIMARY KEY,
+                    employee_id VARCHAR(50) NOT NULL REFERENCES employees(employee_id) ON UPDATE CASCADE ON DELETE CASCADE,
+                    annual_ctc NUMERIC(12,2) NOT NULL,
+                    effective_from DATE NOT NULL,
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
             """
         }
         
@@ -443,7 +511,9 @@ async def create_complete_schema():
             'educational_qualifications', 'employee_documents', 'employee_work_experience',
             'attendance', 'leave_management', 'employee_expenses', 'payroll_setup', 
             'time_entries', 'off_boarding', 'onboarding_process', 
-            'compliance_documents_and_policy_management', 'profile_edit_requests'
+            'compliance_documents_and_policy_management', 'profile_edit_requests',
+            'leave_balances', 'attendance_daily_summary', 'attendance_monthly_summary',
+            'idempotency_keys', 'employee_compensation'
         ]
         
         with engine.connect() as conn:
@@ -471,6 +541,18 @@ async def create_complete_schema():
             "CREATE INDEX IF NOT EXISTS idx_time_entries_employee ON time_entries (employee_id)",
             "CREATE INDEX IF NOT EXISTS idx_time_entries_date ON time_entries (entry_date)",
             "CREATE INDEX IF NOT EXISTS idx_edu_employee ON educational_qualifications (employee_id)",
+            "CREATE INDEX IF NOT EXISTS idx_leave_employee_leave_id ON leave_management (employee_id, leave_id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_leave_status_leave_id ON leave_management (UPPER(status), leave_id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_leave_dates ON leave_management (start_date, end_date)",
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX IF NOT EXISTS idx_employees_search_trgm ON employees USING gin ((lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(employee_id, '') || ' ' || coalesce(email_id, ''))) gin_trgm_ops)",
+            "CREATE INDEX IF NOT EXISTS idx_employees_search_tsv ON employees USING gin (to_tsvector('simple', lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(employee_id, '') || ' ' || coalesce(email_id, ''))))",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_open_session ON attendance (employee_id, attendance_date) WHERE punch_out IS NULL",
+            "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys (created_at)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_employee_compensation_effective ON employee_compensation (employee_id, effective_from)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_payroll_employee_month ON payroll_setup (employee_id, month)",
+            "CREATE INDEX IF NOT EXISTS idx_payroll_pay_period ON payroll_setup (pay_period)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_payroll_employee_pay_period ON payroll_setup (employee_id, pay_period) WHERE pay_period IS NOT NULL",
         ]
         
         with engine.connect() as conn:
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script to render payslip PDFs for a pay month
+Renders in a process pool; payroll rows that have not changed reuse their cached file
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root (and src, for the service's module imports) to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.session import SessionLocal
+from services.payslip_service import PayslipService
+
+def print_progress(done: int, total: int):
+    print(f"  rendered {done}/{total} payslips")
+
+def generate_payslips(month: str, workers: int = None, force: bool = False):
+    """Render the month's stale payslips and record their paths"""
+    db = SessionLocal()
+    try:
+        result = PayslipService.generate_month(db, month, workers, force, print_progress)
+        print(f"Payslips for {month}: {result.payslips} total, {result.rendered} rendered, {result.cached} cached in {result.seconds}s")
+    except Exception as e:
+        db.rollback()
+        print(f"Error generating payslips: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render payslip PDFs for a pay month")
+    parser.add_argument("--month", required=True, help="Pay month, in the format used for payroll_setup.month")
+    parser.add_argument("--workers", type=int, help="Rendering processes (default: PAYSLIP_WORKERS or every CPU)")
+    parser.add_argument("--force", action="store_true", help="Render again even when a cached file exists")
+    args = parser.parse_args()
+    generate_payslips(args.month, args.workers, args.force)
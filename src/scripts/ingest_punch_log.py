@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Script to bulk-load a biometric/turnstile punch log into attendance
+Accepts csv (header: employee_id,timestamp[,direction]) or ndjson with the same keys
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.session import SessionLocal
+from src.services.punch_ingest_service import PunchIngestService, DEFAULT_DEDUPE_SECONDS
+
+def ingest_punch_log(path: Path, fmt: str, dedupe_seconds: int):
+    """Pair, stage and merge one punch log file"""
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = PunchIngestService.ingest(db, stream, fmt, dedupe_seconds)
+        print(f"Ingested {path} in {time.perf_counter() - started:.2f}s")
+        for name, value in result.as_dict().items():
+            print(f"  {name}: {value}")
+    except Exception as e:
+        db.rollback()
+        print(f"Error ingesting punch log: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load a device punch log into attendance")
+    parser.add_argument("path", type=Path, help="Punch log file (.csv or .ndjson)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Log format (default: from the file extension)")
+    parser.add_argument("--dedupe-seconds", type=int, default=DEFAULT_DEDUPE_SECONDS,
+                        help="Treat repeated reads of the same badge within this window as one event")
+    args = parser.parse_args()
+    fmt = args.format or args.path.suffix.lstrip(".").lower()
+    if fmt not in ("csv", "ndjson"):
+        parser.error("cannot tell the format from the file extension; pass --format")
+    ingest_punch_log(args.path, fmt, args.dedupe_seconds)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script to convert legacy string salary_components to JSON objects
+One-shot; payslip and salary reads parse old rows on the fly but never write them back
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root (and src, for the service's module imports) to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.session import SessionLocal
+from services.salary_service import SalaryService
+
+def print_progress(scanned: int, converted: int):
+    print(f"  scanned {scanned} payroll rows, converted {converted}")
+
+def normalize_salary_components(batch_size: int):
+    """Rewrite every string salary_components payload, one batch per transaction"""
+    db = SessionLocal()
+    try:
+        scanned, converted = SalaryService.normalize_salary_components(db, batch_size, print_progress)
+        print(f"Converted {converted} of {scanned} payroll rows")
+    except Exception as e:
+        db.rollback()
+        print(f"Error normalizing salary components: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert string salary_components to JSON objects")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per batch and transaction")
+    args = parser.parse_args()
+    normalize_salary_components(args.batch_size)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Load test for the punch-in/out endpoints
+Fires thousands of concurrent punches (including kiosk-style retries that reuse
+an Idempotency-Key) against a running server, then checks that no employee
+ended up with more than one open session for the day
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+OPEN_SESSIONS_SQL = """
+    SELECT employee_id, COUNT(*) AS open_sessions
+    FROM attendance
+    WHERE attendance_date = :today AND punch_out IS NULL
+    GROUP BY employee_id
+    HAVING COUNT(*) > 1
+"""
+
+def load_employee_ids(limit: int):
+    from sqlalchemy import text
+    from src.models.session import SessionLocal
+    db = SessionLocal()
+    try:
+        rows = db.execute(text("SELECT employee_id FROM employees ORDER BY employee_id LIMIT :limit"), {"limit": limit}).fetchall()
+        return [row.employee_id for row in rows]
+    finally:
+        db.close()
+
+def find_duplicate_sessions():
+    from sqlalchemy import text
+    from src.models.session import SessionLocal
+    db = SessionLocal()
+    try:
+        return db.execute(text(OPEN_SESSIONS_SQL), {"today": date.today()}).fetchall()
+    finally:
+        db.close()
+
+async def fire(client, semaphore, url, key, statuses, latencies):
+    headers = {"Idempotency-Key": key} if key else {}
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, headers=headers)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+async def run_phase(base_url, path, employee_ids, punches_per_employee, retries, concurrency, use_keys):
+    """Send punches_per_employee punches per employee, each repeated `retries` extra times with the same key"""
+    statuses, latencies = Counter(), []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        tasks = []
+        for employee_id in employee_ids:
+            for _ in range(punches_per_employee):
+                key = str(uuid.uuid4()) if use_keys else None
+                for _ in range(retries + 1):
+                    tasks.append(fire(client, semaphore, path.format(employee_id=employee_id), key, statuses, latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return statuses, latencies, elapsed
+
+def report(name, statuses, latencies, elapsed):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    print(f"{name}: {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"  status codes: {dict(statuses)}")
+    if latencies:
+        print(f"  latency ms: median {statistics.median(latencies):.1f}, p95 {p95:.1f}, max {latencies[-1]:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent punch-in/out load test")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1", help="API base URL")
+    parser.add_argument("--employees", type=int, default=500, help="Number of employees to punch (read from the database)")
+    parser.add_argument("--punches", type=int, default=3, help="Concurrent punch-ins per employee (all but one must be rejected)")
+    parser.add_argument("--retries", type=int, default=1, help="Extra sends of each request with the same Idempotency-Key")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight at once")
+    parser.add_argument("--no-keys", action="store_true", help="Send without Idempotency-Key headers")
+    parser.add_argument("--skip-punch-out", action="store_true", help="Leave the sessions open after punching in")
+    args = parser.parse_args()
+
+    employee_ids = load_employee_ids(args.employees)
+    if not employee_ids:
+        print("No employees found")
+        sys.exit(1)
+
+    phases = [("punch-in", "/punch-in/{employee_id}")]
+    if not args.skip_punch_out:
+        phases.append(("punch-out", "/punch-out/{employee_id}"))
+    for name, path in phases:
+        statuses, latencies, elapsed = asyncio.run(run_phase(
+            args.base_url, path, employee_ids, args.punches, args.retries, args.concurrency, not args.no_keys
+        ))
+        report(name, statuses, latencies, elapsed)
+        if name == "punch-in":
+            duplicates = find_duplicate_sessions()
+            if duplicates:
+                print(f"FAIL: {len(duplicates)} employees have more than one open session today")
+                sys.exit(1)
+            print("  no duplicate open sessions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Script to delete expired punch Idempotency-Keys
+Schedule daily; expired keys are also reclaimed when a client reuses them
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.session import SessionLocal
+from src.services.punch_service import PunchService
+
+def purge_idempotency_keys():
+    """Remove keys older than IDEMPOTENCY_KEY_TTL_HOURS"""
+    db = SessionLocal()
+    try:
+        removed = PunchService.purge_idempotency_keys(db)
+        print(f"Removed {removed} expired idempotency keys")
+    except Exception as e:
+        db.rollback()
+        print(f"Error purging idempotency keys: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    purge_idempotency_keys()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the leave_balances ledger from leave_management
+Run after a backfill or bulk import of leave requests
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.session import SessionLocal
+from src.services.leave_balance_service import LeaveBalanceService
+
+def rebuild_leave_balances(employee_id: str = None):
+    """Recompute ledger rows for every employee, or just one"""
+    db = SessionLocal()
+    try:
+        rows = LeaveBalanceService.rebuild(db, employee_id)
+        target = f"employee {employee_id}" if employee_id else "all employees"
+        print(f"Rebuilt {rows} leave balance rows for {target}")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding leave balances: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the leave_balances ledger")
+    parser.add_argument("--employee-id", help="Only rebuild this employee's rows")
+    args = parser.parse_args()
+    rebuild_leave_balances(args.employee_id)
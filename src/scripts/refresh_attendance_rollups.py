@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Script to recompute the attendance rollups from raw attendance rows
+Run after importing or correcting attendance outside the punch endpoints
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.models.session import SessionLocal
+from src.services.attendance_rollup_service import AttendanceRollupService
+
+def refresh_attendance_rollups(start: date = None, end: date = None):
+    """Rebuild daily and monthly rollups for the given range (whole months), or everything"""
+    db = SessionLocal()
+    try:
+        AttendanceRollupService.refresh(db, start, end)
+        print(f"Refreshed attendance rollups from {start or 'the beginning'} to {end or 'the latest record'}")
+    except Exception as e:
+        db.rollback()
+        print(f"Error refreshing attendance rollups: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh attendance_daily_summary and attendance_monthly_summary")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to refresh (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to refresh (YYYY-MM-DD)")
+    args = parser.parse_args()
+    refresh_attendance_rollups(args.start, args.end)
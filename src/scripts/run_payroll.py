@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to run payroll for a whole pay month
+Computes payroll_setup for every employee in one transaction, with progress
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root (and src, for the service's module imports) to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.session import SessionLocal
+from services.payroll_run_service import PayrollRunService, DEFAULT_BATCH_SIZE
+
+def print_progress(done: int, total: int):
+    print(f"  wrote {done}/{total} payroll rows")
+
+def run_payroll(month: str, pay_cycle: str, employee_ids=None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Create or refresh payroll rows for the month"""
+    db = SessionLocal()
+    try:
+        result = PayrollRunService.run(db, month, pay_cycle, employee_ids, batch_size, print_progress)
+        print(f"Payroll run for {month} ({pay_cycle}) finished in {result.seconds}s")
+        print(f"  employees: {result.employees}, created: {result.created}, updated: {result.updated}")
+        print(f"  total net salary: {result.total_net_salary:,.2f}")
+        if result.skipped:
+            print(f"  skipped (missing or invalid annual CTC): {', '.join(result.skipped)}")
+    except Exception as e:
+        print(f"Error running payroll: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run payroll for all employees for a pay month")
+    parser.add_argument("--month", required=True, help="Pay month, in the format used for payroll_setup.month")
+    parser.add_argument("--pay-cycle", default="Monthly", help="Monthly, Weekly or Bi-Weekly")
+    parser.add_argument("--employee-id", action="append", dest="employee_ids", help="Limit to these employees (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per bulk write")
+    args = parser.parse_args()
+    run_payroll(args.month, args.pay_cycle, args.employee_ids, args.batch_size)
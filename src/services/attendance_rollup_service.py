@@ -0,0 +1,211 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date
+from typing import Optional
+import calendar
+import logging
+
+logger = logging.getLogger(__name__)
+
+# attendance.status (lower-cased) -> rollup counter column
+STATUS_COLUMNS = {
+    "present": "present",
+    "late": "late",
+    "absent": "absent",
+    "half day": "half_day",
+    "leave": "on_leave",
+}
+COUNTERS = ("records", "present", "late", "absent", "half_day", "on_leave", "work_hours")
+
+_increments = ",\n        ".join(f"{column} = {{table}}.{column} + EXCLUDED.{column}" for column in COUNTERS)
+_overwrites = ",\n        ".join(f"{column} = EXCLUDED.{column}" for column in COUNTERS)
+_changed = " OR ".join(f"{{table}}.{column} IS DISTINCT FROM EXCLUDED.{column}" for column in COUNTERS)
+
+# Each day is split over DAILY_SHARDS rows, chosen by employee, so concurrent punches
+# at shift start lock different rows; readers sum the shards. Must be a power of two.
+DAILY_SHARDS = 32
+SHARD_SQL = f"(hashtext({{employee_id}}) & {DAILY_SHARDS - 1})"
+
+DAILY_UPSERT_SQL = text(f"""
+    INSERT INTO attendance_daily_summary (attendance_date, shard, {", ".join(COUNTERS)}, updated_at)
+    VALUES (:day, {SHARD_SQL.format(employee_id=":emp_id")}, {", ".join(":" + column for column in COUNTERS)}, NOW())
+    ON CONFLICT (attendance_date, shard) DO UPDATE SET
+        {_increments.format(table="attendance_daily_summary")},
+        updated_at = NOW()
+""")
+
+MONTHLY_UPSERT_SQL = text(f"""
+    INSERT INTO attendance_monthly_summary (employee_id, month_start, {", ".join(COUNTERS)}, updated_at)
+    VALUES (:emp_id, :month_start, {", ".join(":" + column for column in COUNTERS)}, NOW())
+    ON CONFLICT (employee_id, month_start) DO UPDATE SET
+        {_increments.format(table="attendance_monthly_summary")},
+        updated_at = NOW()
+""")
+
+# Counter expressions over raw attendance rows, shared by the refresh statements
+AGGREGATES_SQL = """
+    COUNT(*),
+    SUM(CASE WHEN LOWER(status) = 'present' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN LOWER(status) = 'late' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN LOWER(status) = 'absent' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN LOWER(status) = 'half day' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN LOWER(status) = 'leave' THEN 1 ELSE 0 END),
+    COALESCE(SUM(work_hours), 0)
+"""
+
+# The refresh overwrites counters in place rather than deleting and re-inserting, so
+# readers never see a half-built period and punches keep updating the same rows
+REFRESH_DAILY_SQL = text(f"""
+    INSERT INTO attendance_daily_summary (attendance_date, shard, {", ".join(COUNTERS)}, updated_at)
+    SELECT attendance_date, {SHARD_SQL.format(employee_id="employee_id")}, {AGGREGATES_SQL}, NOW()
+    FROM attendance
+    WHERE attendance_date >= :start AND attendance_date <= :end
+    GROUP BY attendance_date, {SHARD_SQL.format(employee_id="employee_id")}
+    ON CONFLICT (attendance_date, shard) DO UPDATE SET
+        {_overwrites},
+        updated_at = NOW()
+    WHERE {_changed.format(table="attendance_daily_summary")}
+""")
+
+REFRESH_MONTHLY_SQL = text(f"""
+    INSERT INTO attendance_monthly_summary (employee_id, month_start, {", ".join(COUNTERS)}, updated_at)
+    SELECT employee_id, CAST(DATE_TRUNC('month', attendance_date) AS DATE), {AGGREGATES_SQL}, NOW()
+    FROM attendance
+    WHERE attendance_date >= :start AND attendance_date <= :end
+      AND employee_id IN (SELECT employee_id FROM employees)
+    GROUP BY employee_id, CAST(DATE_TRUNC('month', attendance_date) AS DATE)
+    ON CONFLICT (employee_id, month_start) DO UPDATE SET
+        {_overwrites},
+        updated_at = NOW()
+    WHERE {_changed.format(table="attendance_monthly_summary")}
+""")
+
+# Rollup rows whose attendance rows have all been removed
+PRUNE_DAILY_SQL = text(f"""
+    DELETE FROM attendance_daily_summary s
+    WHERE s.attendance_date >= :start AND s.attendance_date <= :end
+      AND NOT EXISTS (
+          SELECT 1 FROM attendance a
+          WHERE a.attendance_date = s.attendance_date AND {SHARD_SQL.format(employee_id="a.employee_id")} = s.shard
+      )
+""")
+
+PRUNE_MONTHLY_SQL = text("""
+    DELETE FROM attendance_monthly_summary s
+    WHERE s.month_start >= :start AND s.month_start <= :end
+      AND NOT EXISTS (
+          SELECT 1 FROM attendance a
+          WHERE a.employee_id = s.employee_id
+            AND a.attendance_date >= s.month_start
+            AND a.attendance_date < s.month_start + INTERVAL '1 month'
+      )
+""")
+
+# Taken before reading attendance: a punch that already bumped a row commits first (so
+# the aggregate sees it), and a later punch waits and then adds to the refreshed value
+LOCK_DAILY_SQL = text("""
+    SELECT 1 FROM attendance_daily_summary
+    WHERE attendance_date >= :start AND attendance_date <= :end
+    ORDER BY attendance_date, shard
+    FOR UPDATE
+""")
+
+LOCK_MONTHLY_SQL = text("""
+    SELECT 1 FROM attendance_monthly_summary
+    WHERE month_start >= :start AND month_start <= :end
+    ORDER BY employee_id, month_start
+    FOR UPDATE
+""")
+
+_totals = ", ".join(f"COALESCE(SUM({column}), 0) AS {column}" for column in COUNTERS)
+
+DAILY_TOTALS_SQL = text(f"""
+    SELECT {_totals}
+    FROM attendance_daily_summary
+    WHERE attendance_date >= :start AND attendance_date <= :end
+""")
+
+EMPLOYEE_TOTALS_SQL = text(f"""
+    SELECT {_totals}
+    FROM attendance_monthly_summary
+    WHERE employee_id = :emp_id AND month_start >= :start AND month_start <= :end
+""")
+
+# Bounds used when a caller does not restrict the period
+_EARLIEST = date(1900, 1, 1)
+_LATEST = date(9999, 12, 31)
+
+
+class AttendanceRollupService:
+    """Maintains attendance_daily_summary (per day, sharded by employee) and attendance_monthly_summary (per employee and month).
+
+    Punch-in/out adjust both rollups in the caller's transaction, so summaries
+    read a handful of pre-aggregated rows instead of every attendance row.
+    Neither upsert touches a row shared by every employee, so punches do not
+    queue behind each other.
+    """
+
+    @staticmethod
+    def status_column(status: Optional[str]) -> Optional[str]:
+        return STATUS_COLUMNS.get((status or "").strip().lower())
+
+    @staticmethod
+    def record_change(db: Session, employee_id: str, attendance_date: date, old_status: Optional[str] = None,
+                      new_status: Optional[str] = None, records: int = 0, work_hours: float = 0) -> None:
+        """Apply one attendance row's change to both rollups. Does not commit."""
+        deltas = {column: 0 for column in COUNTERS}
+        deltas["records"] = records
+        deltas["work_hours"] = work_hours or 0
+        old_column = AttendanceRollupService.status_column(old_status)
+        new_column = AttendanceRollupService.status_column(new_status)
+        if old_column != new_column:
+            if old_column:
+                deltas[old_column] -= 1
+            if new_column:
+                deltas[new_column] += 1
+        if not any(deltas.values()):
+            return
+        params = dict(deltas, day=attendance_date, emp_id=employee_id, month_start=attendance_date.replace(day=1))
+        db.execute(DAILY_UPSERT_SQL, params)
+        db.execute(MONTHLY_UPSERT_SQL, params)
+
+    @staticmethod
+    def record_punch_in(db: Session, employee_id: str, attendance_date: date, status: Optional[str]) -> None:
+        AttendanceRollupService.record_change(db, employee_id, attendance_date, None, status, records=1)
+
+    @staticmethod
+    def record_punch_out(db: Session, employee_id: str, attendance_date: date, work_hours: float) -> None:
+        AttendanceRollupService.record_change(db, employee_id, attendance_date, work_hours=work_hours)
+
+    @staticmethod
+    def get_daily_totals(db: Session, start: Optional[date] = None, end: Optional[date] = None):
+        """Organisation-wide counters summed over [start, end]"""
+        return db.execute(DAILY_TOTALS_SQL, {"start": start or _EARLIEST, "end": end or _LATEST}).fetchone()
+
+    @staticmethod
+    def get_employee_totals(db: Session, employee_id: str, start: Optional[date] = None, end: Optional[date] = None):
+        """One employee's counters summed over the months that start within [start, end]"""
+        return db.execute(EMPLOYEE_TOTALS_SQL, {
+            "emp_id": employee_id,
+            "start": (start or _EARLIEST).replace(day=1),
+            "end": end or _LATEST
+        }).fetchone()
+
+    @staticmethod
+    def refresh(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> None:
+        """Recompute both rollups from raw attendance rows for [start, end], widened to whole months"""
+        start = (start or _EARLIEST).replace(day=1)
+        end = date(end.year, end.month, calendar.monthrange(end.year, end.month)[1]) if end else _LATEST
+        params = {"start": start, "end": end}
+        try:
+            db.execute(LOCK_DAILY_SQL, params)
+            db.execute(LOCK_MONTHLY_SQL, params)
+            db.execute(REFRESH_DAILY_SQL, params)
+            db.execute(REFRESH_MONTHLY_SQL, params)
+            db.execute(PRUNE_DAILY_SQL, params)
+            db.execute(PRUNE_MONTHLY_SQL, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        logger.info(f"Refreshed attendance rollups from {start} to {end}")
@@ -0,0 +1,155 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, bindparam
+from datetime import date
+from itertools import accumulate
+from typing import Iterable, List, Optional, Tuple
+import calendar
+import logging
+import re
+
+from ..config.settings import settings
+from ..core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKING_DAYS = "Monday-Friday"
+_DEFAULT_MASK = (True,) * 5 + (False,) * 2
+_DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_SEPARATORS = re.compile(r"\s*(?:,|/|&|;|\band\b)\s*")
+_RANGE = re.compile(r"\s*(?:-|–|\bto\b)\s*")
+
+# Public holidays are days off; events and optional holidays are not
+HOLIDAYS_SQL = text("""
+    SELECT date FROM events_holidays
+    WHERE date >= :start AND date <= :end
+      AND LOWER(type) LIKE '%holiday%' AND LOWER(type) NOT LIKE '%optional%'
+""")
+
+EMPLOYEE_WORKING_DAYS_SQL = text("""
+    SELECT e.employee_id, s.working_days
+    FROM employees e
+    LEFT JOIN shift_master s ON s.shift_id = e.shift_id
+    WHERE e.employee_id IN :emp_ids
+""").bindparams(bindparam("emp_ids", expanding=True))
+
+WORKFORCE_PATTERNS_SQL = text("""
+    SELECT s.working_days, COUNT(*) AS employees
+    FROM employees e
+    LEFT JOIN shift_master s ON s.shift_id = e.shift_id
+    GROUP BY s.working_days
+""")
+
+
+def parse_working_days(pattern: Optional[str]) -> Tuple[bool, ...]:
+    """Turn a shift's working_days text ("Monday-Friday", "Mon, Wed, Fri", "Sun-Thu") into a Mon..Sun mask"""
+    mask = [False] * 7
+    for part in _SEPARATORS.split((pattern or "").strip().lower()):
+        ends = [_day_index(token) for token in _RANGE.split(part) if token]
+        if len(ends) == 1 and ends[0] is not None:
+            mask[ends[0]] = True
+        elif len(ends) == 2 and None not in ends:
+            first, last = ends
+            for offset in range((last - first) % 7 + 1):
+                mask[(first + offset) % 7] = True
+    # Unrecognised patterns fall back to the Monday-Friday default
+    return tuple(mask) if any(mask) else _DEFAULT_MASK
+
+
+def _day_index(token: str) -> Optional[int]:
+    key = token.strip()[:3]
+    return _DAY_KEYS.index(key) if key in _DAY_KEYS else None
+
+
+class WorkingCalendar:
+    """Working-day bitmap for one year and weekly pattern, with prefix sums.
+
+    Counting the working days in any span of the year is two lookups, so
+    callers can size many spans without walking them day by day.
+    """
+
+    def __init__(self, year: int, weekday_mask: Tuple[bool, ...], holidays: Iterable[date] = ()):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        length = 366 if calendar.isleap(year) else 365
+        # Repeat the weekly pattern starting on 1 January's weekday, then clear holidays
+        week = [int(flag) for flag in weekday_mask[self.first_day.weekday():] + weekday_mask[:self.first_day.weekday()]]
+        self.bitmap = bytearray((week * (length // 7 + 1))[:length])
+        for holiday in holidays:
+            if holiday.year == year:
+                self.bitmap[holiday.timetuple().tm_yday - 1] = 0
+        self.prefix = [0] + list(accumulate(self.bitmap))
+
+    def is_working_day(self, day: date) -> bool:
+        return bool(self.bitmap[day.timetuple().tm_yday - 1])
+
+    def count(self, start: date, end: date) -> int:
+        """Working days in [start, end], clipped to this calendar's year"""
+        start = max(start, self.first_day)
+        end = min(end, date(self.year, 12, 31))
+        if end < start:
+            return 0
+        return self.prefix[end.timetuple().tm_yday] - self.prefix[start.timetuple().tm_yday - 1]
+
+
+# Calendars keyed by (year, weekday mask), so shift edits simply select another entry; holiday writes clear them
+_calendars = TTLCache(maxsize=64, ttl=settings.calendar_cache_ttl_seconds)
+
+
+class CalendarService:
+    @staticmethod
+    def get_calendar(db: Session, year: int, working_days: Optional[str] = None) -> WorkingCalendar:
+        mask = parse_working_days(working_days or DEFAULT_WORKING_DAYS)
+        key = (year, mask)
+        cached = _calendars.get(key)
+        if cached is not None:
+            return cached
+        try:
+            rows = db.execute(HOLIDAYS_SQL, {"start": date(year, 1, 1), "end": date(year, 12, 31)}).fetchall()
+            holidays = [row.date if isinstance(row.date, date) else date.fromisoformat(str(row.date)[:10]) for row in rows]
+        except Exception as e:
+            logger.error(f"Error loading holidays for {year}: {e}")
+            return WorkingCalendar(year, mask)
+        working_calendar = WorkingCalendar(year, mask, holidays)
+        _calendars.set(key, working_calendar)
+        return working_calendar
+
+    @staticmethod
+    def business_days(db: Session, start: date, end: date, working_days: Optional[str] = None) -> int:
+        """Working days in [start, end] (inclusive) for a shift pattern; spans may cross years"""
+        if end < start:
+            return 0
+        return sum(
+            CalendarService.get_calendar(db, year, working_days).count(start, end)
+            for year in range(start.year, end.year + 1)
+        )
+
+    @staticmethod
+    def count_spans(db: Session, spans: List[Tuple[date, date, Optional[str]]]) -> List[int]:
+        """Working days for many (start, end, working_days) spans; each span costs two prefix lookups"""
+        return [CalendarService.business_days(db, start, end, working_days) for start, end, working_days in spans]
+
+    @staticmethod
+    def leave_days(db: Session, employee_id: str, start: date, end: date) -> int:
+        """Working days an employee's leave covers, on their shift's weekly pattern"""
+        return CalendarService.leave_days_many(db, [(employee_id, start, end)])[0]
+
+    @staticmethod
+    def leave_days_many(db: Session, leaves: List[Tuple[str, date, date]]) -> List[int]:
+        """Bulk leave_days: one query for the employees' shift patterns, then prefix-sum counts"""
+        if not leaves:
+            return []
+        employee_ids = sorted({employee_id for employee_id, _, _ in leaves})
+        rows = db.execute(EMPLOYEE_WORKING_DAYS_SQL, {"emp_ids": employee_ids}).fetchall()
+        patterns = {row.employee_id: row.working_days for row in rows}
+        return CalendarService.count_spans(db, [(start, end, patterns.get(employee_id)) for employee_id, start, end in leaves])
+
+    @staticmethod
+    def expected_attendance_days(db: Session, start: date, end: date) -> int:
+        """Employee-days the whole workforce is expected to work in [start, end]"""
+        rows = db.execute(WORKFORCE_PATTERNS_SQL).fetchall()
+        return sum(row.employees * CalendarService.business_days(db, start, end, row.working_days) for row in rows)
+
+    @staticmethod
+    def invalidate() -> None:
+        """Rebuild calendars on next use after a holiday change"""
+        _calendars.clear()
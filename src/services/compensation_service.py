@@ -0,0 +1,129 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+import calendar
+
+# Plain SQL only, so the service works under both the `src.` and the bare module imports
+
+# Formats seen in payroll_setup.month; the f3b8d1c6a2e9 migration backfills with the same list
+PERIOD_FORMATS = ("%Y-%m", "%Y-%m-%d", "%B %Y", "%b %Y", "%B-%Y", "%b-%Y", "%m-%Y", "%m/%Y", "%Y/%m")
+
+CURRENT_CTC_SQL = text("""
+    SELECT annual_ctc
+    FROM employee_compensation
+    WHERE employee_id = :emp_id AND effective_from <= :as_of
+    ORDER BY effective_from DESC
+    LIMIT 1
+""")
+
+RECORD_SQL = text("""
+    INSERT INTO employee_compensation (employee_id, annual_ctc, effective_from)
+    VALUES (:emp_id, :annual_ctc, :effective_from)
+    ON CONFLICT (employee_id, effective_from) DO UPDATE SET annual_ctc = EXCLUDED.annual_ctc
+""")
+
+# Keep the legacy text column showing the CTC in effect today
+SYNC_EMPLOYEE_SQL = text("""
+    UPDATE employees
+    SET annual_ctc = CAST(c.annual_ctc AS VARCHAR)
+    FROM (
+        SELECT annual_ctc
+        FROM employee_compensation
+        WHERE employee_id = :emp_id AND effective_from <= CURRENT_DATE
+        ORDER BY effective_from DESC
+        LIMIT 1
+    ) c
+    WHERE employees.employee_id = :emp_id
+""")
+
+HISTORY_SQL = text("""
+    SELECT annual_ctc, effective_from, created_at
+    FROM employee_compensation
+    WHERE employee_id = :emp_id
+    ORDER BY effective_from DESC
+""")
+
+COST_BY_DEPARTMENT_SQL = text("""
+    SELECT d.department_id, d.department_name,
+           COUNT(DISTINCT p.employee_id) AS employees,
+           COALESCE(SUM(p.total_earnings), 0) AS total_earnings,
+           COALESCE(SUM(p.total_deductions), 0) AS total_deductions,
+           COALESCE(SUM(p.net_salary), 0) AS net_salary
+    FROM payroll_setup p
+    JOIN employees e ON e.employee_id = p.employee_id
+    LEFT JOIN departments d ON d.department_id = e.department_id
+    WHERE p.pay_period >= :start AND p.pay_period <= :end
+    GROUP BY d.department_id, d.department_name
+    ORDER BY net_salary DESC
+""")
+
+
+class CompensationService:
+    """Effective-dated annual CTC per employee and typed pay periods.
+
+    employee_compensation holds one numeric row per CTC change; payroll
+    reads take the row in effect for the pay period and fall back to the
+    legacy employees.annual_ctc text only when an employee has none.
+    """
+
+    @staticmethod
+    def parse_pay_period(month: Optional[str]) -> Optional[date]:
+        """First day of the pay month named by a payroll_setup.month value, or None"""
+        value = (month or "").strip()
+        for fmt in PERIOD_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date().replace(day=1)
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def period_end(period: date) -> date:
+        return period.replace(day=calendar.monthrange(period.year, period.month)[1])
+
+    @staticmethod
+    def current_ctc(db: Session, employee_id: str, as_of: Optional[date] = None) -> Optional[Decimal]:
+        """Annual CTC in effect on `as_of` (today by default); None when none is recorded"""
+        value = db.execute(CURRENT_CTC_SQL, {"emp_id": employee_id, "as_of": as_of or date.today()}).scalar()
+        return Decimal(str(value)) if value is not None else None
+
+    @staticmethod
+    def record(db: Session, employee_id: str, annual_ctc, effective_from: Optional[date] = None) -> Decimal:
+        """Record a CTC change (replacing one on the same date); the caller commits"""
+        try:
+            amount = Decimal(str(annual_ctc).replace(",", "").strip())
+        except (InvalidOperation, ValueError):
+            raise ValueError(f"Invalid annual CTC: {annual_ctc}")
+        if amount < 0:
+            raise ValueError("Annual CTC cannot be negative")
+        db.execute(RECORD_SQL, {"emp_id": employee_id, "annual_ctc": amount, "effective_from": effective_from or date.today()})
+        db.execute(SYNC_EMPLOYEE_SQL, {"emp_id": employee_id})
+        return amount
+
+    @staticmethod
+    def history(db: Session, employee_id: str) -> List[dict]:
+        return [
+            {
+                "annual_ctc": float(row.annual_ctc),
+                "effective_from": row.effective_from,
+                "recorded_at": row.created_at
+            }
+            for row in db.execute(HISTORY_SQL, {"emp_id": employee_id}).fetchall()
+        ]
+
+    @staticmethod
+    def cost_by_department(db: Session, start: date, end: date) -> List[dict]:
+        """Payroll totals per department for pay periods from `start` to `end`, aggregated in SQL"""
+        return [
+            {
+                "department_id": row.department_id,
+                "department_name": row.department_name or "Unassigned",
+                "employees": row.employees,
+                "total_earnings": float(row.total_earnings),
+                "total_deductions": float(row.total_deductions),
+                "net_salary": float(row.net_salary)
+            }
+            for row in db.execute(COST_BY_DEPARTMENT_SQL, {"start": start, "end": end}).fetchall()
+        ]
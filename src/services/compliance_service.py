@@ -4,6 +4,7 @@ from typing import List, Optional
 from fastapi import HTTPException, status
 from ..models.compliance_document import ComplianceDocument
 from ..schemas.compliance_document import ComplianceDocumentCreate, ComplianceDocumentUpdate
+from .dashboard_service import DashboardService
 
 class ComplianceService:
     
@@ -36,6 +37,7 @@ class ComplianceService:
         )
         db.add(db_document)
         db.commit()
+        DashboardService.invalidate_org_widgets()
         db.refresh(db_document)
         return db_document
     
@@ -85,6 +87,7 @@ class ComplianceService:
             setattr(db_document, field, value)
         
         db.commit()
+        DashboardService.invalidate_org_widgets()
         db.refresh(db_document)
         return db_document
     
@@ -110,4 +113,5 @@ class ComplianceService:
         
         db.delete(db_document)
         db.commit()
+        DashboardService.invalidate_org_widgets()
         return True
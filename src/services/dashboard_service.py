@@ -1,235 +1,244 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract, and_
+from sqlalchemy.orm import Session
+from sqlalchemy import text
 from datetime import datetime, date, timedelta
-from typing import Optional
+from typing import Optional, NamedTuple
 import logging
- 
-from ..models import Employee, EmployeePersonal, Attendance, Expense, LeaveManagement, TimeEntry, Department
+
+from ..config.settings import settings
+from ..core.cache import TTLCache
+from .calendar_service import CalendarService
 from ..schemas.dashboard import DashboardResponse, AttendanceSummary, LeaveBalance as LeaveBalanceSchema, TimesheetSummary, ExpensesSummary, Birthday, Holiday as HolidaySchema, Document as DocumentSchema
- 
+
 logger = logging.getLogger(__name__)
- 
+
+
+class EmployeeDashboard(NamedTuple):
+    """Per-employee part of the dashboard, cached for a short time"""
+    designation: Optional[str]
+    attendance: AttendanceSummary
+    leave_balance: LeaveBalanceSchema
+    timesheet: TimesheetSummary
+    expenses: ExpensesSummary
+
+
+class OrgWidgets(NamedTuple):
+    """Organisation-wide widgets, identical for every employee"""
+    birthdays: tuple
+    holidays: tuple
+    documents: tuple
+
+
+# Per-employee dashboard results; attendance, leave, timesheet and expense writes evict them
+_employee_dashboards = TTLCache(maxsize=settings.dashboard_cache_size, ttl=settings.dashboard_cache_ttl_seconds)
+
+# Shared widgets keyed by calendar day, so a new day starts from a fresh build;
+# holiday, policy and personal-details writes clear them
+_org_widgets = TTLCache(maxsize=2, ttl=settings.dashboard_widgets_ttl_seconds)
+
+# Everything specific to one employee in a single round trip
+EMPLOYEE_DASHBOARD_SQL = text("""
+    WITH emp AS (
+        SELECT e.employee_id, e.designation, e.annual_leaves, s.working_days
+        FROM employees e
+        LEFT JOIN shift_master s ON s.shift_id = e.shift_id
+        WHERE e.employee_id = :emp_id
+    ),
+    att AS (
+        SELECT COUNT(DISTINCT CASE WHEN LOWER(status) = 'present' THEN attendance_date END) AS present_days
+        FROM attendance
+        WHERE employee_id = :emp_id AND attendance_date >= :month_start AND attendance_date <= :today
+    ),
+    lv AS (
+        SELECT COALESCE(SUM(CASE WHEN leave_type = 'casual' THEN used ELSE 0 END), 0) AS casual_used,
+               COALESCE(SUM(CASE WHEN leave_type = 'sick' THEN used ELSE 0 END), 0) AS sick_used,
+               COALESCE(SUM(CASE WHEN leave_type = 'earned' THEN used ELSE 0 END), 0) AS earned_used
+        FROM leave_balances
+        WHERE employee_id = :emp_id AND year = :year
+    ),
+    ts AS (
+        SELECT COALESCE(SUM(hours), 0) AS week_hours
+        FROM time_entries
+        WHERE employee_id = :emp_id AND entry_date >= :week_start AND entry_date <= :today
+    ),
+    ex AS (
+        SELECT COUNT(*) AS pending_count, COALESCE(SUM(amount), 0) AS pending_amount
+        FROM employee_expenses
+        WHERE employee_id = :emp_id AND LOWER(status) LIKE '%pending%'
+    )
+    SELECT emp.designation, emp.annual_leaves, emp.working_days,
+           att.present_days,
+           lv.casual_used, lv.sick_used, lv.earned_used,
+           ts.week_hours,
+           ex.pending_count, ex.pending_amount
+    FROM emp CROSS JOIN att CROSS JOIN lv CROSS JOIN ts CROSS JOIN ex
+""")
+
+# Organisation-wide widgets (birthdays, holidays, policies) in a second round trip
+ORG_WIDGETS_SQL = text("""
+    WITH birthdays AS (
+        SELECT e.first_name, e.last_name, d.department_name, p.date_of_birth
+        FROM employee_personal_details p
+        JOIN employees e ON e.employee_id = p.employee_id
+        LEFT JOIN departments d ON d.department_id = e.department_id
+        WHERE p.date_of_birth IS NOT NULL AND EXTRACT(MONTH FROM p.date_of_birth) = :month
+    ),
+    holidays AS (
+        SELECT name, date FROM events_holidays WHERE date >= :today ORDER BY date LIMIT 5
+    ),
+    policies AS (
+        SELECT title, category, uploaded_on
+        FROM compliance_documents_and_policy_management
+        ORDER BY uploaded_on DESC LIMIT 10
+    )
+    SELECT 'birthday' AS kind, COALESCE(first_name, '') || ' ' || COALESCE(last_name, '') AS title,
+           department_name AS detail, date_of_birth AS day, NULL AS sort_ts
+    FROM birthdays
+    UNION ALL
+    SELECT 'holiday', name, NULL, date, NULL FROM holidays
+    UNION ALL
+    SELECT 'policy', title, category, NULL, uploaded_on FROM policies
+""")
+
 class DashboardService:
     def __init__(self, db: Session):
         self.db = db
- 
+
     def get_dashboard_data(self, employee_id: str) -> Optional[DashboardResponse]:
+        result = self.get_dashboard_with_designation(employee_id)
+        return result[0] if result else None
+
+    def get_dashboard_with_designation(self, employee_id: str) -> Optional[tuple]:
+        """Dashboard response plus the employee's designation, or None if the employee does not exist"""
         try:
-            employee = self.db.query(Employee).filter(Employee.employee_id == employee_id).first()
-           
-            if not employee:
-                return None
- 
-            return DashboardResponse(
-                attendance=self._get_attendance_summary(employee_id),
-                leave_balance=self._get_leave_balance(employee_id),
-                timesheet=self._get_timesheet_summary(employee_id),
-                expenses=self._get_expenses_summary(employee_id),
-                birthdays_this_month=self._get_birthdays_this_month(),
-                upcoming_holidays=self._get_upcoming_holidays(),
-                policy_documents=self._get_policy_documents()
+            personal = _employee_dashboards.get(employee_id)
+            if personal is None:
+                personal = self._load_employee_dashboard(employee_id)
+                if personal is None:
+                    return None
+                _employee_dashboards.set(employee_id, personal)
+
+            widgets = self._get_org_widgets()
+            response = DashboardResponse(
+                attendance=personal.attendance,
+                leave_balance=personal.leave_balance,
+                timesheet=personal.timesheet,
+                expenses=personal.expenses,
+                birthdays_this_month=list(widgets.birthdays),
+                upcoming_holidays=list(widgets.holidays),
+                policy_documents=list(widgets.documents)
             )
+            return response, personal.designation
         except Exception as e:
             logger.error(f"Error getting dashboard data: {str(e)}")
             return None
- 
 
-    def _get_attendance_summary(self, employee_id: str) -> AttendanceSummary:
-        try:
-            from sqlalchemy import text
-            today = date.today()
-           
-            # Get current month attendance
-            month_start = today.replace(day=1)
-            total_working_days = self.db.execute(text(
-                "SELECT COUNT(DISTINCT attendance_date) FROM attendance WHERE employee_id = :emp_id AND attendance_date >= :month_start AND attendance_date <= :today"
-            ), {"emp_id": employee_id, "month_start": month_start, "today": today}).scalar() or 0
-           
-            present_days = self.db.execute(text(
-                "SELECT COUNT(*) FROM attendance WHERE employee_id = :emp_id AND attendance_date >= :month_start AND attendance_date <= :today AND LOWER(status) = 'present'"
-            ), {"emp_id": employee_id, "month_start": month_start, "today": today}).scalar() or 0
-           
-            # Calculate percentage
-            attendance_percentage = (present_days / total_working_days * 100) if total_working_days > 0 else 0.0
-           
-            return AttendanceSummary(
+    @staticmethod
+    def invalidate(employee_id: Optional[str]) -> None:
+        """Drop an employee's cached dashboard after an attendance, leave, timesheet or expense write"""
+        if employee_id:
+            _employee_dashboards.delete(employee_id)
+
+    @staticmethod
+    def invalidate_org_widgets() -> None:
+        """Rebuild the shared widgets on next use after a holiday, policy or personal-details write"""
+        _org_widgets.clear()
+
+    def _load_employee_dashboard(self, employee_id: str) -> Optional[EmployeeDashboard]:
+        today = date.today()
+        row = self.db.execute(EMPLOYEE_DASHBOARD_SQL, {
+            "emp_id": employee_id,
+            "today": today,
+            "year": today.year,
+            "month_start": today.replace(day=1),
+            "week_start": today - timedelta(days=today.weekday()),
+        }).fetchone()
+        if row is None:
+            return None
+
+        # Expected days come from the shift pattern and public holidays, not from which days have rows
+        expected_days = CalendarService.business_days(self.db, today.replace(day=1), today, row.working_days)
+        attendance_percentage = min(100.0, row.present_days / expected_days * 100) if expected_days > 0 else 0.0
+
+        # Remaining leave per type (equal distribution of the annual allowance)
+        leaves_per_type = (row.annual_leaves or 30) // 3
+        casual_remaining = max(0, leaves_per_type - row.casual_used)
+        sick_remaining = max(0, leaves_per_type - row.sick_used)
+        earned_remaining = max(0, leaves_per_type - row.earned_used)
+
+        return EmployeeDashboard(
+            designation=row.designation,
+            attendance=AttendanceSummary(
                 monthly_attendance_percentage=round(attendance_percentage, 1)
-            )
-        except Exception as e:
-            logger.error(f"Error calculating attendance: {e}")
-            return AttendanceSummary(
-                monthly_attendance_percentage=0.0
-            )
- 
-    def _get_leave_balance(self, employee_id: str) -> LeaveBalanceSchema:
-        try:
-            from sqlalchemy import text
-           
-            # Single query with GROUP BY to get annual leaves and used leaves by type and status
-            result = self.db.execute(text(
-                "SELECT e.annual_leaves, lm.leave_type, lm.status, COUNT(lm.leave_id) as used_count "
-                "FROM employees e "
-                "LEFT JOIN leave_management lm ON e.employee_id = lm.employee_id "
-                "WHERE e.employee_id = :emp_id "
-                "GROUP BY e.annual_leaves, lm.leave_type, lm.status"
-            ), {"emp_id": employee_id}).fetchall()
-           
-            annual_leaves = 30
-            casual_used = sick_used = earned_used = 0
-           
-            for row in result:
-                if row.annual_leaves:
-                    annual_leaves = row.annual_leaves
-                if row.leave_type and row.status and row.status.lower() == 'approved':
-                    leave_type = row.leave_type.lower()
-                    if 'casual' in leave_type:
-                        casual_used += row.used_count
-                    elif 'sick' in leave_type:
-                        sick_used += row.used_count
-                    elif 'earned' in leave_type:
-                        earned_used += row.used_count
-           
-            # Calculate remaining (equal distribution)
-            leaves_per_type = annual_leaves // 3
-            casual_remaining = max(0, leaves_per_type - casual_used)
-            sick_remaining = max(0, leaves_per_type - sick_used)
-            earned_remaining = max(0, leaves_per_type - earned_used)
-           
-            total_remaining = casual_remaining + sick_remaining + earned_remaining
-           
-            return LeaveBalanceSchema(
-                total_remaining=total_remaining,
+            ),
+            leave_balance=LeaveBalanceSchema(
+                total_remaining=casual_remaining + sick_remaining + earned_remaining,
                 casual=casual_remaining,
                 sick=sick_remaining,
                 earned=earned_remaining
+            ),
+            timesheet=TimesheetSummary(
+                hours_logged_this_week=float(row.week_hours or 0)
+            ),
+            expenses=ExpensesSummary(
+                pending_expense_count=row.pending_count or 0,
+                total_pending_amount=float(row.pending_amount or 0)
             )
-        except Exception as e:
-            logger.error(f"Error fetching leave balance: {e}")
-            return LeaveBalanceSchema(
-                total_remaining=30,
-                casual=10,
-                sick=10,
-                earned=10
-            )
- 
-    def _get_timesheet_summary(self, employee_id: str) -> TimesheetSummary:
-        try:
-            from sqlalchemy import text
-            today = date.today()
-            week_start = today - timedelta(days=today.weekday())
-           
-            # Get week hours from time_entries
-            result = self.db.execute(text(
-                "SELECT COALESCE(SUM(hours), 0) FROM time_entries WHERE employee_id = :emp_id AND entry_date >= :week_start AND entry_date <= :today"
-            ), {"emp_id": employee_id, "week_start": week_start, "today": today})
-            week_hours = result.scalar() or 0
-           
-            return TimesheetSummary(
-                hours_logged_this_week=float(week_hours)
-            )
-        except Exception as e:
-            logger.error(f"Error fetching timesheet: {e}")
-            return TimesheetSummary(
-                hours_logged_this_week=0.0
-            )
- 
-    def _get_expenses_summary(self, employee_id: str) -> ExpensesSummary:
+        )
+
+    def _get_org_widgets(self) -> OrgWidgets:
+        today = date.today()
+        widgets = _org_widgets.get(today)
+        if widgets is not None:
+            return widgets
+        # No lock around the query: the async dashboard runs this on the event-loop thread,
+        # where waiting on another request's build would deadlock. Concurrent misses each
+        # build once and the last result wins.
+        widgets = self._build_org_widgets(today)
+        if widgets is None:
+            return OrgWidgets((), (), ())
+        _org_widgets.set(today, widgets)
+        return widgets
+
+    def _build_org_widgets(self, today: date) -> Optional[OrgWidgets]:
         try:
-            from sqlalchemy import text
-            result = self.db.execute(text(
-                "SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM employee_expenses WHERE employee_id = :emp_id AND LOWER(status) LIKE '%pending%'"
-            ), {"emp_id": employee_id})
-           
-            data = result.fetchone()
-            pending_count = data[0] or 0
-            total_pending = float(data[1]) if data[1] else 0.0
-           
-            return ExpensesSummary(
-                pending_expense_count=pending_count,
-                total_pending_amount=total_pending
-            )
+            rows = self.db.execute(ORG_WIDGETS_SQL, {"month": today.month, "today": today}).fetchall()
         except Exception as e:
-            logger.error(f"Error fetching expenses: {e}")
-            return ExpensesSummary(
-                pending_expense_count=0,
-                total_pending_amount=0.0
-            )
- 
-    def _get_birthdays_this_month(self) -> list[Birthday]:
-        try:
-            current_month = date.today().month
-            employees_with_birthdays = self.db.query(Employee, EmployeePersonal).join(
-                EmployeePersonal, Employee.employee_id == EmployeePersonal.employee_id
-            ).filter(
-                EmployeePersonal.date_of_birth.isnot(None),
-                extract('month', EmployeePersonal.date_of_birth) == current_month
-            ).all()
-           
-            birthdays = []
-            for emp, personal in employees_with_birthdays:
-                dept_name = "Unknown"
-                if emp.department_id:
-                    dept = self.db.query(Department).filter(Department.department_id == emp.department_id).first()
-                    if dept:
-                        dept_name = dept.department_name
-               
+            logger.error(f"Error fetching dashboard widgets: {e}")
+            return None
+
+        birthdays, holidays, documents = [], [], []
+        for row in rows:
+            if row.kind == 'birthday':
                 # Format birthday as "Monday, 25 December"
-                formatted_date = personal.date_of_birth.strftime("%A, %d %B")
-               
-                # Compute full_name from first_name and last_name
-                full_name = f"{emp.first_name or ''} {emp.last_name or ''}".strip() or "Unknown"
-               
                 birthdays.append(Birthday(
-                    name=full_name,
-                    department=dept_name,
-                    birthday_date=formatted_date
+                    name=row.title.strip() or "Unknown",
+                    department=row.detail or "Unknown",
+                    birthday_date=_as_date(row.day).strftime("%A, %d %B")
                 ))
-           
-            return birthdays
-        except Exception as e:
-            logger.error(f"Error fetching birthdays: {e}")
-            return []
- 
-    def _get_upcoming_holidays(self) -> list[HolidaySchema]:
-        try:
-            from sqlalchemy import text
-            today = date.today()
-           
-            result = self.db.execute(text(
-                "SELECT title, event_date FROM events_holidays WHERE event_date >= :today ORDER BY event_date LIMIT 5"
-            ), {"today": today})
-           
-            holidays = []
-            for row in result:
+            elif row.kind == 'holiday':
                 # Format holiday date as "Monday, December 25, 2025"
-                formatted_date = row.event_date.strftime("%A, %B %d, %Y")
-               
-                holidays.append(HolidaySchema(
+                holiday_date = _as_date(row.day)
+                holidays.append((holiday_date, HolidaySchema(
                     holiday_name=row.title,
-                    holiday_date=formatted_date
-                ))
-           
-            return holidays
-        except Exception as e:
-            logger.error(f"Error fetching holidays: {e}")
-            return []
- 
-    def _get_policy_documents(self) -> list[DocumentSchema]:
-        try:
-            from sqlalchemy import text
-           
-            result = self.db.execute(text(
-                "SELECT title, category FROM compliance_documents_and_policy_management ORDER BY uploaded_on DESC LIMIT 10"
-            ))
-           
-            documents = []
-            for row in result:
-                documents.append(DocumentSchema(
-                    title=row.title,
-                    category=row.category
-                ))
-           
-            return documents
-        except Exception as e:
-            logger.error(f"Error fetching policy documents: {e}")
-            return []
\ No newline at end of file
+                    holiday_date=holiday_date.strftime("%A, %B %d, %Y")
+                )))
+            else:
+                documents.append((row.sort_ts, DocumentSchema(title=row.title, category=row.detail)))
+
+        # UNION ALL does not preserve the CTE ordering, so restore it here
+        holidays.sort(key=lambda item: item[0])
+        documents.sort(key=lambda item: item[0] or datetime.min, reverse=True)
+        return OrgWidgets(
+            birthdays=tuple(birthdays),
+            holidays=tuple(holiday for _, holiday in holidays),
+            documents=tuple(doc for _, doc in documents)
+        )
+
+
+def _as_date(value) -> date:
+    """UNION columns come back untyped on some drivers; normalise to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
@@ -0,0 +1,147 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Tuple
+import re
+
+from ..models import Employee
+
+# The indexed document: names, ID and email, lower-cased. The a8c2e6f0d4b1 migration builds
+# idx_employees_search_trgm and idx_employees_search_tsv on exactly this expression.
+SEARCH_TEXT = ("lower(coalesce({p}first_name, '') || ' ' || coalesce({p}last_name, '') || ' ' || "
+               "coalesce({p}employee_id, '') || ' ' || coalesce({p}email_id, ''))")
+DOCUMENT = SEARCH_TEXT.format(p="e.")
+TSVECTOR = f"to_tsvector('simple', {DOCUMENT})"
+
+# pg_trgm's default word_similarity_threshold, which the <% operator uses
+FUZZY_THRESHOLD = 0.6
+
+EMPLOYEE_SEARCH_SQL = """
+    SELECT e.employee_id, COUNT(*) OVER () AS matches,
+           CASE WHEN lower(e.employee_id) = :term OR lower(e.email_id) = :term THEN 2 ELSE 0 END
+           + CASE WHEN {document} LIKE :prefix ESCAPE '\\' THEN 1 ELSE 0 END
+           + {ts_rank}
+           + word_similarity(:term, {document}) AS rank
+    FROM employees e
+    WHERE ({matches}) {department_filter}
+    ORDER BY rank DESC, e.first_name, e.employee_id
+    LIMIT :limit OFFSET :offset
+"""
+
+
+class EmployeeSearchService:
+    """Ranked directory search over employee names, IDs and emails.
+
+    On PostgreSQL a term matches by word prefix (tsvector), by substring
+    (trigram index, so no sequential scan) or fuzzily (pg_trgm word
+    similarity, for typos). Exact ID/email hits rank first, then names that
+    start with the term, then text-search and similarity scores. Other
+    databases (the SQLite test harness) get the same rules in memory, with
+    pg_trgm's trigram word similarity recomputed in Python. The prefix rule
+    splits on non-alphanumerics, so it is looser than the 'simple' parser
+    for emails and hyphenated IDs.
+    """
+
+    @staticmethod
+    def search(db: Session, term: str, department_id: Optional[int] = None,
+               page: int = 1, size: int = 20) -> Tuple[List[Employee], int]:
+        """One page of matching employees, best match first; returns (employees, total matches)"""
+        term = term.strip().lower()
+        if not term:
+            return [], 0
+        if db.get_bind().dialect.name == "postgresql":
+            employee_ids, matches = EmployeeSearchService._search_postgres(db, term, department_id, page, size)
+        else:
+            employee_ids, matches = EmployeeSearchService._search_in_memory(db, term, department_id, page, size)
+        if not employee_ids:
+            return [], matches
+        by_id = {employee.employee_id: employee
+                 for employee in db.query(Employee).filter(Employee.employee_id.in_(employee_ids)).all()}
+        return [by_id[employee_id] for employee_id in employee_ids if employee_id in by_id], matches
+
+    @staticmethod
+    def tokens(value: str) -> List[str]:
+        return re.findall(r"[a-z0-9]+", value.lower())
+
+    @staticmethod
+    def trigrams(value: str) -> List[str]:
+        """pg_trgm's trigrams, in order: each alphanumeric word padded with two leading blanks and one trailing"""
+        grams = []
+        for word in re.findall(r"[^\W_]+", value.lower()):
+            padded = f"  {word} "
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    @staticmethod
+    def word_similarity(term: str, document: str) -> float:
+        """pg_trgm's word_similarity(term, document): the best trigram similarity
+        between the term and any continuous extent of the document"""
+        term_grams = set(EmployeeSearchService.trigrams(term))
+        document_grams = EmployeeSearchService.trigrams(document)
+        if not term_grams:
+            return 0.0
+        # Widening an extent past a trigram the term lacks only lowers the score,
+        # so extents start and end on shared trigrams
+        hits = [i for i, gram in enumerate(document_grams) if gram in term_grams]
+        best = 0.0
+        for start_index, start in enumerate(hits):
+            for end in hits[start_index:]:
+                extent = set(document_grams[start:end + 1])
+                shared = len(extent & term_grams)
+                best = max(best, shared / (len(term_grams) + len(extent) - shared))
+        return best
+
+    @staticmethod
+    def _search_postgres(db: Session, term: str, department_id: Optional[int], page: int, size: int) -> Tuple[List[str], int]:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params = {"term": term, "contains": f"%{escaped}%", "prefix": f"{escaped}%",
+                  "limit": size, "offset": (page - 1) * size}
+        matches = [f"{DOCUMENT} LIKE :contains ESCAPE '\\'", f":term <% {DOCUMENT}"]
+        ts_rank = "0"
+        words = EmployeeSearchService.tokens(term)
+        if words:
+            # Every word of the term as a prefix: "jo sm" finds "John Smith"
+            params["tsquery"] = " & ".join(f"{word}:*" for word in words)
+            matches.insert(0, f"{TSVECTOR} @@ to_tsquery('simple', :tsquery)")
+            ts_rank = f"ts_rank({TSVECTOR}, to_tsquery('simple', :tsquery))"
+        department_filter = ""
+        if department_id:
+            department_filter = "AND e.department_id = :department_id"
+            params["department_id"] = department_id
+        sql = EMPLOYEE_SEARCH_SQL.format(document=DOCUMENT, ts_rank=ts_rank, matches=" OR ".join(matches),
+                                         department_filter=department_filter)
+        rows = db.execute(text(sql), params).fetchall()
+        return [row.employee_id for row in rows], (rows[0].matches if rows else 0)
+
+    @staticmethod
+    def _search_in_memory(db: Session, term: str, department_id: Optional[int], page: int, size: int) -> Tuple[List[str], int]:
+        query = db.query(Employee.employee_id, Employee.first_name, Employee.last_name, Employee.email_id)
+        if department_id:
+            query = query.filter(Employee.department_id == department_id)
+        words = EmployeeSearchService.tokens(term)
+        ranked = []
+        for row in query.all():
+            rank = EmployeeSearchService._rank(term, words, row)
+            if rank is not None:
+                ranked.append((-rank, (row.first_name or ""), row.employee_id))
+        ranked.sort()
+        start = (page - 1) * size
+        return [employee_id for _, _, employee_id in ranked[start:start + size]], len(ranked)
+
+    @staticmethod
+    def _rank(term: str, words: List[str], row) -> Optional[float]:
+        """The PostgreSQL rank for one employee, or None when it does not match"""
+        document = " ".join(value or "" for value in (row.first_name, row.last_name, row.employee_id, row.email_id)).lower()
+        document_words = EmployeeSearchService.tokens(document)
+        prefix_match = bool(words) and all(any(candidate.startswith(word) for candidate in document_words) for word in words)
+        similarity = EmployeeSearchService.word_similarity(term, document)
+        if not (prefix_match or term in document or similarity >= FUZZY_THRESHOLD):
+            return None
+        rank = similarity
+        if term in ((row.employee_id or "").lower(), (row.email_id or "").lower()):
+            rank += 2
+        if document.startswith(term):
+            rank += 1
+        if prefix_match:
+            # ts_rank's weight for a single hit
+            rank += 0.1
+        return rank
@@ -1,10 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import and_, desc
 from typing import Optional, Tuple, List
 from datetime import date, timedelta
 from ..models import Employee, Department
-from ..models.hrms_models import LeaveManagement
 from ..schemas.employee import EmployeeUpdate
+from ..models.user import User
+from ..core.principal import invalidate_principal
+from .dashboard_service import DashboardService
+from .leave_balance_service import LeaveBalanceService
+from .compensation_service import CompensationService
+from .employee_search_service import EmployeeSearchService
 
 class EmployeeService:
     
@@ -16,36 +21,23 @@ class EmployeeService:
         page: int = 1,
         size: int = 20
     ) -> Tuple[List[Employee], int, int, int]:
-        """Get paginated employees with dashboard stats"""
+        """Get paginated employees with dashboard stats; searches are ranked by relevance"""
         
-        # Base query
-        query = db.query(Employee)
-        
-        # Apply filters
-        if search:
-            search_filter = or_(
-                Employee.first_name.ilike(f"%{search}%"),
-                Employee.last_name.ilike(f"%{search}%"),
-                Employee.employee_id.ilike(f"%{search}%"),
-                Employee.email_id.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
-        
-        if department_id:
-            query = query.filter(Employee.department_id == department_id)
-        
-        # Get filtered count for pagination
-        filtered_count = query.count()
+        if search and search.strip():
+            # Indexed, ranked search (see EmployeeSearchService)
+            employees, _ = EmployeeSearchService.search(db, search, department_id, page, size)
+        else:
+            query = db.query(Employee)
+            if department_id:
+                query = query.filter(Employee.department_id == department_id)
+            employees = query.order_by(Employee.first_name)\
+                             .offset((page - 1) * size)\
+                             .limit(size)\
+                             .all()
         
         # Get total employees count (all employees in DB)
         total_employees = db.query(Employee).count()
         
-        # Get paginated results  
-        employees = query.order_by(Employee.first_name)\
-                         .offset((page - 1) * size)\
-                         .limit(size)\
-                         .all()
-        
         # Calculate dashboard stats
         department_count = db.query(Department).count()
         
@@ -127,7 +119,25 @@ class EmployeeService:
             if department_id is not None:
                 setattr(employee, 'department_id', department_id)
             
+            # A CTC change becomes a new effective-dated compensation row from today
+            if update_data.get('annual_ctc') is not None:
+                CompensationService.record(db, employee_id, update_data['annual_ctc'])
+            
+            # Keep the login account in step: role mirrors designation, status drives is_active
+            access_changed = update_data.get('designation') is not None or update_data.get('status') is not None
+            if access_changed:
+                user = db.query(User).filter(User.employee_id == employee_id).first()
+                if user:
+                    if update_data.get('designation') is not None:
+                        user.role = update_data['designation']
+                    if update_data.get('status') is not None:
+                        user.is_active = str(update_data['status']).strip().lower() == 'active'
+            
             db.commit()
+            if access_changed:
+                invalidate_principal(employee_id=employee_id)
+            DashboardService.invalidate(employee_id)
+            DashboardService.invalidate_org_widgets()
             db.refresh(employee)
             return employee
             
@@ -163,22 +173,11 @@ class EmployeeService:
     
     @staticmethod
     def calculate_leave_balances(db: Session, employee_id: str, annual_leaves: int):
-        """Calculate leave balances based on annual_leaves and used leaves from leave_management"""
-        # Get approved leaves from leave_management table
-        used_casual = db.query(func.coalesce(func.sum(LeaveManagement.employee_used_leaves), 0))\
-                       .filter(LeaveManagement.employee_id == employee_id,
-                              LeaveManagement.leave_type.ilike('%casual%'),
-                              LeaveManagement.status == 'Approved').scalar() or 0
-        
-        used_sick = db.query(func.coalesce(func.sum(LeaveManagement.employee_used_leaves), 0))\
-                     .filter(LeaveManagement.employee_id == employee_id,
-                            LeaveManagement.leave_type.ilike('%sick%'),
-                            LeaveManagement.status == 'Approved').scalar() or 0
-        
-        used_earned = db.query(func.coalesce(func.sum(LeaveManagement.employee_used_leaves), 0))\
-                       .filter(LeaveManagement.employee_id == employee_id,
-                              LeaveManagement.leave_type.ilike('%earned%'),
-                              LeaveManagement.status == 'Approved').scalar() or 0
+        """Calculate leave balances based on annual_leaves and the leave_balances ledger"""
+        balance = LeaveBalanceService.get_balance(db, employee_id)
+        used_casual = balance.used_casual if balance else 0
+        used_sick = balance.used_sick if balance else 0
+        used_earned = balance.used_earned if balance else 0
         
         # Divide annual_leaves among leave types
         total_annual = annual_leaves or 21
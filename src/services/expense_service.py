@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.expense import Expense
 from schemas.expense import ExpenseCreate
+from src.services.dashboard_service import DashboardService
 from datetime import datetime
 import logging
 
@@ -24,6 +25,7 @@ class ExpenseService:
             db.add(db_expense)
             db.commit()
             db.refresh(db_expense)
+            DashboardService.invalidate(employee_id)
             
             logger.info(f"Expense created successfully with ID: {db_expense.expense_id}")
             
@@ -61,6 +63,7 @@ class ExpenseService:
             expense.status = status
             db.commit()
             db.refresh(expense)
+            DashboardService.invalidate(employee_id)
         return expense
     
     @staticmethod
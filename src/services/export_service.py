@@ -0,0 +1,137 @@
+from sqlalchemy import text
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Iterator, NamedTuple, Optional
+import csv
+import io
+import json
+import logging
+
+from ..config.settings import settings
+from ..models.session import engine, replica_engine
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportDataset(NamedTuple):
+    """A streamable table: its SELECT (without WHERE/ORDER BY), date column and sort key"""
+    select_sql: str
+    date_column: str
+    order_by: str
+
+
+DATASETS = {
+    "attendance": ExportDataset(
+        select_sql="""
+            SELECT a.attendance_id, a.employee_id, e.first_name, e.last_name, a.attendance_date,
+                   a.punch_in, a.punch_out, a.work_hours, a.status
+            FROM attendance a
+            LEFT JOIN employees e ON e.employee_id = a.employee_id
+        """,
+        date_column="a.attendance_date",
+        order_by="a.attendance_date, a.employee_id, a.attendance_id",
+    ),
+    "time-entries": ExportDataset(
+        select_sql="""
+            SELECT t.time_entry_id, t.employee_id, t.entry_date, t.project, t.task_description, t.hours,
+                   t.status, t.approver_id, t.approver_type, t.created_at, t.updated_at
+            FROM time_entries t
+        """,
+        date_column="t.entry_date",
+        order_by="t.entry_date, t.employee_id, t.time_entry_id",
+    ),
+    "expenses": ExportDataset(
+        select_sql="""
+            SELECT x.expense_id, x.expense_code, x.employee_id, x.category, x.description, x.amount,
+                   x.expense_date, x.status, x.created_at, x.updated_at
+            FROM employee_expenses x
+        """,
+        date_column="x.expense_date",
+        order_by="x.expense_date, x.employee_id, x.expense_id",
+    ),
+}
+
+
+class ExportService:
+    """Streams whole tables as CSV or NDJSON.
+
+    Rows come through a server-side cursor in batches of EXPORT_BATCH_SIZE and
+    each batch is encoded and yielded before the next is fetched, so memory
+    stays flat however many rows the period holds.
+    """
+
+    @staticmethod
+    def build_query(dataset: str, start: Optional[date] = None, end: Optional[date] = None,
+                    employee_id: Optional[str] = None, status: Optional[str] = None):
+        spec = DATASETS[dataset]
+        conditions, params = [], {}
+        if start:
+            conditions.append(f"{spec.date_column} >= :start")
+            params["start"] = start
+        if end:
+            conditions.append(f"{spec.date_column} <= :end")
+            params["end"] = end
+        alias = spec.date_column.split(".")[0]
+        if employee_id:
+            conditions.append(f"{alias}.employee_id = :emp_id")
+            params["emp_id"] = employee_id
+        if status:
+            conditions.append(f"UPPER({alias}.status) = :status")
+            params["status"] = status.upper()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return text(f"{spec.select_sql} {where} ORDER BY {spec.order_by}"), params
+
+    @staticmethod
+    def stream(dataset: str, fmt: str, start: Optional[date] = None, end: Optional[date] = None,
+               employee_id: Optional[str] = None, status: Optional[str] = None) -> Iterator[bytes]:
+        """Yield the encoded export one batch at a time.
+
+        Opens its own connection (the replica when configured) because the
+        response body is still being sent after request dependencies close.
+        """
+        query, params = ExportService.build_query(dataset, start, end, employee_id, status)
+        return ExportService.stream_query(query, params, fmt, dataset)
+
+    @staticmethod
+    def stream_query(query, params: dict, fmt: str, label: str) -> Iterator[bytes]:
+        """Stream any SELECT the same way; used by listings that offer a streaming mode"""
+        encode = ExportService._csv_chunks if fmt == "csv" else ExportService._ndjson_chunks
+        batch_size = settings.export_batch_size
+        rows_sent = 0
+        with (replica_engine or engine).connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query, params)
+            for chunk, count in encode(list(result.keys()), result.partitions()):
+                rows_sent += count
+                yield chunk
+        logger.info(f"Exported {rows_sent} {label} rows as {fmt}")
+
+    @staticmethod
+    def _csv_chunks(columns, partitions):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode("utf-8"), 0
+        for partition in partitions:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(partition)
+            yield buffer.getvalue().encode("utf-8"), len(partition)
+
+    @staticmethod
+    def _ndjson_chunks(columns, partitions):
+        for partition in partitions:
+            lines = [json.dumps(dict(zip(columns, row)), default=_json_value) for row in partition]
+            yield ("\n".join(lines) + "\n").encode("utf-8"), len(partition)
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
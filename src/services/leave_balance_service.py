@@ -0,0 +1,197 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date
+from typing import Dict, Optional, NamedTuple, Union
+import logging
+
+from src.services.calendar_service import CalendarService
+
+logger = logging.getLogger(__name__)
+
+LEAVE_TYPES = ("casual", "sick", "earned")
+
+# Ledger rows are adjusted in place; a missing row is created on first use
+UPSERT_LEDGER_SQL = text("""
+    INSERT INTO leave_balances (employee_id, leave_type, year, used, pending, updated_at)
+    VALUES (:emp_id, :leave_type, :year, :used, :pending, NOW())
+    ON CONFLICT (employee_id, leave_type, year) DO UPDATE
+    SET used = leave_balances.used + EXCLUDED.used,
+        pending = leave_balances.pending + EXCLUDED.pending,
+        updated_at = NOW()
+""")
+
+# Employee allowance plus its ledger rows for one year, all by primary key
+BALANCE_SQL = text("""
+    SELECT e.annual_leaves,
+           COALESCE(MAX(CASE WHEN b.leave_type = 'casual' THEN b.used END), 0) AS used_casual,
+           COALESCE(MAX(CASE WHEN b.leave_type = 'sick' THEN b.used END), 0) AS used_sick,
+           COALESCE(MAX(CASE WHEN b.leave_type = 'earned' THEN b.used END), 0) AS used_earned,
+           COALESCE(SUM(b.pending), 0) AS pending
+    FROM employees e
+    LEFT JOIN leave_balances b ON b.employee_id = e.employee_id AND b.year = :year
+    WHERE e.employee_id = :emp_id
+    GROUP BY e.annual_leaves
+""")
+
+SPANNING_REQUESTS_SQL = """
+    SELECT leave_id, employee_id, leave_type, start_date, end_date, status, employee_used_leaves
+    FROM leave_management
+    WHERE employee_id IN (SELECT employee_id FROM employees) {employee_filter}
+      AND EXTRACT(YEAR FROM end_date) > EXTRACT(YEAR FROM start_date)
+"""
+
+REBUILD_SQL = """
+    INSERT INTO leave_balances (employee_id, leave_type, year, used, pending, updated_at)
+    SELECT employee_id, leave_type, year,
+           SUM(CASE WHEN status = 'APPROVED' THEN days ELSE 0 END),
+           SUM(CASE WHEN status = 'PENDING' THEN days ELSE 0 END),
+           NOW()
+    FROM (
+        SELECT employee_id,
+               CASE WHEN LOWER(leave_type) LIKE '%casual%' THEN 'casual'
+                    WHEN LOWER(leave_type) LIKE '%sick%' THEN 'sick'
+                    WHEN LOWER(leave_type) LIKE '%earned%' THEN 'earned' END AS leave_type,
+               CAST(EXTRACT(YEAR FROM start_date) AS INTEGER) AS year,
+               UPPER(status) AS status,
+               COALESCE(employee_used_leaves, 0) AS days
+        FROM leave_management
+        WHERE employee_id IN (SELECT employee_id FROM employees) {employee_filter}
+          -- Requests spanning a new year are split per year in Python
+          AND (end_date IS NULL OR EXTRACT(YEAR FROM end_date) = EXTRACT(YEAR FROM start_date))
+    ) requests
+    WHERE leave_type IS NOT NULL
+    GROUP BY employee_id, leave_type, year
+"""
+
+
+class LedgerBalance(NamedTuple):
+    """Leave allowance and usage for one employee and year"""
+    annual_leaves: Optional[int]
+    used_casual: int
+    used_sick: int
+    used_earned: int
+    pending: int
+
+    @property
+    def total_used(self) -> int:
+        return self.used_casual + self.used_sick + self.used_earned
+
+
+class LeaveBalanceService:
+    """Maintains the leave_balances ledger (employee, leave type, year).
+
+    Every change to a leave request's status adjusts the ledger in the caller's
+    transaction, so balance reads never have to count leave_management rows.
+    Requests count the working days they cover (employee_used_leaves), charged
+    to the year each day falls in.
+    """
+
+    @staticmethod
+    def ledger_type(leave_type: Optional[str]) -> Optional[str]:
+        """Map a free-text leave type onto casual / sick / earned, or None if it is none of them"""
+        value = (leave_type or "").lower()
+        for kind in LEAVE_TYPES:
+            if kind in value:
+                return kind
+        return None
+
+    @staticmethod
+    def leave_days(db: Session, leave) -> Dict[int, int]:
+        """Working days a leave request counts for, per calendar year.
+
+        Fills employee_used_leaves on requests that predate it; 0 is the legacy column default, so it counts as unsized.
+        """
+        single_year = leave.end_date is None or leave.end_date.year == leave.start_date.year
+        if leave.employee_used_leaves and single_year:
+            return {leave.start_date.year: leave.employee_used_leaves}
+        by_year = LeaveBalanceService.days_by_year(db, leave.employee_id, leave.start_date, leave.end_date)
+        if not leave.employee_used_leaves:
+            leave.employee_used_leaves = sum(by_year.values())
+        return by_year
+
+    @staticmethod
+    def days_by_year(db: Session, employee_id: str, start_date: date, end_date: Optional[date]) -> Dict[int, int]:
+        """Working days in [start_date, end_date] split by calendar year"""
+        end_date = end_date or start_date
+        spans = [(employee_id, max(start_date, date(year, 1, 1)), min(end_date, date(year, 12, 31)))
+                 for year in range(start_date.year, end_date.year + 1)]
+        return {span_start.year: days for (_, span_start, _), days in zip(spans, CalendarService.leave_days_many(db, spans))}
+
+    @staticmethod
+    def record_status_change(db: Session, employee_id: str, leave_type: str, start_date: date,
+                             old_status: Optional[str], new_status: Optional[str], days: Union[int, Dict[int, int]] = 1) -> None:
+        """Adjust the ledger for a leave request moving from old_status to new_status (None for a new request).
+
+        `days` is a count for start_date's year or, from leave_days, working days per year.
+        Does not commit; call before the commit that persists the status change.
+        """
+        kind = LeaveBalanceService.ledger_type(leave_type)
+        if not kind or not employee_id or start_date is None:
+            return
+        old_status = (old_status or "").upper()
+        new_status = (new_status or "").upper()
+        used = (new_status == "APPROVED") - (old_status == "APPROVED")
+        pending = (new_status == "PENDING") - (old_status == "PENDING")
+        if not used and not pending:
+            return
+        by_year = days if isinstance(days, dict) else {start_date.year: days}
+        rows = [
+            {"emp_id": employee_id, "leave_type": kind, "year": year, "used": used * count, "pending": pending * count}
+            for year, count in sorted(by_year.items()) if count
+        ]
+        if rows:
+            db.execute(UPSERT_LEDGER_SQL, rows)
+
+    @staticmethod
+    def get_balance(db: Session, employee_id: str, year: Optional[int] = None) -> Optional[LedgerBalance]:
+        """Allowance and usage in one lookup, or None if the employee does not exist"""
+        row = db.execute(BALANCE_SQL, {"emp_id": employee_id, "year": year or date.today().year}).fetchone()
+        if row is None:
+            return None
+        return LedgerBalance(
+            annual_leaves=row.annual_leaves,
+            used_casual=int(row.used_casual),
+            used_sick=int(row.used_sick),
+            used_earned=int(row.used_earned),
+            pending=int(row.pending)
+        )
+
+    @staticmethod
+    def rebuild(db: Session, employee_id: Optional[str] = None) -> int:
+        """Recompute the ledger from leave_management (all employees, or one); returns rows written"""
+        LeaveBalanceService._fill_missing_days(db, employee_id)
+        params = {}
+        if employee_id:
+            db.execute(text("DELETE FROM leave_balances WHERE employee_id = :emp_id"), {"emp_id": employee_id})
+            employee_filter = "AND employee_id = :emp_id"
+            params["emp_id"] = employee_id
+        else:
+            db.execute(text("DELETE FROM leave_balances"))
+            employee_filter = ""
+        result = db.execute(text(REBUILD_SQL.format(employee_filter=employee_filter)), params)
+        spanning = db.execute(text(SPANNING_REQUESTS_SQL.format(employee_filter=employee_filter)), params).fetchall()
+        for leave in spanning:
+            LeaveBalanceService.record_status_change(db, leave.employee_id, leave.leave_type, leave.start_date, None,
+                                                     leave.status, LeaveBalanceService.days_by_year(db, leave.employee_id, leave.start_date, leave.end_date))
+        db.commit()
+        logger.info(f"Rebuilt leave balance ledger: {result.rowcount} rows, {len(spanning)} requests spanning years")
+        return result.rowcount
+
+    @staticmethod
+    def _fill_missing_days(db: Session, employee_id: Optional[str] = None) -> None:
+        """Size requests that have no employee_used_leaves yet (NULL, or the legacy default 0), in bulk"""
+        sql = ("SELECT leave_id, employee_id, start_date, end_date FROM leave_management "
+               "WHERE (employee_used_leaves IS NULL OR employee_used_leaves = 0)")
+        params = {}
+        if employee_id:
+            sql += " AND employee_id = :emp_id"
+            params["emp_id"] = employee_id
+        rows = db.execute(text(sql), params).fetchall()
+        if not rows:
+            return
+        days = CalendarService.leave_days_many(db, [(row.employee_id, row.start_date, row.end_date) for row in rows])
+        db.execute(
+            text("UPDATE leave_management SET employee_used_leaves = :days WHERE leave_id = :leave_id"),
+            [{"days": count, "leave_id": row.leave_id} for row, count in zip(rows, days)]
+        )
+        logger.info(f"Sized {len(rows)} leave requests in working days")
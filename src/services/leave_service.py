@@ -1,9 +1,46 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional
+from datetime import date
 from src.models.leave import Leave
+from src.services.dashboard_service import DashboardService
+from src.services.leave_balance_service import LeaveBalanceService
 from src.schemas.leave import LeaveCreate, LeaveResponse, LeaveBalance, ManagerLeaveCreate, ManagerLeaveResponse, ManagerBalanceResponse, HRExecutiveLeaveCreate, HRExecutiveLeaveResponse, HRExecutiveBalanceResponse
 
+DEFAULT_PAGE_SIZE = 100
+
+LEAVE_LIST_SQL = """
+    SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
+           CONCAT(e.first_name, ' ', e.last_name) as employee_name
+    FROM leave_management l 
+    JOIN employees e ON l.employee_id = e.employee_id 
+"""
+
+def fetch_leave_page(db: Session, conditions: List[str], params: dict, after: Optional[int] = None,
+                     limit: int = DEFAULT_PAGE_SIZE, status: Optional[str] = None,
+                     from_date: Optional[date] = None, to_date: Optional[date] = None):
+    """One keyset page of leave rows, newest first.
+
+    Pages continue from the last leave_id seen (``after``) instead of using OFFSET,
+    so every page is an index range scan on leave_id regardless of history size.
+    """
+    conditions = list(conditions)
+    params = dict(params, limit=limit)
+    if after is not None:
+        conditions.append("l.leave_id < :after")
+        params["after"] = after
+    if status:
+        conditions.append("UPPER(l.status) = :status")
+        params["status"] = status.upper()
+    if from_date:
+        conditions.append("l.end_date >= :from_date")
+        params["from_date"] = from_date
+    if to_date:
+        conditions.append("l.start_date <= :to_date")
+        params["to_date"] = to_date
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return db.execute(text(f"{LEAVE_LIST_SQL} {where} ORDER BY l.leave_id DESC LIMIT :limit"), params).fetchall()
+
 class LeaveService:
     @staticmethod
     def create_leave(db: Session, leave: LeaveCreate) -> LeaveResponse:
@@ -15,8 +52,11 @@ class LeaveService:
             reason=leave.reason,
             status="PENDING"
         )
+        days = LeaveBalanceService.leave_days(db, db_leave)
         db.add(db_leave)
+        LeaveBalanceService.record_status_change(db, db_leave.employee_id, db_leave.leave_type, db_leave.start_date, None, db_leave.status, days)
         db.commit()
+        DashboardService.invalidate(db_leave.employee_id)
         db.refresh(db_leave)
         # Get employee name
         emp_name = db.execute(text("SELECT CONCAT(first_name, ' ', last_name) FROM employees WHERE employee_id = :emp_id"), {"emp_id": leave.employee_id}).fetchone()
@@ -34,24 +74,13 @@ class LeaveService:
         )
 
     @staticmethod
-    def get_leaves(db: Session, employee_id: Optional[str] = None, status: Optional[str] = None) -> List[LeaveResponse]:
+    def get_leaves(db: Session, employee_id: Optional[str] = None, status: Optional[str] = None,
+                   after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   from_date: Optional[date] = None, to_date: Optional[date] = None) -> List[LeaveResponse]:
         if employee_id:
-            leaves = db.execute(text("""
-                SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
-                       CONCAT(e.first_name, ' ', e.last_name) as employee_name
-                FROM leave_management l 
-                JOIN employees e ON l.employee_id = e.employee_id 
-                WHERE l.employee_id = :emp_id
-                ORDER BY l.leave_id DESC
-            """), {"emp_id": employee_id}).fetchall()
+            leaves = fetch_leave_page(db, ["l.employee_id = :emp_id"], {"emp_id": employee_id}, after, limit, status, from_date, to_date)
         else:
-            leaves = db.execute(text("""
-                SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
-                       CONCAT(e.first_name, ' ', e.last_name) as employee_name
-                FROM leave_management l 
-                JOIN employees e ON l.employee_id = e.employee_id 
-                ORDER BY l.leave_id DESC
-            """)).fetchall()
+            leaves = fetch_leave_page(db, [], {}, after, limit, status, from_date, to_date)
         
         return [LeaveResponse(
             leave_id=leave[0],
@@ -65,17 +94,14 @@ class LeaveService:
         ) for leave in leaves]
 
     @staticmethod
-    def get_pending_approvals(db: Session, approver_id: str) -> List[LeaveResponse]:
-        leaves = db.execute(text("""
-            SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
-                   CONCAT(e.first_name, ' ', e.last_name) as employee_name
-            FROM leave_management l 
-            JOIN employees e ON l.employee_id = e.employee_id 
-            WHERE UPPER(e.designation) NOT LIKE '%MANAGER%' 
-            AND UPPER(e.designation) NOT LIKE '%EXECUTIVE%' 
-            AND UPPER(e.designation) NOT LIKE '%ADMIN%'
-            ORDER BY l.leave_id DESC
-        """)).fetchall()
+    def get_pending_approvals(db: Session, approver_id: str, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                              status: Optional[str] = None, from_date: Optional[date] = None,
+                              to_date: Optional[date] = None) -> List[LeaveResponse]:
+        leaves = fetch_leave_page(db, [
+            "UPPER(e.designation) NOT LIKE '%MANAGER%'",
+            "UPPER(e.designation) NOT LIKE '%EXECUTIVE%'",
+            "UPPER(e.designation) NOT LIKE '%ADMIN%'"
+        ], {}, after, limit, status, from_date, to_date)
         
         return [LeaveResponse(
             leave_id=leave[0],
@@ -90,11 +116,15 @@ class LeaveService:
 
     @staticmethod
     def approve_leave(db: Session, leave_id: str, approver_id: str, approver_role: str, action: str, comments: Optional[str] = None) -> Optional[LeaveResponse]:
-        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).first()
+        # Row lock: a concurrent approval of the same request waits and then sees the new status
+        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).with_for_update().first()
         if not leave:
             return None
+        previous_status = leave.status
         leave.status = "APPROVED" if action.lower() == "approve" else "REJECTED"
+        LeaveBalanceService.record_status_change(db, leave.employee_id, leave.leave_type, leave.start_date, previous_status, leave.status, LeaveBalanceService.leave_days(db, leave))
         db.commit()
+        DashboardService.invalidate(leave.employee_id)
         db.refresh(leave)
         # Get employee name
         emp_name = db.execute(text("SELECT CONCAT(first_name, ' ', last_name) FROM employees WHERE employee_id = :emp_id"), {"emp_id": leave.employee_id}).fetchone()
@@ -115,8 +145,11 @@ class ManagerService:
     @staticmethod
     def create_leave(db: Session, leave: ManagerLeaveCreate) -> ManagerLeaveResponse:
         db_leave = Leave(employee_id=leave.manager_id, leave_type=leave.leave_type, start_date=leave.start_date, end_date=leave.end_date, reason=leave.reason, status="PENDING")
+        days = LeaveBalanceService.leave_days(db, db_leave)
         db.add(db_leave)
+        LeaveBalanceService.record_status_change(db, db_leave.employee_id, db_leave.leave_type, db_leave.start_date, None, db_leave.status, days)
         db.commit()
+        DashboardService.invalidate(db_leave.employee_id)
         db.refresh(db_leave)
         return ManagerLeaveResponse(leave_id=db_leave.leave_id, manager_id=db_leave.employee_id, leave_type=db_leave.leave_type, start_date=db_leave.start_date, end_date=db_leave.end_date, reason=db_leave.reason, status=db_leave.status, approved_by=None, comments=None)
 
@@ -146,19 +179,13 @@ class ManagerService:
 
     @staticmethod
     def get_leave_balance(db: Session, manager_id: str) -> ManagerBalanceResponse:
-        try:
-            emp_result = db.execute(text("SELECT annual_leaves FROM employees WHERE employee_id = :emp_id"), {"emp_id": manager_id}).fetchone()
-            total_leaves = int(emp_result[0]) if emp_result and emp_result[0] is not None else 31
-        except Exception as e:
-            db.rollback()
-            total_leaves = 31
-        
+        balance = LeaveBalanceService.get_balance(db, manager_id)
+        total_leaves = int(balance.annual_leaves) if balance and balance.annual_leaves is not None else 31
         each_leave = total_leaves // 3
         
-        # Calculate used leaves by type
-        casual_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'casual'"), {"emp_id": manager_id}).fetchone()[0] or 0
-        sick_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'sick'"), {"emp_id": manager_id}).fetchone()[0] or 0
-        earned_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'earned'"), {"emp_id": manager_id}).fetchone()[0] or 0
+        casual_used = balance.used_casual if balance else 0
+        sick_used = balance.used_sick if balance else 0
+        earned_used = balance.used_earned if balance else 0
         total_used = casual_used + sick_used + earned_used
         
         return ManagerBalanceResponse(
@@ -178,24 +205,26 @@ class ManagerService:
 
     @staticmethod
     def approve_leave(db: Session, leave_id: str, hr_executive_id: str, action: str, comments: Optional[str] = None) -> Optional[ManagerLeaveResponse]:
-        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).first()
+        # Row lock: a concurrent approval of the same request waits and then sees the new status
+        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).with_for_update().first()
         if not leave:
             return None
+        previous_status = leave.status
         leave.status = "APPROVED" if action.lower() == "approve" else "REJECTED"
+        LeaveBalanceService.record_status_change(db, leave.employee_id, leave.leave_type, leave.start_date, previous_status, leave.status, LeaveBalanceService.leave_days(db, leave))
         db.commit()
+        DashboardService.invalidate(leave.employee_id)
         db.refresh(leave)
         return ManagerLeaveResponse(leave_id=leave.leave_id, manager_id=leave.employee_id, leave_type=leave.leave_type, start_date=leave.start_date, end_date=leave.end_date, reason=leave.reason, status=leave.status, approved_by=hr_executive_id, comments=comments)
 
     @staticmethod
-    def get_pending_approvals(db: Session, hr_executive_id: str) -> List[ManagerLeaveResponse]:
-        leaves = db.execute(text("""
-            SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
-                   CONCAT(e.first_name, ' ', e.last_name) as manager_name
-            FROM leave_management l 
-            JOIN employees e ON l.employee_id = e.employee_id 
-            WHERE UPPER(e.designation) LIKE '%MANAGER%' AND UPPER(e.designation) NOT LIKE '%HR MANAGER%'
-            ORDER BY l.leave_id DESC
-        """)).fetchall()
+    def get_pending_approvals(db: Session, hr_executive_id: str, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                              status: Optional[str] = None, from_date: Optional[date] = None,
+                              to_date: Optional[date] = None) -> List[ManagerLeaveResponse]:
+        leaves = fetch_leave_page(db, [
+            "UPPER(e.designation) LIKE '%MANAGER%'",
+            "UPPER(e.designation) NOT LIKE '%HR MANAGER%'"
+        ], {}, after, limit, status, from_date, to_date)
         
         return [ManagerLeaveResponse(
             leave_id=l[0], 
@@ -215,8 +244,11 @@ class HRExecutiveService:
     @staticmethod
     def create_leave(db: Session, leave: HRExecutiveLeaveCreate) -> HRExecutiveLeaveResponse:
         db_leave = Leave(employee_id=leave.hr_executive_id, leave_type=leave.leave_type, start_date=leave.start_date, end_date=leave.end_date, reason=leave.reason, status="PENDING")
+        days = LeaveBalanceService.leave_days(db, db_leave)
         db.add(db_leave)
+        LeaveBalanceService.record_status_change(db, db_leave.employee_id, db_leave.leave_type, db_leave.start_date, None, db_leave.status, days)
         db.commit()
+        DashboardService.invalidate(db_leave.employee_id)
         db.refresh(db_leave)
         return HRExecutiveLeaveResponse(leave_id=db_leave.leave_id, hr_executive_id=db_leave.employee_id, leave_type=db_leave.leave_type, start_date=db_leave.start_date, end_date=db_leave.end_date, reason=db_leave.reason, status=db_leave.status, approved_by=None, comments=None)
 
@@ -246,19 +278,13 @@ class HRExecutiveService:
 
     @staticmethod
     def get_leave_balance(db: Session, hr_executive_id: str) -> HRExecutiveBalanceResponse:
-        try:
-            emp_result = db.execute(text("SELECT annual_leaves FROM employees WHERE employee_id = :emp_id"), {"emp_id": hr_executive_id}).fetchone()
-            total_leaves = int(emp_result[0]) if emp_result and emp_result[0] is not None else 47
-        except Exception as e:
-            db.rollback()
-            total_leaves = 47
-        
+        balance = LeaveBalanceService.get_balance(db, hr_executive_id)
+        total_leaves = int(balance.annual_leaves) if balance and balance.annual_leaves is not None else 47
         each_leave = total_leaves // 3
         
-        # Calculate used leaves by type
-        casual_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'casual'"), {"emp_id": hr_executive_id}).fetchone()[0] or 0
-        sick_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'sick'"), {"emp_id": hr_executive_id}).fetchone()[0] or 0
-        earned_used = db.execute(text("SELECT COUNT(*) FROM leave_management WHERE employee_id = :emp_id AND status = 'APPROVED' AND LOWER(leave_type) = 'earned'"), {"emp_id": hr_executive_id}).fetchone()[0] or 0
+        casual_used = balance.used_casual if balance else 0
+        sick_used = balance.used_sick if balance else 0
+        earned_used = balance.used_earned if balance else 0
         total_used = casual_used + sick_used + earned_used
         
         return HRExecutiveBalanceResponse(
@@ -278,24 +304,23 @@ class HRExecutiveService:
 
     @staticmethod
     def approve_leave(db: Session, leave_id: str, hr_manager_id: str, action: str, comments: Optional[str] = None) -> Optional[HRExecutiveLeaveResponse]:
-        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).first()
+        # Row lock: a concurrent approval of the same request waits and then sees the new status
+        leave = db.query(Leave).filter(Leave.leave_id == int(leave_id)).with_for_update().first()
         if not leave:
             return None
+        previous_status = leave.status
         leave.status = "APPROVED" if action.lower() == "approve" else "REJECTED"
+        LeaveBalanceService.record_status_change(db, leave.employee_id, leave.leave_type, leave.start_date, previous_status, leave.status, LeaveBalanceService.leave_days(db, leave))
         db.commit()
+        DashboardService.invalidate(leave.employee_id)
         db.refresh(leave)
         return HRExecutiveLeaveResponse(leave_id=leave.leave_id, hr_executive_id=leave.employee_id, leave_type=leave.leave_type, start_date=leave.start_date, end_date=leave.end_date, reason=leave.reason, status=leave.status, approved_by=hr_manager_id, comments=comments)
 
     @staticmethod
-    def get_pending_approvals(db: Session, hr_manager_id: str) -> List[HRExecutiveLeaveResponse]:
-        leaves = db.execute(text("""
-            SELECT l.leave_id, l.employee_id, l.leave_type, l.start_date, l.end_date, l.reason, l.status,
-                   CONCAT(e.first_name, ' ', e.last_name) as hr_executive_name
-            FROM leave_management l 
-            JOIN employees e ON l.employee_id = e.employee_id 
-            WHERE UPPER(e.designation) = 'HR EXECUTIVE'
-            ORDER BY l.leave_id DESC
-        """)).fetchall()
+    def get_pending_approvals(db: Session, hr_manager_id: str, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                              status: Optional[str] = None, from_date: Optional[date] = None,
+                              to_date: Optional[date] = None) -> List[HRExecutiveLeaveResponse]:
+        leaves = fetch_leave_page(db, ["UPPER(e.designation) = 'HR EXECUTIVE'"], {}, after, limit, status, from_date, to_date)
         
         return [HRExecutiveLeaveResponse(
             leave_id=l[0], 
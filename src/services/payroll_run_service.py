@@ -0,0 +1,214 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from models.salary import PayrollSetup
+from services.salary_service import SalaryService
+from services.compensation_service import CompensationService
+from typing import Callable, Dict, List, NamedTuple, Optional
+from datetime import date
+from decimal import Decimal
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Each employee with the CTC in effect at the end of the pay period
+EMPLOYEES_SQL = text("""
+    SELECT e.employee_id, e.designation, e.annual_ctc, c.annual_ctc AS compensation_ctc
+    FROM employees e
+    LEFT JOIN LATERAL (
+        SELECT annual_ctc
+        FROM employee_compensation
+        WHERE employee_id = e.employee_id AND effective_from <= :as_of
+        ORDER BY effective_from DESC
+        LIMIT 1
+    ) c ON true
+    ORDER BY e.employee_id
+""")
+
+# The month's payroll rows, however the month was spelled; the unique indexes allow one per employee
+MONTH_ROWS_SQL = text("""
+    SELECT payroll_id, employee_id, provident_fund_percentage, salary_components
+    FROM payroll_setup
+    WHERE month = :month OR pay_period = :pay_period
+""")
+
+# Each employee's structure from the latest earlier pay period, to carry forward; pay order,
+# not insertion order, and never a later month, so a backfilled month gets what preceded it.
+# Rows without a pay_period cannot be ordered and count as earlier unless they are this month.
+LATEST_PRIOR_SQL = text("""
+    SELECT employee_id, provident_fund_percentage, salary_components
+    FROM (
+        SELECT employee_id, provident_fund_percentage, salary_components,
+               ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY pay_period DESC NULLS LAST, payroll_id DESC) AS position
+        FROM payroll_setup
+        WHERE pay_period < :pay_period OR (pay_period IS NULL AND month <> :month)
+    ) latest
+    WHERE position = 1
+""")
+
+
+class PayrollRunResult(NamedTuple):
+    month: str
+    pay_cycle: str
+    employees: int
+    created: int
+    updated: int
+    skipped: List[str]
+    total_net_salary: float
+    seconds: float
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+class PayrollRunService:
+    """Computes payroll_setup for every employee for one pay month.
+
+    Employees and existing structures are read with three queries, components
+    are computed in one pass using SalaryService's rates, and rows are written
+    with bulk UPDATE and INSERT ... ON CONFLICT batches in a single transaction.
+    """
+
+    @staticmethod
+    def latest_prior(db: Session, month: str, pay_period: Optional[date]) -> Dict[str, object]:
+        """Each employee's payroll row from the latest pay period before this one, by employee_id"""
+        rows = db.execute(LATEST_PRIOR_SQL, {"month": month, "pay_period": pay_period}).fetchall()
+        return {row.employee_id: row for row in rows}
+
+    @staticmethod
+    def run(db: Session, month: str, pay_cycle: str = "Monthly", employee_ids: Optional[List[str]] = None,
+            batch_size: int = DEFAULT_BATCH_SIZE, progress: Optional[Callable[[int, int], None]] = None) -> PayrollRunResult:
+        """Create or refresh the month's payroll for all employees (or the given ones); commits once"""
+        started = time.perf_counter()
+        wanted = set(employee_ids) if employee_ids else None
+        pay_period = CompensationService.parse_pay_period(month)
+        as_of = CompensationService.period_end(pay_period) if pay_period else date.today()
+        employees = [row for row in db.execute(EMPLOYEES_SQL, {"as_of": as_of}).fetchall() if wanted is None or row.employee_id in wanted]
+
+        current: Dict[str, object] = {row.employee_id: row for row in db.execute(MONTH_ROWS_SQL, {"month": month, "pay_period": pay_period}).fetchall()}
+        prior = PayrollRunService.latest_prior(db, month, pay_period)
+
+        divisor = SalaryService.pay_cycle_divisor(pay_cycle)
+        inserts, updates, skipped = [], [], []
+        total_net = Decimal('0')
+        for employee in employees:
+            if employee.compensation_ctc is not None:
+                annual_ctc = Decimal(str(employee.compensation_ctc))
+            else:
+                annual_ctc = SalaryService.parse_annual_ctc(employee.annual_ctc)
+            if annual_ctc is None or annual_ctc <= 0:
+                skipped.append(employee.employee_id)
+                continue
+            existing = current.get(employee.employee_id)
+            source = existing or prior.get(employee.employee_id)
+            values = PayrollRunService.compute(employee, annual_ctc, divisor, pay_cycle, source)
+            values["pay_period"] = pay_period
+            total_net += values["net_salary"]
+            if existing:
+                updates.append(dict(values, payroll_id=existing.payroll_id))
+            else:
+                inserts.append(dict(
+                    values,
+                    employee_id=employee.employee_id,
+                    month=month,
+                    organization_name=SalaryService.ORGANIZATION_NAME,
+                    basic_salary_type="Fixed",
+                    hra_type="Percentage",
+                    allowance_type="Fixed",
+                    provident_fund_type="Percentage",
+                    professional_tax_type="Fixed"
+                ))
+
+        try:
+            total = len(updates) + len(inserts)
+            done = 0
+            for rows, statement in ((updates, update(PayrollSetup)), (inserts, PayrollRunService._insert_statement(pay_period))):
+                for offset in range(0, len(rows), batch_size):
+                    batch = rows[offset:offset + batch_size]
+                    db.execute(statement, batch)
+                    done += len(batch)
+                    if progress:
+                        progress(done, total)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        SalaryService.invalidate()
+
+        result = PayrollRunResult(
+            month=month,
+            pay_cycle=pay_cycle,
+            employees=len(employees),
+            created=len(inserts),
+            updated=len(updates),
+            skipped=skipped,
+            total_net_salary=float(round(total_net, 2)),
+            seconds=round(time.perf_counter() - started, 3)
+        )
+        logger.info(f"Payroll run {month}: {len(inserts)} created, {len(updates)} updated, {len(skipped)} skipped in {result.seconds}s")
+        return result
+
+    @staticmethod
+    def _insert_statement(pay_period):
+        """Bulk insert that updates a row an HR user created for the same pay period since it was read"""
+        statement = pg_insert(PayrollSetup)
+        columns = ["designation", "pay_cycle", "basic_salary", "hra", "allowance", "provident_fund_percentage",
+                   "professional_tax", "total_earnings", "total_deductions", "net_salary", "salary_components", "pay_period"]
+        assignments = {column: statement.excluded[column] for column in columns}
+        assignments["updated_at"] = func.now()
+        return statement.on_conflict_do_update(set_=assignments, **SalaryService.conflict_target(pay_period))
+    
+    @staticmethod
+    def compute(employee, annual_ctc: Decimal, divisor: int, pay_cycle: str, source=None) -> dict:
+        """Column values for one employee; additional components and PF % carry over from `source`"""
+        pf_percentage = Decimal(str(source.provident_fund_percentage)) if source is not None and source.provident_fund_percentage is not None else SalaryService.PF_PERCENTAGE
+        base = SalaryService.compute_base_structure(annual_ctc, divisor, pf_percentage)
+        components = PayrollRunService._components(source.salary_components if source is not None else None)
+
+        extra_earnings, earnings = PayrollRunService._recompute(components.get("earnings", []), annual_ctc, divisor)
+        extra_deductions, deductions = PayrollRunService._recompute(components.get("deductions", []), annual_ctc, divisor)
+
+        total_earnings = base["basic_salary"] + base["hra"] + base["allowance"] + extra_earnings
+        total_deductions = base["provident_fund"] + base["professional_tax"] + extra_deductions
+        return {
+            "designation": employee.designation,
+            "pay_cycle": pay_cycle,
+            "basic_salary": base["basic_salary"],
+            "hra": base["hra"],
+            "allowance": base["allowance"],
+            "provident_fund_percentage": pf_percentage,
+            "professional_tax": base["professional_tax"],
+            "total_earnings": total_earnings,
+            "total_deductions": total_deductions,
+            "net_salary": total_earnings - total_deductions,
+            "salary_components": {"earnings": earnings, "deductions": deductions}
+        }
+
+    @staticmethod
+    def _components(raw) -> dict:
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                return {}
+        return raw if isinstance(raw, dict) else {}
+
+    @staticmethod
+    def _recompute(items: list, annual_ctc: Decimal, divisor: int):
+        """Re-derive percentage components from the new CTC; fixed amounts are kept"""
+        total = Decimal('0')
+        recomputed = []
+        for item in items:
+            item = dict(item)
+            if "original_percentage" in item:
+                amount = annual_ctc * Decimal(str(item["original_percentage"])) / 100 / divisor
+                item["amount"] = float(amount)
+            else:
+                amount = Decimal(str(item.get("amount", 0)))
+            total += amount
+            recomputed.append(item)
+        return total, recomputed
@@ -0,0 +1,171 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from services.salary_service import SalaryService
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Every employee with the CTC in effect on :as_of and the PF % of their latest payroll row
+WORKFORCE_SQL = text("""
+    SELECT e.employee_id, e.department_id, d.department_name, e.annual_ctc AS legacy_ctc,
+           c.annual_ctc AS compensation_ctc, p.provident_fund_percentage
+    FROM employees e
+    LEFT JOIN departments d ON d.department_id = e.department_id
+    LEFT JOIN LATERAL (
+        SELECT annual_ctc
+        FROM employee_compensation
+        WHERE employee_id = e.employee_id AND effective_from <= :as_of
+        ORDER BY effective_from DESC
+        LIMIT 1
+    ) c ON true
+    LEFT JOIN LATERAL (
+        SELECT provident_fund_percentage
+        FROM payroll_setup
+        WHERE employee_id = e.employee_id
+        ORDER BY pay_period DESC NULLS LAST, payroll_id DESC
+        LIMIT 1
+    ) p ON true
+""")
+
+
+class Rates(NamedTuple):
+    """Base-structure rules: shares of annual CTC, PF % (None keeps each employee's own) and annual PT"""
+    basic_rate: float
+    hra_rate: float
+    allowance_rate: float
+    pf_percentage: Optional[float]
+    annual_professional_tax: float
+
+    @classmethod
+    def current(cls) -> "Rates":
+        return cls(float(SalaryService.BASIC_RATE), float(SalaryService.HRA_RATE), float(SalaryService.ALLOWANCE_RATE),
+                   None, float(SalaryService.ANNUAL_PROFESSIONAL_TAX))
+
+
+class _Totals:
+    """Running sums for one department; the base structure is linear in CTC, so these are enough"""
+    __slots__ = ("department_id", "department_name", "employees", "ctc", "ctc_pf")
+
+    def __init__(self, department_id, department_name):
+        self.department_id = department_id
+        self.department_name = department_name or "Unassigned"
+        self.employees = 0
+        self.ctc = 0.0     # sum of annual CTC
+        self.ctc_pf = 0.0  # sum of annual CTC x the employee's own PF %
+
+    def add(self, other: "_Totals") -> None:
+        self.employees += other.employees
+        self.ctc += other.ctc
+        self.ctc_pf += other.ctc_pf
+
+    def cost(self, rates: Rates, divisor: int) -> dict:
+        earnings = self.ctc * (rates.basic_rate + rates.hra_rate + rates.allowance_rate) / divisor
+        pf_sum = self.ctc * rates.pf_percentage if rates.pf_percentage is not None else self.ctc_pf
+        deductions = pf_sum / 100 / divisor + self.employees * rates.annual_professional_tax / divisor
+        return {"total_earnings": earnings, "total_deductions": deductions, "net_salary": earnings - deductions}
+
+    def compare(self, baseline: Rates, scenario: Rates, divisor: int) -> dict:
+        before, after = self.cost(baseline, divisor), self.cost(scenario, divisor)
+        return {
+            "department_id": self.department_id,
+            "department_name": self.department_name,
+            "employees": self.employees,
+            "baseline": {key: round(value, 2) for key, value in before.items()},
+            "scenario": {key: round(value, 2) for key, value in after.items()},
+            "delta": {key: round(after[key] - before[key], 2) for key in before}
+        }
+
+
+class SimulationResult(NamedTuple):
+    as_of: date
+    pay_cycle: str
+    scenario: dict
+    employees: int
+    skipped: int
+    organization: dict
+    departments: List[dict]
+    seconds: float
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+class PayrollSimulationService:
+    """What-if payroll cost under different base-structure rates, without writing anything.
+
+    The workforce is read with one query and reduced to a few sums per
+    department. Basic, HRA, allowance and PF are proportional to CTC and
+    professional tax is per head, so baseline and scenario totals follow
+    from those sums exactly, whatever the headcount. Additional earnings and
+    deductions do not depend on these rates and are left out of both.
+    """
+
+    @staticmethod
+    def simulate(db: Session, basic_rate: Optional[float] = None, hra_rate: Optional[float] = None,
+                 allowance_rate: Optional[float] = None, pf_percentage: Optional[float] = None,
+                 annual_professional_tax: Optional[float] = None, pay_cycle: str = "Monthly",
+                 as_of: Optional[date] = None) -> SimulationResult:
+        """Per-department and organisation cost per pay period, current rules vs. the given overrides.
+
+        Rates are percentages of annual CTC (e.g. hra_rate=25); omitted ones keep today's rule.
+        """
+        started = time.perf_counter()
+        as_of = as_of or date.today()
+        baseline = Rates.current()
+        scenario = Rates(
+            basic_rate / 100 if basic_rate is not None else baseline.basic_rate,
+            hra_rate / 100 if hra_rate is not None else baseline.hra_rate,
+            allowance_rate / 100 if allowance_rate is not None else baseline.allowance_rate,
+            pf_percentage,
+            annual_professional_tax if annual_professional_tax is not None else baseline.annual_professional_tax
+        )
+        default_pf = float(SalaryService.PF_PERCENTAGE)
+
+        departments: Dict[object, _Totals] = {}
+        skipped = 0
+        for row in db.execute(WORKFORCE_SQL, {"as_of": as_of}).fetchall():
+            if row.compensation_ctc is not None:
+                ctc = float(row.compensation_ctc)
+            else:
+                legacy = SalaryService.parse_annual_ctc(row.legacy_ctc)
+                ctc = float(legacy) if legacy is not None else 0.0
+            if ctc <= 0:
+                skipped += 1
+                continue
+            totals = departments.get(row.department_id)
+            if totals is None:
+                totals = departments[row.department_id] = _Totals(row.department_id, row.department_name)
+            totals.employees += 1
+            totals.ctc += ctc
+            totals.ctc_pf += ctc * (float(row.provident_fund_percentage) if row.provident_fund_percentage is not None else default_pf)
+
+        divisor = SalaryService.pay_cycle_divisor(pay_cycle)
+        organization = _Totals(None, "Organization")
+        for totals in departments.values():
+            organization.add(totals)
+        # Departments most affected first
+        department_rows = sorted((totals.compare(baseline, scenario, divisor) for totals in departments.values()),
+                                 key=lambda item: abs(item["delta"]["net_salary"]), reverse=True)
+        org = organization.compare(baseline, scenario, divisor)
+
+        result = SimulationResult(
+            as_of=as_of,
+            pay_cycle=pay_cycle,
+            scenario={
+                "basic_rate": round(scenario.basic_rate * 100, 4),
+                "hra_rate": round(scenario.hra_rate * 100, 4),
+                "allowance_rate": round(scenario.allowance_rate * 100, 4),
+                "pf_percentage": scenario.pf_percentage,
+                "annual_professional_tax": scenario.annual_professional_tax
+            },
+            employees=organization.employees,
+            skipped=skipped,
+            organization={"baseline": org["baseline"], "scenario": org["scenario"], "delta": org["delta"]},
+            departments=department_rows,
+            seconds=round(time.perf_counter() - started, 3)
+        )
+        logger.info(f"Payroll simulation over {result.employees} employees in {result.seconds}s")
+        return result
@@ -0,0 +1,139 @@
+# Minimal, dependency-free payslip PDF writer. Output is deterministic for the
+# same input, so files can be addressed by a hash of their inputs. Functions
+# here run in worker processes and take only plain, picklable data.
+import os
+from typing import List, Tuple
+
+# Bump when the layout changes so every cached payslip is re-rendered
+RENDER_VERSION = "1"
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+LEFT, RIGHT = 50, 545
+
+
+def _escape(value) -> str:
+    text = str(value if value is not None else "")
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _money(value) -> str:
+    return f"{float(value or 0):,.2f}"
+
+
+def _text(ops: List[str], x: float, y: float, value, size: int = 10, bold: bool = False) -> None:
+    ops.append(f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.1f} {y:.1f} Td ({_escape(value)}) Tj ET")
+
+
+def _right(ops: List[str], x: float, y: float, value, size: int = 10, bold: bool = False) -> None:
+    # Helvetica digits are 0.556 em wide; good enough to right-align amounts
+    width = len(str(value)) * size * 0.556
+    _text(ops, x - width, y, value, size, bold)
+
+
+def _rule(ops: List[str], y: float) -> None:
+    ops.append(f"0.5 w {LEFT} {y:.1f} m {RIGHT} {y:.1f} l S")
+
+
+def _rows(payslip: dict) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    details = payslip["payslip_details"]
+    earnings = [
+        ("Basic Salary", _money(details["basic_salary"])),
+        ("HRA", _money(details["hra"])),
+        ("Allowance", _money(details["allowance"])),
+    ]
+    earnings += [(item.get("component_name", ""), _money(item.get("amount"))) for item in details["salary_components"].get("earnings", [])]
+    deductions = [
+        (f"Provident Fund ({details['provident_fund_percentage']:g}%)", _money(details["provident_fund"])),
+        ("Professional Tax", _money(details["professional_tax"])),
+    ]
+    deductions += [(item.get("component_name", ""), _money(item.get("amount"))) for item in details["salary_components"].get("deductions", [])]
+    return earnings, deductions
+
+
+def render_payslip(payslip: dict) -> bytes:
+    """Render the payslip dict built by PayslipService.payslip_data as PDF bytes"""
+    employee = payslip["employee_info"]
+    details = payslip["payslip_details"]
+    ops: List[str] = []
+
+    y = PAGE_HEIGHT - 60
+    _text(ops, LEFT, y, details["organization_name"] or "Payslip", 16, bold=True)
+    y -= 22
+    _text(ops, LEFT, y, f"Payslip for {details['month']} ({details['pay_cycle']})", 12)
+    y -= 14
+    _rule(ops, y)
+
+    y -= 20
+    for label, value in (
+        ("Employee ID", employee["employee_id"]),
+        ("Name", employee["name"]),
+        ("Designation", employee["designation"]),
+        ("Email", employee["email"]),
+    ):
+        _text(ops, LEFT, y, label, bold=True)
+        _text(ops, LEFT + 110, y, value)
+        y -= 15
+
+    earnings, deductions = _rows(payslip)
+    y -= 10
+    _rule(ops, y)
+    y -= 18
+    _text(ops, LEFT, y, "Earnings", 11, bold=True)
+    _right(ops, 290, y, "Amount", 11, bold=True)
+    _text(ops, 310, y, "Deductions", 11, bold=True)
+    _right(ops, RIGHT, y, "Amount", 11, bold=True)
+    y -= 16
+    for index in range(max(len(earnings), len(deductions))):
+        if index < len(earnings):
+            _text(ops, LEFT, y, earnings[index][0])
+            _right(ops, 290, y, earnings[index][1])
+        if index < len(deductions):
+            _text(ops, 310, y, deductions[index][0])
+            _right(ops, RIGHT, y, deductions[index][1])
+        y -= 14
+
+    y -= 4
+    _rule(ops, y)
+    y -= 16
+    _text(ops, LEFT, y, "Total Earnings", bold=True)
+    _right(ops, 290, y, _money(details["total_earnings"]), bold=True)
+    _text(ops, 310, y, "Total Deductions", bold=True)
+    _right(ops, RIGHT, y, _money(details["total_deductions"]), bold=True)
+    y -= 26
+    _text(ops, LEFT, y, "Net Salary", 13, bold=True)
+    _right(ops, RIGHT, y, _money(details["net_salary"]), 13, bold=True)
+
+    content = "\n".join(ops).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+         f"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>").encode("latin-1"),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+
+def render_to_file(job: Tuple[str, dict]) -> str:
+    """Process-pool entry point: render one payslip to `path` atomically; returns the path"""
+    path, payslip = job
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(render_payslip(payslip))
+    os.replace(temp_path, path)
+    return path
@@ -0,0 +1,229 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from concurrent.futures import ProcessPoolExecutor
+from config.settings import settings
+from services.payslip_renderer import RENDER_VERSION, render_payslip, render_to_file
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+PAYSLIP_ROWS_SQL = """
+    SELECT p.payroll_id, p.employee_id, p.month, p.pay_cycle, p.organization_name, p.basic_salary, p.hra,
+           p.allowance, p.provident_fund_percentage, p.professional_tax, p.total_earnings, p.total_deductions,
+           p.net_salary, p.salary_components, p.pdf_path, p.updated_at,
+           e.first_name, e.last_name, e.email_id, e.designation
+    FROM payroll_setup p
+    JOIN employees e ON e.employee_id = p.employee_id
+    WHERE {filters}
+    ORDER BY p.employee_id, p.payroll_id DESC
+"""
+
+SET_PDF_PATH_SQL = text("UPDATE payroll_setup SET pdf_path = :pdf_path WHERE payroll_id = :payroll_id")
+
+
+class PayslipRunResult(NamedTuple):
+    month: str
+    payslips: int
+    rendered: int
+    cached: int
+    seconds: float
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+class PayslipService:
+    """Renders payslip PDFs into a content-addressed directory.
+
+    A payslip's file name is a hash of everything printed on it plus the
+    payroll row's updated_at, so a file is only rendered again after the row
+    changes. Whole months render in a process pool; pdf_path records the file.
+    """
+
+    @staticmethod
+    def payslip_data(row) -> dict:
+        """Plain (picklable, JSON-safe) payslip content for one payroll row"""
+        components = row.salary_components
+        if isinstance(components, str):
+            try:
+                components = json.loads(components)
+            except ValueError:
+                components = None
+        components = components if isinstance(components, dict) else {}
+        earnings = components.get("earnings", [])
+        deductions = components.get("deductions", [])
+        professional_tax = float(row.professional_tax or 0)
+        total_deductions = float(row.total_deductions or 0)
+        extra_deductions = sum(float(item.get("amount") or 0) for item in deductions)
+        return {
+            "employee_info": {
+                "employee_id": row.employee_id,
+                "name": f"{row.first_name or ''} {row.last_name or ''}".strip(),
+                "email": row.email_id or "",
+                "designation": row.designation or "",
+            },
+            "payslip_details": {
+                "month": row.month or "",
+                "pay_cycle": row.pay_cycle or "Monthly",
+                "organization_name": row.organization_name or "",
+                "basic_salary": float(row.basic_salary or 0),
+                "hra": float(row.hra or 0),
+                "allowance": float(row.allowance or 0),
+                "provident_fund_percentage": float(row.provident_fund_percentage or 0),
+                # Stored rows keep the PF percentage, not the amount; it is what the other deductions leave
+                "provident_fund": round(total_deductions - professional_tax - extra_deductions, 2),
+                "professional_tax": professional_tax,
+                "total_earnings": float(row.total_earnings or 0),
+                "total_deductions": total_deductions,
+                "net_salary": float(row.net_salary or 0),
+                "salary_components": {"earnings": earnings, "deductions": deductions},
+            },
+        }
+
+    @staticmethod
+    def pdf_path_for(row, payslip: dict) -> str:
+        digest = hashlib.sha256(json.dumps({
+            "payslip": payslip,
+            "updated_at": str(row.updated_at),
+            "renderer": RENDER_VERSION,
+        }, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return os.path.join(settings.payslip_dir, digest[:2], f"{digest}.pdf")
+
+    @staticmethod
+    def generate_month(db: Session, month: str, workers: Optional[int] = None, force: bool = False,
+                       progress: Optional[Callable[[int, int], None]] = None) -> PayslipRunResult:
+        """Render every stale payslip of a pay month in parallel and record the paths; commits"""
+        started = time.perf_counter()
+        rows = PayslipService._rows(db, "p.month = :month", {"month": month})
+        jobs, updates, cached = PayslipService._plan(rows, force)
+
+        workers = workers or settings.payslip_workers or os.cpu_count() or 1
+        done = 0
+        if jobs:
+            if workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    for _ in pool.map(render_to_file, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+                        done += 1
+                        if progress and (done % 100 == 0 or done == len(jobs)):
+                            progress(done, len(jobs))
+            else:
+                for job in jobs:
+                    render_to_file(job)
+                    done += 1
+                    if progress and (done % 100 == 0 or done == len(jobs)):
+                        progress(done, len(jobs))
+        if updates:
+            # Plain UPDATE so the ORM's onupdate does not bump updated_at and invalidate the file
+            db.execute(SET_PDF_PATH_SQL, updates)
+            db.commit()
+
+        result = PayslipRunResult(month, len(rows), len(jobs), cached, round(time.perf_counter() - started, 3))
+        logger.info(f"Payslips for {month}: {result.rendered} rendered, {result.cached} cached in {result.seconds}s")
+        return result
+
+    @staticmethod
+    def generation_lock(month: str) -> str:
+        """Lock file marking a month's generate_month run in progress; it holds the run's pid"""
+        return os.path.join(settings.payslip_dir, "locks", re.sub(r"[^A-Za-z0-9_-]", "_", month) + ".lock")
+
+    @staticmethod
+    def claim_generation(month: str) -> str:
+        """Take the month's run lock, or raise 409 while another run is alive; returns the lock path"""
+        path = PayslipService.generation_lock(month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if PayslipService._lock_holder_alive(path):
+                    break
+                # Left behind by a worker that died during a run
+                PayslipService.release_generation(path)
+                continue
+            with os.fdopen(fd, "w") as lock:
+                lock.write(str(os.getpid()))
+            return path
+        raise HTTPException(status_code=409, detail=f"Payslips for {month} are already being generated")
+
+    @staticmethod
+    def record_generation_pid(path: str, pid: int) -> None:
+        with open(path, "w") as lock:
+            lock.write(str(pid))
+
+    @staticmethod
+    def release_generation(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _lock_holder_alive(path: str) -> bool:
+        try:
+            with open(path) as lock:
+                content = lock.read().strip()
+        except FileNotFoundError:
+            return False
+        if not content:
+            # Claimed a moment ago; the pid is written right after
+            return True
+        try:
+            os.kill(int(content), 0)
+        except (ValueError, ProcessLookupError):
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def get_pdf(db: Session, employee_id: str, month: Optional[str] = None) -> Tuple[Optional[str], Optional[bytes]]:
+        """An employee's payslip PDF (latest row, or the given month) as (path, None) when the cached file
+        is current, else (None, content) rendered in memory.
+        
+        Writes neither files nor rows; generate_month fills the cache.
+        """
+        filters, params = "p.employee_id = :emp_id", {"emp_id": employee_id}
+        if month:
+            filters += " AND p.month = :month"
+            params["month"] = month
+        rows = PayslipService._rows(db, filters, params)
+        if not rows:
+            raise HTTPException(status_code=404, detail="Payslip not found for the specified employee/month")
+        payslip = PayslipService.payslip_data(rows[0])
+        path = PayslipService.pdf_path_for(rows[0], payslip)
+        if os.path.exists(path):
+            return path, None
+        return None, render_payslip(payslip)
+
+    @staticmethod
+    def _rows(db: Session, filters: str, params: dict) -> list:
+        rows = db.execute(text(PAYSLIP_ROWS_SQL.format(filters=filters)), params).fetchall()
+        # One payslip per employee and month: the newest row wins
+        seen, unique = set(), []
+        for row in rows:
+            if (row.employee_id, row.month) not in seen:
+                seen.add((row.employee_id, row.month))
+                unique.append(row)
+        return unique
+
+    @staticmethod
+    def _plan(rows: list, force: bool) -> Tuple[List[Tuple[str, dict]], List[dict], int]:
+        """Split rows into render jobs and cache hits; returns (jobs, pdf_path updates, cached count)"""
+        jobs, updates, cached = [], [], 0
+        for row in rows:
+            payslip = PayslipService.payslip_data(row)
+            path = PayslipService.pdf_path_for(row, payslip)
+            if force or not os.path.exists(path):
+                jobs.append((path, payslip))
+            else:
+                cached += 1
+            if row.pdf_path != path:
+                updates.append({"pdf_path": path, "payroll_id": row.payroll_id})
+        return jobs, updates, cached
@@ -0,0 +1,262 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+import csv
+import io
+import json
+import logging
+
+from .attendance_rollup_service import AttendanceRollupService
+from .dashboard_service import DashboardService
+
+logger = logging.getLogger(__name__)
+
+# Repeated reads of the same badge within this window are one event
+DEFAULT_DEDUPE_SECONDS = 60
+
+IN_DIRECTIONS = {"in", "i", "0", "entry", "check-in", "checkin", "punch-in"}
+OUT_DIRECTIONS = {"out", "o", "1", "exit", "check-out", "checkout", "punch-out"}
+
+EMPLOYEE_SHIFTS_SQL = text("""
+    SELECT e.employee_id, s.start_time
+    FROM employees e
+    LEFT JOIN shift_master s ON s.shift_id = e.shift_id
+""")
+
+ACTIVE_POLICY_SQL = text("""
+    SELECT id, mark_late_after_minutes, half_day_hours
+    FROM policy_master
+    WHERE is_active = true
+    ORDER BY updated_at DESC
+    LIMIT 1
+""")
+
+STAGING_SQL = text("""
+    CREATE TEMP TABLE attendance_punch_staging (
+        employee_id VARCHAR(50) NOT NULL,
+        attendance_date DATE NOT NULL,
+        punch_in TIME,
+        punch_out TIME,
+        work_hours NUMERIC(5,2),
+        status VARCHAR(50),
+        policy_id UUID
+    ) ON COMMIT DROP
+""")
+
+COPY_SQL = "COPY attendance_punch_staging FROM STDIN WITH (FORMAT csv, NULL '')"
+
+# Widen the first existing row of each employee-day; later sessions of the day are left alone
+MERGE_UPDATE_SQL = text("""
+    UPDATE attendance a
+    SET punch_in = LEAST(a.punch_in, s.punch_in),
+        punch_out = GREATEST(a.punch_out, s.punch_out),
+        work_hours = CASE
+            WHEN GREATEST(a.punch_out, s.punch_out) IS NULL THEN a.work_hours
+            ELSE ROUND(CAST(EXTRACT(EPOCH FROM (GREATEST(a.punch_out, s.punch_out) - LEAST(a.punch_in, s.punch_in))) / 3600 AS NUMERIC), 2)
+        END,
+        status = CASE WHEN a.punch_in IS NULL OR s.punch_in < a.punch_in THEN s.status ELSE COALESCE(a.status, s.status) END,
+        updated_at = NOW()
+    FROM attendance_punch_staging s
+    JOIN (
+        SELECT employee_id, attendance_date, MIN(attendance_id) AS attendance_id
+        FROM attendance
+        WHERE attendance_date >= :start AND attendance_date <= :end
+        GROUP BY employee_id, attendance_date
+    ) first_row ON first_row.employee_id = s.employee_id AND first_row.attendance_date = s.attendance_date
+    WHERE a.attendance_id = first_row.attendance_id
+""")
+
+MERGE_INSERT_SQL = text("""
+    INSERT INTO attendance (employee_id, attendance_date, punch_in, punch_out, work_hours, status, policy_id, created_at, updated_at)
+    SELECT s.employee_id, s.attendance_date, s.punch_in, s.punch_out, s.work_hours, s.status, s.policy_id, NOW(), NOW()
+    FROM attendance_punch_staging s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM attendance a
+        WHERE a.employee_id = s.employee_id AND a.attendance_date = s.attendance_date
+    )
+""")
+
+
+class PunchEvent(NamedTuple):
+    employee_id: str
+    timestamp: datetime
+    direction: Optional[str]  # "in", "out" or None when the device does not say
+
+
+class DaySession(NamedTuple):
+    """One employee-day built from its events, ready to stage"""
+    employee_id: str
+    attendance_date: date
+    punch_in: time
+    punch_out: Optional[time]
+    work_hours: Optional[float]
+    status: str
+    policy_id: Optional[str]
+
+
+class IngestResult(NamedTuple):
+    events: int
+    rejected: int
+    duplicates: int
+    unknown_employees: int
+    sessions: int
+    inserted: int
+    updated: int
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+class PunchIngestService:
+    """Bulk load of device punch logs (CSV or NDJSON) into attendance.
+
+    Events are deduped and paired into one session per employee and day in
+    memory, with work hours and status, then copied into a temporary staging
+    table and merged into attendance with two set-based statements. Requires
+    PostgreSQL (COPY).
+    """
+
+    @staticmethod
+    def parse(stream: TextIO, fmt: str) -> Tuple[List[PunchEvent], int]:
+        """Read events from a csv (header: employee_id,timestamp[,direction]) or ndjson log; returns (events, rejected)"""
+        records = csv.DictReader(stream) if fmt == "csv" else PunchIngestService._ndjson_records(stream)
+        events, rejected = [], 0
+        for record in records:
+            event = PunchIngestService._to_event(record)
+            if event is None:
+                rejected += 1
+            else:
+                events.append(event)
+        return events, rejected
+
+    @staticmethod
+    def pair(events: Iterable[PunchEvent], dedupe_seconds: int = DEFAULT_DEDUPE_SECONDS) -> Tuple[Dict[Tuple[str, date], Tuple[datetime, Optional[datetime]]], int]:
+        """Collapse each employee-day to (first in, last out); returns (spans, duplicates dropped)"""
+        by_day: Dict[Tuple[str, date], List[PunchEvent]] = {}
+        for event in events:
+            by_day.setdefault((event.employee_id, event.timestamp.date()), []).append(event)
+
+        window = timedelta(seconds=dedupe_seconds)
+        spans, duplicates = {}, 0
+        for key, day_events in by_day.items():
+            day_events.sort(key=lambda event: event.timestamp)
+            kept = [day_events[0]]
+            for event in day_events[1:]:
+                last = kept[-1]
+                if event.timestamp - last.timestamp <= window and event.direction == last.direction:
+                    duplicates += 1
+                else:
+                    kept.append(event)
+
+            ins = [event.timestamp for event in kept if event.direction != "out"]
+            outs = [event.timestamp for event in kept if event.direction != "in"]
+            if not ins:
+                # Only exits were logged; nothing to open a session with
+                continue
+            punch_in = ins[0]
+            later_outs = [stamp for stamp in outs if stamp > punch_in]
+            spans[key] = (punch_in, later_outs[-1] if later_outs else None)
+        return spans, duplicates
+
+    @staticmethod
+    def build_sessions(db: Session, spans: Dict[Tuple[str, date], Tuple[datetime, Optional[datetime]]]) -> Tuple[List[DaySession], int]:
+        """Add work hours and status to each span; returns (sessions, spans for unknown employees)"""
+        shift_starts = {row.employee_id: row.start_time for row in db.execute(EMPLOYEE_SHIFTS_SQL).fetchall()}
+        policy = db.execute(ACTIVE_POLICY_SQL).fetchone()
+        late_after = timedelta(minutes=policy.mark_late_after_minutes) if policy else None
+        half_day_hours = policy.half_day_hours if policy else None
+        policy_id = str(policy.id) if policy else None
+
+        sessions, unknown = [], 0
+        for (employee_id, day), (punch_in, punch_out) in spans.items():
+            if employee_id not in shift_starts:
+                unknown += 1
+                continue
+            work_hours = round((punch_out - punch_in).total_seconds() / 3600, 2) if punch_out else None
+            status = "Present"
+            shift_start = shift_starts[employee_id]
+            if late_after is not None and shift_start is not None and punch_in > datetime.combine(day, shift_start) + late_after:
+                status = "Late"
+            if work_hours is not None and half_day_hours and work_hours < half_day_hours:
+                status = "Half Day"
+            sessions.append(DaySession(employee_id, day, punch_in.time(), punch_out.time() if punch_out else None,
+                                       work_hours, status, policy_id))
+        return sessions, unknown
+
+    @staticmethod
+    def ingest(db: Session, stream: TextIO, fmt: str, dedupe_seconds: int = DEFAULT_DEDUPE_SECONDS) -> IngestResult:
+        """Parse, pair, stage and merge a punch log, then refresh the attendance rollups; commits"""
+        events, rejected = PunchIngestService.parse(stream, fmt)
+        spans, duplicates = PunchIngestService.pair(events, dedupe_seconds)
+        sessions, unknown = PunchIngestService.build_sessions(db, spans)
+        inserted = updated = 0
+        if sessions:
+            start = min(session.attendance_date for session in sessions)
+            end = max(session.attendance_date for session in sessions)
+            db.execute(STAGING_SQL)
+            PunchIngestService._copy(db, sessions)
+            updated = db.execute(MERGE_UPDATE_SQL, {"start": start, "end": end}).rowcount
+            inserted = db.execute(MERGE_INSERT_SQL).rowcount
+            # Set-based refresh of the touched months; commits the merge with it
+            AttendanceRollupService.refresh(db, start, end)
+            for employee_id in {session.employee_id for session in sessions}:
+                DashboardService.invalidate(employee_id)
+
+        result = IngestResult(len(events) + rejected, rejected, duplicates, unknown, len(sessions), inserted, updated)
+        logger.info(f"Ingested punch log: {result.as_dict()}")
+        return result
+
+    @staticmethod
+    def _copy(db: Session, sessions: List[DaySession]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for session in sessions:
+            writer.writerow([
+                session.employee_id, session.attendance_date, session.punch_in,
+                "" if session.punch_out is None else session.punch_out,
+                "" if session.work_hours is None else session.work_hours,
+                session.status, session.policy_id or ""
+            ])
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(COPY_SQL, buffer)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _ndjson_records(stream: TextIO) -> Iterator[dict]:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else {}
+
+    @staticmethod
+    def _to_event(record: dict) -> Optional[PunchEvent]:
+        employee_id = str(record.get("employee_id") or "").strip()
+        raw_timestamp = str(record.get("timestamp") or "").strip()
+        if not employee_id or not raw_timestamp:
+            return None
+        try:
+            timestamp = datetime.fromisoformat(raw_timestamp)
+        except ValueError:
+            return None
+        if timestamp.tzinfo is not None:
+            # Attendance stores local wall-clock times
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        raw_direction = str(record.get("direction") or "").strip().lower()
+        if raw_direction in IN_DIRECTIONS:
+            direction = "in"
+        elif raw_direction in OUT_DIRECTIONS:
+            direction = "out"
+        elif raw_direction:
+            return None
+        else:
+            direction = None
+        return PunchEvent(employee_id, timestamp, direction)
@@ -0,0 +1,169 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from datetime import date, datetime, time, timedelta
+from typing import Optional, NamedTuple
+import json
+import logging
+
+from ..config.settings import settings
+from .attendance_rollup_service import AttendanceRollupService
+
+logger = logging.getLogger(__name__)
+
+# uq_attendance_open_session allows one open session per employee and day, so a
+# concurrent second punch-in inserts nothing instead of a duplicate row
+PUNCH_IN_SQL = text("""
+    INSERT INTO attendance (employee_id, attendance_date, punch_in, status, created_at, updated_at)
+    VALUES (:emp_id, :today, :punch_in, 'Present', NOW(), NOW())
+    ON CONFLICT (employee_id, attendance_date) WHERE punch_out IS NULL DO NOTHING
+    RETURNING attendance_id
+""")
+
+# Closes the employee's newest open session, even one opened before midnight; hours
+# run from the session's date and punch-in time to now
+PUNCH_OUT_SQL = text("""
+    UPDATE attendance
+    SET punch_out = CAST(:now AS TIME),
+        work_hours = ROUND(CAST(EXTRACT(EPOCH FROM (CAST(:now AS TIMESTAMP) - (attendance_date + punch_in))) / 3600 AS NUMERIC), 2),
+        updated_at = NOW()
+    WHERE attendance_id = (
+        SELECT attendance_id FROM attendance
+        WHERE employee_id = :emp_id AND punch_out IS NULL
+        ORDER BY attendance_date DESC, attendance_id DESC
+        LIMIT 1
+    ) AND punch_out IS NULL
+    RETURNING attendance_id, attendance_date, punch_in, work_hours
+""")
+
+# A key is claimed by inserting it; an expired key is reclaimed in the same statement
+CLAIM_KEY_SQL = text("""
+    INSERT INTO idempotency_keys (idempotency_key, scope, employee_id, created_at)
+    VALUES (:key, :scope, :emp_id, NOW())
+    ON CONFLICT (idempotency_key) DO UPDATE
+    SET scope = EXCLUDED.scope, employee_id = EXCLUDED.employee_id, response = NULL, created_at = NOW()
+    WHERE idempotency_keys.created_at < :expired_before
+    RETURNING idempotency_key
+""")
+
+
+class PunchResult(NamedTuple):
+    attendance_id: int
+    attendance_date: date
+    punch_in: Optional[time]
+    punch_out: Optional[time] = None
+    work_hours: Optional[float] = None
+    # The full punch-out timestamp; an overnight session ends the day after attendance_date
+    punched_out_at: Optional[datetime] = None
+    replayed: bool = False
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "attendance_id": self.attendance_id,
+            "attendance_date": str(self.attendance_date),
+            "punch_in": str(self.punch_in) if self.punch_in else None,
+            "punch_out": str(self.punch_out) if self.punch_out else None,
+            "work_hours": self.work_hours,
+            "punched_out_at": self.punched_out_at.isoformat() if self.punched_out_at else None,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "PunchResult":
+        data = json.loads(raw)
+        return cls(
+            attendance_id=data["attendance_id"],
+            attendance_date=date.fromisoformat(data["attendance_date"]),
+            punch_in=time.fromisoformat(data["punch_in"]) if data["punch_in"] else None,
+            punch_out=time.fromisoformat(data["punch_out"]) if data["punch_out"] else None,
+            work_hours=data["work_hours"],
+            punched_out_at=datetime.fromisoformat(data["punched_out_at"]) if data.get("punched_out_at") else None,
+            replayed=True
+        )
+
+
+class PunchService:
+    """Punch-in/out as single conditional statements.
+
+    Each punch is one INSERT ... ON CONFLICT or UPDATE ... RETURNING plus the
+    rollup upserts, committed together. With an Idempotency-Key a retried
+    request returns the first request's result without touching attendance.
+    """
+
+    @staticmethod
+    def punch_in(db: Session, employee_id: str, idempotency_key: Optional[str] = None) -> PunchResult:
+        replay = PunchService._claim_key(db, idempotency_key, "punch-in", employee_id)
+        if replay:
+            return replay
+        now = datetime.now()
+        row = db.execute(PUNCH_IN_SQL, {"emp_id": employee_id, "today": now.date(), "punch_in": now.time()}).fetchone()
+        if row is None:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Already punched in")
+        result = PunchResult(row.attendance_id, now.date(), now.time())
+        AttendanceRollupService.record_punch_in(db, employee_id, result.attendance_date, "Present")
+        PunchService._finish(db, idempotency_key, result)
+        return result
+
+    @staticmethod
+    def punch_out(db: Session, employee_id: str, idempotency_key: Optional[str] = None) -> PunchResult:
+        replay = PunchService._claim_key(db, idempotency_key, "punch-out", employee_id)
+        if replay:
+            return replay
+        now = datetime.now()
+        row = db.execute(PUNCH_OUT_SQL, {"emp_id": employee_id, "now": now}).fetchone()
+        if row is None:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="No active session found")
+        work_hours = float(row.work_hours or 0)
+        result = PunchResult(row.attendance_id, row.attendance_date, row.punch_in, now.time(), work_hours, now)
+        AttendanceRollupService.record_punch_out(db, employee_id, result.attendance_date, work_hours)
+        PunchService._finish(db, idempotency_key, result)
+        return result
+
+    @staticmethod
+    def purge_idempotency_keys(db: Session) -> int:
+        """Delete keys older than IDEMPOTENCY_KEY_TTL_HOURS; returns rows removed"""
+        result = db.execute(
+            text("DELETE FROM idempotency_keys WHERE created_at < :expired_before"),
+            {"expired_before": PunchService._expired_before()}
+        )
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def _expired_before() -> datetime:
+        return datetime.now() - timedelta(hours=settings.idempotency_key_ttl_hours)
+
+    @staticmethod
+    def _claim_key(db: Session, key: Optional[str], scope: str, employee_id: str) -> Optional[PunchResult]:
+        """Claim the key for this request, or return the stored result of the request that already used it.
+
+        A concurrent retry blocks on the key's row until the first request
+        commits (then replays its result) or rolls back (then proceeds).
+        """
+        if not key:
+            return None
+        claimed = db.execute(CLAIM_KEY_SQL, {
+            "key": key, "scope": scope, "emp_id": employee_id, "expired_before": PunchService._expired_before()
+        }).fetchone()
+        if claimed:
+            return None
+        stored = db.execute(
+            text("SELECT scope, employee_id, response FROM idempotency_keys WHERE idempotency_key = :key"),
+            {"key": key}
+        ).fetchone()
+        db.rollback()
+        if stored.scope != scope or stored.employee_id != employee_id:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if stored.response is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        return PunchResult.from_json(stored.response)
+
+    @staticmethod
+    def _finish(db: Session, key: Optional[str], result: PunchResult) -> None:
+        if key:
+            db.execute(
+                text("UPDATE idempotency_keys SET response = :response WHERE idempotency_key = :key"),
+                {"response": result.to_json(), "key": key}
+            )
+        db.commit()
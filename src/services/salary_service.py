@@ -1,19 +1,161 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from models.salary import PayrollSetup
 from models.Employee_models import Employee
 
 from schemas.salary import SalaryCreate, PayrollSetupUpdate, SalaryComponentUpdate, ComponentDelete
-from typing import Optional
+from sqlalchemy import text, select, update, bindparam, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from config.settings import settings
+from core.cache import TTLCache
+from services.compensation_service import CompensationService
+from typing import Callable, List, Optional, Tuple
 from decimal import Decimal
+from datetime import date
 from fastapi import HTTPException
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+EMPTY_COMPONENTS = {"earnings": [], "deductions": []}
+
+# Payslip, summary and history responses keyed by (kind, employee, month, payroll and CTC version).
+# Salary writes in this worker evict an employee's entries; the version check in the
+# key makes writes from other workers miss as well.
+_salary_responses = TTLCache(maxsize=settings.salary_cache_size, ttl=settings.salary_cache_ttl_seconds)
+
+PAYROLL_VERSION_SQL = text("""
+    SELECT MAX(updated_at) AS updated_at, COUNT(*) AS row_count,
+           (SELECT COUNT(*) FROM employee_compensation WHERE employee_id = :emp_id) AS compensation_count,
+           (SELECT SUM(annual_ctc) FROM employee_compensation WHERE employee_id = :emp_id) AS compensation_total
+    FROM payroll_setup
+    WHERE employee_id = :emp_id
+""")
+
+# Latest net pay and the financial-year total in one aggregate over pay periods
+# (rows that predate pay_period fall back to the day they were created)
+SALARY_SUMMARY_SQL = text("""
+    SELECT COUNT(*) AS row_count,
+           COALESCE(SUM(CASE WHEN COALESCE(pay_period, CAST(created_at AS DATE)) >= :ytd_start THEN net_salary END), 0) AS ytd_total,
+           (SELECT net_salary FROM payroll_setup
+            WHERE employee_id = :emp_id AND COALESCE(pay_period, CAST(created_at AS DATE)) <= :today
+            ORDER BY pay_period DESC NULLS LAST, created_at DESC NULLS LAST, payroll_id DESC
+            LIMIT 1) AS current_net_pay
+    FROM payroll_setup
+    WHERE employee_id = :emp_id AND COALESCE(pay_period, CAST(created_at AS DATE)) <= :today
+""")
+
+DEFAULT_PAGE_SIZE = 100
+
+# HR salary grid: one projected row per payroll record, filters appended by salary_list_query
+SALARY_LIST_SQL = """
+    SELECT p.payroll_id, CONCAT(e.first_name, ' ', e.last_name) AS employee_name, p.employee_id, e.email_id,
+           p.designation AS role, p.month, p.pay_period, d.department_name AS department, p.net_salary
+    FROM payroll_setup p
+    JOIN employees e ON e.employee_id = p.employee_id
+    LEFT JOIN departments d ON d.department_id = e.department_id
+"""
+
+HISTORY_SQL = text("""
+    SELECT month, pay_period, created_at, basic_salary, hra, allowance, total_deductions, net_salary
+    FROM payroll_setup
+    WHERE employee_id = :emp_id
+    ORDER BY pay_period DESC NULLS LAST, created_at DESC
+""")
+
 class SalaryService:
     # Fixed values that cannot be changed
     FIXED_FIELDS = ['basic_salary', 'hra', 'allowance', 'professional_tax']
     
+    # Base structure as shares of annual CTC; professional tax is a fixed annual amount
+    BASIC_RATE = Decimal('0.40')
+    HRA_RATE = Decimal('0.20')
+    ALLOWANCE_RATE = Decimal('0.15')
+    PF_PERCENTAGE = Decimal('12.00')
+    ANNUAL_PROFESSIONAL_TAX = Decimal('2400')
+    ORGANIZATION_NAME = "QAID SOFTWARE"
+    
+    @staticmethod
+    def pay_cycle_divisor(pay_cycle: str) -> int:
+        """Pay periods per year for a pay cycle (monthly when unrecognised)"""
+        cycle = (pay_cycle or "").upper()
+        if cycle == "WEEKLY":
+            return 52
+        if cycle in ["BIWEEKLY", "BI-WEEKLY"]:
+            return 26
+        return 12
+    
+    @staticmethod
+    def parse_annual_ctc(value) -> Optional[Decimal]:
+        """Employee.annual_ctc is stored as text; None when it is not a number"""
+        try:
+            return Decimal(str(value).replace(",", "").strip())
+        except Exception:
+            return None
+    
+    @staticmethod
+    def annual_ctc_for(db: Session, employee, month: Optional[str] = None) -> Optional[Decimal]:
+        """CTC in effect at the end of the pay month (today when not given); the legacy text column when none is recorded"""
+        period = CompensationService.parse_pay_period(month)
+        as_of = CompensationService.period_end(period) if period else None
+        annual_ctc = CompensationService.current_ctc(db, employee.employee_id, as_of)
+        return annual_ctc if annual_ctc is not None else SalaryService.parse_annual_ctc(employee.annual_ctc)
+    
+    @staticmethod
+    def compute_base_structure(annual_ctc: Decimal, divisor: int = 12, pf_percentage: Decimal = PF_PERCENTAGE) -> dict:
+        """Per-period base earnings and statutory deductions for an annual CTC"""
+        return {
+            "basic_salary": annual_ctc * SalaryService.BASIC_RATE / divisor,
+            "hra": annual_ctc * SalaryService.HRA_RATE / divisor,
+            "allowance": annual_ctc * SalaryService.ALLOWANCE_RATE / divisor,
+            "provident_fund": annual_ctc * pf_percentage / 100 / divisor,
+            "professional_tax": SalaryService.ANNUAL_PROFESSIONAL_TAX / divisor,
+        }
+    
+    @staticmethod
+    def _cached(db: Session, kind: str, employee_id: str, month: Optional[str], build: Callable[[], dict]) -> dict:
+        """Serve a read response from the cache while the employee's payroll rows are unchanged"""
+        version = tuple(db.execute(PAYROLL_VERSION_SQL, {"emp_id": employee_id}).fetchone())
+        return _salary_responses.get_or_set((kind, employee_id, month, version), build)
+    
+    @staticmethod
+    def invalidate(employee_id: Optional[str] = None) -> None:
+        """Drop cached salary responses for one employee, or all of them after a payroll run"""
+        if employee_id is None:
+            _salary_responses.clear()
+        else:
+            _salary_responses.delete_where(lambda key, _: key[1] == employee_id)
+    
+    @staticmethod
+    def conflict_target(pay_period) -> dict:
+        """ON CONFLICT arbiter for a payroll row: the pay period when the month parses, else the month text.
+
+        uq_payroll_employee_pay_period makes "2026-04" and "April 2026" the same row;
+        uq_payroll_employee_month still covers months that do not parse.
+        """
+        if pay_period is not None:
+            return {"index_elements": [PayrollSetup.employee_id, PayrollSetup.pay_period],
+                    "index_where": PayrollSetup.pay_period.isnot(None)}
+        return {"index_elements": [PayrollSetup.employee_id, PayrollSetup.month]}
+
+    @staticmethod
+    def upsert_payroll(db: Session, values: dict, update_columns: List[str]) -> PayrollSetup:
+        """Insert the employee's payroll row for the pay period, or update `update_columns` of the existing one.
+        
+        One INSERT ... ON CONFLICT DO UPDATE RETURNING statement, so concurrent saves cannot create
+        duplicates; the caller commits.
+        """
+        statement = pg_insert(PayrollSetup).values(**values)
+        assignments = {column: statement.excluded[column] for column in update_columns}
+        # ON CONFLICT skips the column's onupdate; cached responses and payslip files key on updated_at
+        assignments["updated_at"] = func.now()
+        statement = statement.on_conflict_do_update(
+            set_=assignments,
+            **SalaryService.conflict_target(values.get("pay_period"))
+        ).returning(PayrollSetup)
+        return db.scalars(statement, execution_options={"populate_existing": True}).one()
+    
     @staticmethod
     def calculate_component_amount(annual_ctc: Decimal, component_amount: float, component_type: str, is_monthly: bool = True) -> Decimal:
         """Calculate component amount based on type (percentage or fixed)"""
@@ -116,10 +258,13 @@ class SalaryService:
             # Recalculate totals using helper method
             employee = db.query(Employee).filter(Employee.employee_id == existing_record.employee_id).first()
             if employee:
-                annual_ctc = Decimal(employee.annual_ctc)
+                annual_ctc = SalaryService.annual_ctc_for(db, employee, existing_record.month)
+                if annual_ctc is None:
+                    raise HTTPException(status_code=400, detail="Invalid annual CTC value")
                 calculation_breakdown = SalaryService.recalculate_payroll_totals(existing_record, annual_ctc, db)
         
         db.commit()
+        SalaryService.invalidate(existing_record.employee_id)
         db.refresh(existing_record)
         
         return {
@@ -142,75 +287,42 @@ class SalaryService:
             raise HTTPException(status_code=404, detail="Employee not found")
         
         # Convert annual CTC to numeric for calculations
-        try:
-            annual_ctc = Decimal(employee.annual_ctc)
-        except:
+        annual_ctc = SalaryService.annual_ctc_for(db, employee, month)
+        if annual_ctc is None:
             raise HTTPException(status_code=400, detail="Invalid annual CTC value")
         
-        # Calculate salary components (basic calculations)
-        basic_salary = annual_ctc * Decimal('0.40')  # 40% of CTC
-        hra = annual_ctc * Decimal('0.20')  # 20% of CTC
-        allowance = annual_ctc * Decimal('0.15')  # 15% of CTC
-        
-        # Calculate deductions
-        provident_fund = annual_ctc * Decimal('0.12')  # 12% PF
-        professional_tax = Decimal('2400')  # Annual PT
-        
-        # Calculate totals
-        total_earnings = basic_salary + hra + allowance
-        total_deductions = provident_fund + professional_tax
+        # Per-period components for the pay cycle
+        divisor = SalaryService.pay_cycle_divisor(pay_cycle)
+        base = SalaryService.compute_base_structure(annual_ctc, divisor)
+        total_earnings = base["basic_salary"] + base["hra"] + base["allowance"]
+        total_deductions = base["provident_fund"] + base["professional_tax"]
         net_salary = total_earnings - total_deductions
         
-        # Calculate based on pay_cycle
-        if pay_cycle.upper() == "MONTHLY":
-            divisor = 12
-        elif pay_cycle.upper() == "WEEKLY":
-            divisor = 52
-        elif pay_cycle.upper() in ["BIWEEKLY", "BI-WEEKLY"]:
-            divisor = 26
-        else:
-            divisor = 12  # Default to monthly
-        
-        # Clean up any duplicate records first
-        existing_record = SalaryService.cleanup_duplicate_records(db, employee_id, month)
-        
-        if existing_record:
-            # Update existing record
-            existing_record.designation = employee.designation
-            existing_record.pay_cycle = pay_cycle
-            existing_record.basic_salary = basic_salary / divisor
-            existing_record.hra = hra / divisor
-            existing_record.allowance = allowance / divisor
-            existing_record.total_earnings = total_earnings / divisor
-            existing_record.total_deductions = total_deductions / divisor
-            existing_record.net_salary = net_salary / divisor
-            payroll_setup = existing_record
-        else:
-            # Create new record only if none exists
-            payroll_setup = PayrollSetup(
-                employee_id=employee_id,
-                designation=employee.designation,
-                pay_cycle=pay_cycle,
-                basic_salary=basic_salary / divisor,
-                hra=hra / divisor,
-                allowance=allowance / divisor,
-                provident_fund_percentage=Decimal('12.00'),
-                professional_tax=professional_tax / divisor,
-                total_earnings=total_earnings / divisor,
-                total_deductions=total_deductions / divisor,
-                net_salary=net_salary / divisor,
-                organization_name="QAID SOFTWARE",
-                month=month,
-                basic_salary_type="Fixed",
-                hra_type="Percentage",
-                allowance_type="Fixed",
-                provident_fund_type="Percentage",
-                professional_tax_type="Fixed"
-            )
-            db.add(payroll_setup)
+        # Create the month's record, or refresh the base structure of the existing one
+        payroll_setup = SalaryService.upsert_payroll(db, {
+            "employee_id": employee_id,
+            "designation": employee.designation,
+            "pay_cycle": pay_cycle,
+            "basic_salary": base["basic_salary"],
+            "hra": base["hra"],
+            "allowance": base["allowance"],
+            "provident_fund_percentage": SalaryService.PF_PERCENTAGE,
+            "professional_tax": base["professional_tax"],
+            "total_earnings": total_earnings,
+            "total_deductions": total_deductions,
+            "net_salary": net_salary,
+            "organization_name": SalaryService.ORGANIZATION_NAME,
+            "month": month,
+            "pay_period": CompensationService.parse_pay_period(month),
+            "basic_salary_type": "Fixed",
+            "hra_type": "Percentage",
+            "allowance_type": "Fixed",
+            "provident_fund_type": "Percentage",
+            "professional_tax_type": "Fixed"
+        }, ["designation", "pay_cycle", "basic_salary", "hra", "allowance", "total_earnings", "total_deductions", "net_salary"])
         
         db.commit()
-        db.refresh(payroll_setup)
+        SalaryService.invalidate(employee_id)
         
         # Create filtered response
         filtered_response = {
@@ -246,37 +358,66 @@ class SalaryService:
     @staticmethod
     def get_salary_by_employee(db: Session, employee_id: str):
         salary_record = db.query(PayrollSetup).filter(PayrollSetup.employee_id == employee_id).first()
-        if salary_record and salary_record.salary_components:
-            if isinstance(salary_record.salary_components, str):
-                import json
-                try:
-                    salary_record.salary_components = json.loads(salary_record.salary_components)
-                    db.commit()
-                except:
-                    salary_record.salary_components = {"earnings": [], "deductions": []}
-                    db.commit()
+        if salary_record and isinstance(salary_record.salary_components, str):
+            # Parsed for the response only: set as the loaded value so the session never writes it back
+            set_committed_value(salary_record, "salary_components", SalaryService.parse_salary_components(salary_record.salary_components))
         return salary_record
     
     @staticmethod
-    def get_all_salaries(db: Session):
-        payroll_records = db.query(PayrollSetup).join(Employee, PayrollSetup.employee_id == Employee.employee_id).all()
-        
-        filtered_records = []
-        for record in payroll_records:
-            employee = db.query(Employee).filter(Employee.employee_id == record.employee_id).first()
-            if employee:
-                filtered_records.append({
-                    "employee_name": f"{employee.first_name} {employee.last_name}",
-                    "employee_id": record.employee_id,
-                    "email_id": employee.email_id,
-                    "role": record.designation,
-                    "month": record.month
-                })
-        
-        return filtered_records
+    def salary_list_query(month: Optional[str] = None, department_id: Optional[int] = None, search: Optional[str] = None,
+                          after: Optional[int] = None, limit: Optional[int] = None):
+        """The salary grid query, newest payroll_id first; `after`/`limit` make it one keyset page"""
+        conditions, params = [], {}
+        if month:
+            period = CompensationService.parse_pay_period(month)
+            if period:
+                conditions.append("(p.month = :month OR p.pay_period = :pay_period)")
+                params["pay_period"] = period
+            else:
+                conditions.append("p.month = :month")
+            params["month"] = month
+        if department_id is not None:
+            conditions.append("e.department_id = :department_id")
+            params["department_id"] = department_id
+        if search:
+            conditions.append("(CONCAT(e.first_name, ' ', e.last_name) ILIKE :search OR e.email_id ILIKE :search OR p.employee_id ILIKE :search)")
+            params["search"] = f"%{search.strip()}%"
+        if after is not None:
+            conditions.append("p.payroll_id < :after")
+            params["after"] = after
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"{SALARY_LIST_SQL} {where} ORDER BY p.payroll_id DESC"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        return text(sql), params
+    
+    @staticmethod
+    def get_all_salaries(db: Session, month: Optional[str] = None, department_id: Optional[int] = None,
+                         search: Optional[str] = None, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE):
+        """One page of the HR salary grid in a single joined query"""
+        query, params = SalaryService.salary_list_query(month, department_id, search, after, limit)
+        return [
+            {
+                "payroll_id": row.payroll_id,
+                "employee_name": row.employee_name,
+                "employee_id": row.employee_id,
+                "email_id": row.email_id,
+                "role": row.role,
+                "month": row.month,
+                "department": row.department,
+                "net_salary": float(row.net_salary) if row.net_salary is not None else None
+            }
+            for row in db.execute(query, params).fetchall()
+        ]
     
     @staticmethod
     def get_employee_payslip(db: Session, employee_id: str, month: str = None):
+        return SalaryService._cached(db, "payslip", employee_id, month,
+                                     lambda: SalaryService._build_employee_payslip(db, employee_id, month))
+    
+    @staticmethod
+    def _build_employee_payslip(db: Session, employee_id: str, month: str = None):
         try:
             logger = logging.getLogger(__name__)
             logger.info(f"Retrieving payslip for employee {employee_id}, month: {month}")
@@ -312,7 +453,7 @@ class SalaryService:
                     "designation": getattr(employee, 'designation', ''),
                     "department_id": employee.department_id,
                     "joining_date": employee.joining_date.isoformat() if hasattr(employee, 'joining_date') and employee.joining_date else None,
-                    "annual_ctc": float(getattr(employee, 'annual_ctc', 0))
+                    "annual_ctc": float(SalaryService.annual_ctc_for(db, employee, payroll_record.month) or 0)
                 },
                 "payslip_details": {
                     "month": getattr(payroll_record, 'month', '') or "",
@@ -326,7 +467,7 @@ class SalaryService:
                     "total_earnings": float(payroll_record.total_earnings) if payroll_record.total_earnings else 0.0,
                     "total_deductions": float(payroll_record.total_deductions) if payroll_record.total_deductions else 0.0,
                     "net_salary": float(payroll_record.net_salary) if payroll_record.net_salary else 0.0,
-                    "salary_components": SalaryService._fix_salary_components(db, payroll_record) if payroll_record.salary_components else {"earnings": [], "deductions": []}
+                    "salary_components": SalaryService.parse_salary_components(payroll_record.salary_components)
                 },
                 "generated_at": payroll_record.created_at.isoformat() if hasattr(payroll_record, 'created_at') and payroll_record.created_at else None
             }
@@ -338,26 +479,54 @@ class SalaryService:
             raise Exception(f"Error creating payslip response: {str(e)}")
     
     @staticmethod
-    def _fix_salary_components(db: Session, payroll_record):
-        try:
-            logger = logging.getLogger(__name__)
-            if hasattr(payroll_record, 'salary_components') and payroll_record.salary_components:
-                if isinstance(payroll_record.salary_components, str):
-                    import json
-                    try:
-                        fixed_components = json.loads(payroll_record.salary_components)
-                        payroll_record.salary_components = fixed_components
-                        db.commit()
-                        return fixed_components
-                    except Exception as e:
-                        logger.error(f"Error parsing salary_components JSON: {str(e)}")
-                        return {"earnings": [], "deductions": []}
-                else:
-                    return payroll_record.salary_components
-            return {"earnings": [], "deductions": []}
-        except Exception as e:
-            logger.error(f"Error in _fix_salary_components: {str(e)}")
-            return {"earnings": [], "deductions": []}
+    def parse_salary_components(raw) -> dict:
+        """salary_components as a dict; legacy rows store it as a JSON string (see normalize_salary_components)"""
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError as e:
+                logger.error(f"Error parsing salary_components JSON: {str(e)}")
+                return dict(EMPTY_COMPONENTS)
+        return raw if isinstance(raw, dict) and raw else dict(EMPTY_COMPONENTS)
+    
+    @staticmethod
+    def normalize_salary_components(db: Session, batch_size: int = 1000,
+                                    progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int]:
+        """Rewrite string salary_components as JSON objects in keyset-paged batches, one commit per batch.
+        
+        updated_at is kept so cached responses and payslip PDFs stay valid. Returns (scanned, converted).
+        """
+        table = PayrollSetup.__table__
+        fix = update(table).where(table.c.payroll_id == bindparam("target_id")).values(
+            salary_components=bindparam("components"),
+            updated_at=table.c.updated_at
+        )
+        scanned = converted = 0
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(table.c.payroll_id, table.c.salary_components)
+                .where(table.c.payroll_id > last_id)
+                .order_by(table.c.payroll_id)
+                .limit(batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].payroll_id
+            scanned += len(rows)
+            fixes = [
+                {"target_id": row.payroll_id, "components": SalaryService.parse_salary_components(row.salary_components)}
+                for row in rows if isinstance(row.salary_components, str)
+            ]
+            if fixes:
+                db.execute(fix, fixes)
+                db.commit()
+                converted += len(fixes)
+            if progress:
+                progress(scanned, converted)
+        if converted:
+            SalaryService.invalidate()
+        return scanned, converted
     
     @staticmethod
     def save_salary_structure(db: Session, salary_data):
@@ -367,15 +536,15 @@ class SalaryService:
             raise HTTPException(status_code=404, detail="Employee not found")
         
         # Calculate base salary from annual CTC
-        try:
-            annual_ctc = Decimal(employee.annual_ctc)
-        except:
+        annual_ctc = SalaryService.annual_ctc_for(db, employee, salary_data.pay_month)
+        if annual_ctc is None:
             raise HTTPException(status_code=400, detail="Invalid annual CTC value")
         
         # Base calculations (monthly)
-        basic_salary = annual_ctc * Decimal('0.40') / 12
-        hra = annual_ctc * Decimal('0.20') / 12
-        allowance = annual_ctc * Decimal('0.15') / 12
+        base = SalaryService.compute_base_structure(annual_ctc)
+        basic_salary = base["basic_salary"]
+        hra = base["hra"]
+        allowance = base["allowance"]
         
         # Calculate additional earnings with proper percentage handling
         total_additional_earnings = Decimal('0')
@@ -401,8 +570,8 @@ class SalaryService:
                 })
         
         # Calculate deductions with proper percentage handling
-        provident_fund = annual_ctc * Decimal('0.12') / 12
-        professional_tax = Decimal('200')  # Monthly PT
+        provident_fund = base["provident_fund"]
+        professional_tax = base["professional_tax"]  # Monthly PT
         
         total_additional_deductions = Decimal('0')
         deductions_list = []
@@ -437,47 +606,32 @@ class SalaryService:
             "deductions": deductions_list
         }
         
-        # Clean up duplicates and update/create record
-        existing_record = SalaryService.cleanup_duplicate_records(db, salary_data.employee_id, salary_data.pay_month)
-        
-        if existing_record:
-            # Update existing record with recalculated values
-            existing_record.pay_cycle = salary_data.pay_cycle
-            existing_record.basic_salary = basic_salary
-            existing_record.hra = hra
-            existing_record.allowance = allowance
-            existing_record.total_earnings = total_earnings
-            existing_record.total_deductions = total_deductions
-            existing_record.net_salary = net_salary
-            existing_record.salary_components = salary_components_json
-            payroll_setup = existing_record
-        else:
-            # Create new record
-            payroll_setup = PayrollSetup(
-                employee_id=salary_data.employee_id,
-                designation=employee.designation,
-                pay_cycle=salary_data.pay_cycle,
-                basic_salary=basic_salary,
-                hra=hra,
-                allowance=allowance,
-                provident_fund_percentage=Decimal('12.00'),
-                professional_tax=professional_tax,
-                total_earnings=total_earnings,
-                total_deductions=total_deductions,
-                net_salary=net_salary,
-                organization_name="QAID SOFTWARE",
-                month=salary_data.pay_month,
-                basic_salary_type="Fixed",
-                hra_type="Percentage",
-                allowance_type="Fixed",
-                provident_fund_type="Percentage",
-                professional_tax_type="Fixed",
-                salary_components=salary_components_json
-            )
-            db.add(payroll_setup)
+        # Create the month's record, or overwrite the recalculated values of the existing one
+        payroll_setup = SalaryService.upsert_payroll(db, {
+            "employee_id": salary_data.employee_id,
+            "designation": employee.designation,
+            "pay_cycle": salary_data.pay_cycle,
+            "basic_salary": basic_salary,
+            "hra": hra,
+            "allowance": allowance,
+            "provident_fund_percentage": SalaryService.PF_PERCENTAGE,
+            "professional_tax": professional_tax,
+            "total_earnings": total_earnings,
+            "total_deductions": total_deductions,
+            "net_salary": net_salary,
+            "organization_name": SalaryService.ORGANIZATION_NAME,
+            "month": salary_data.pay_month,
+            "pay_period": CompensationService.parse_pay_period(salary_data.pay_month),
+            "basic_salary_type": "Fixed",
+            "hra_type": "Percentage",
+            "allowance_type": "Fixed",
+            "provident_fund_type": "Percentage",
+            "professional_tax_type": "Fixed",
+            "salary_components": salary_components_json
+        }, ["pay_cycle", "basic_salary", "hra", "allowance", "total_earnings", "total_deductions", "net_salary", "salary_components"])
         
         db.commit()
-        db.refresh(payroll_setup)
+        SalaryService.invalidate(salary_data.employee_id)
         
         return {
             "message": "Salary structure saved successfully",
@@ -502,65 +656,38 @@ class SalaryService:
     
     @staticmethod
     def get_salary_summary(db: Session, employee_id: str):
+        return SalaryService._cached(db, "summary", employee_id, None,
+                                     lambda: SalaryService._build_salary_summary(db, employee_id))
+    
+    @staticmethod
+    def _build_salary_summary(db: Session, employee_id: str):
         try:
-            from models.Employee_models import Employee
-            from datetime import datetime
-            
             employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
             if not employee:
                 raise HTTPException(status_code=404, detail=f"Employee with ID {employee_id} not found")
             
-            payroll_records = db.query(PayrollSetup).filter(PayrollSetup.employee_id == employee_id).all()
-            
-            if not payroll_records:
-                try:
-                    annual_ctc = float(employee.annual_ctc) if employee.annual_ctc and str(employee.annual_ctc).strip() and str(employee.annual_ctc).strip() != '0' else 0.0
-                except (ValueError, AttributeError, TypeError):
-                    annual_ctc = 0.0
-                
-                return {
-                    "annual_ctc": annual_ctc,
-                    "current_month_net_pay": 0.0,
-                    "ytd_total": 0.0
-                }
-            
-            try:
-                annual_ctc = float(employee.annual_ctc) if employee.annual_ctc and str(employee.annual_ctc).strip() and str(employee.annual_ctc).strip() != '0' else 0.0
-            except (ValueError, AttributeError, TypeError):
-                annual_ctc = 0.0
-            
-            latest_record = max(payroll_records, key=lambda x: x.created_at if x.created_at else datetime.min)
-            current_net_pay = float(latest_record.net_salary) if latest_record.net_salary else 0.0
+            annual_ctc = float(SalaryService.annual_ctc_for(db, employee) or 0)
             
-            joining_date = employee.joining_date if employee.joining_date else datetime.now().date()
-            current_date = datetime.now().date()
+            # YTD runs from the start of the financial year (1 April) or the joining month, whichever is later
+            current_date = date.today()
+            fy_start = date(current_date.year if current_date.month >= 4 else current_date.year - 1, 4, 1)
+            ytd_start = max((employee.joining_date or current_date).replace(day=1), fy_start)
             
-            if current_date.month >= 4:
-                fy_start = datetime(current_date.year, 4, 1).date()
-            else:
-                fy_start = datetime(current_date.year - 1, 4, 1).date()
-            
-            ytd_start_date = max(joining_date, fy_start)
-            
-            ytd_total = 0.0
-            months_worked = 0
-            
-            for record in payroll_records:
-                if record.created_at and record.created_at.date() >= ytd_start_date:
-                    if record.net_salary:
-                        ytd_total += float(record.net_salary)
-                        months_worked += 1
+            summary = db.execute(SALARY_SUMMARY_SQL, {
+                "emp_id": employee_id,
+                "ytd_start": ytd_start,
+                "today": current_date
+            }).fetchone()
             
             return {
                 "annual_ctc": annual_ctc,
-                "current_month_net_pay": current_net_pay,
-                "ytd_total": ytd_total
+                "current_month_net_pay": float(summary.current_net_pay or 0),
+                "ytd_total": float(summary.ytd_total or 0)
             }
             
         except HTTPException:
             raise
         except Exception as e:
-            logger = logging.getLogger(__name__)
             logger.error(f"Error in get_salary_summary: {str(e)}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Error retrieving salary summary: {str(e)}")
     
@@ -583,7 +710,9 @@ class SalaryService:
             if not employee:
                 return {"error": "Employee not found"}
             
-            annual_ctc = Decimal(employee.annual_ctc)
+            annual_ctc = SalaryService.annual_ctc_for(db, employee, update_data.month)
+            if annual_ctc is None:
+                return {"error": "Invalid annual CTC value"}
             
             # Process earnings with calculations
             earnings_list = []
@@ -640,6 +769,7 @@ class SalaryService:
             payroll_record.net_salary = payroll_record.total_earnings - payroll_record.total_deductions
             
             db.commit()
+            SalaryService.invalidate(update_data.employee_id)
             db.refresh(payroll_record)
             
             return {
@@ -660,27 +790,32 @@ class SalaryService:
     @staticmethod
     def get_salary_history(db: Session, employee_id: str):
         """Get salary history for employee"""
+        return SalaryService._cached(db, "history", employee_id, None,
+                                     lambda: SalaryService._build_salary_history(db, employee_id))
+    
+    @staticmethod
+    def _build_salary_history(db: Session, employee_id: str):
         employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
         
-        # Get unique records by employee_id (should be one per month now)
-        payroll_records = db.query(PayrollSetup).filter(
-            PayrollSetup.employee_id == employee_id
-        ).order_by(PayrollSetup.created_at.desc()).all()
-        
+        # Newest pay period first, ordered in SQL
+        payroll_records = db.execute(HISTORY_SQL, {"emp_id": employee_id}).fetchall()
         if not payroll_records:
             raise HTTPException(status_code=404, detail="No salary records found")
         
         salary_history = []
         for record in payroll_records:
-            # Extract year from month if format is "Month Year" or use current year
-            month_parts = record.month.split()
-            if len(month_parts) == 2:
-                month, year = month_parts[0], month_parts[1]
+            if record.pay_period:
+                month, year = record.pay_period.strftime("%B"), str(record.pay_period.year)
             else:
-                month = record.month
-                year = str(record.created_at.year) if record.created_at else "2024"
+                # Unparsed legacy month text: "Month Year", or just the month with the year it was created
+                month_parts = (record.month or "").split()
+                if len(month_parts) == 2:
+                    month, year = month_parts[0], month_parts[1]
+                else:
+                    month = record.month
+                    year = str(record.created_at.year) if record.created_at else str(date.today().year)
             
             salary_history.append({
                 "month": month,
@@ -691,12 +826,6 @@ class SalaryService:
                 "net_pay": float(record.net_salary) if record.net_salary else 0.0
             })
         
-        # Sort by month order
-        month_order = {"january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
-                      "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12}
-        
-        salary_history.sort(key=lambda x: month_order.get(x["month"].lower(), 13), reverse=True)
-        
         return {
             "employee_id": employee_id,
             "employee_name": f"{employee.first_name} {employee.last_name}",
@@ -724,7 +853,9 @@ class SalaryService:
             if not employee:
                 raise HTTPException(status_code=404, detail="Employee not found")
             
-            annual_ctc = Decimal(employee.annual_ctc)
+            annual_ctc = SalaryService.annual_ctc_for(db, employee, delete_data.month)
+            if annual_ctc is None:
+                raise HTTPException(status_code=400, detail="Invalid annual CTC value")
             
             # Get components
             components = payroll_record.salary_components or {"earnings": [], "deductions": []}
@@ -775,6 +906,7 @@ class SalaryService:
             payroll_record.net_salary = payroll_record.total_earnings - payroll_record.total_deductions
             
             db.commit()
+            SalaryService.invalidate(delete_data.employee_id)
             db.refresh(payroll_record)
             
             return {
@@ -797,25 +929,6 @@ class SalaryService:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Error deleting component: {str(e)}")
     
-    @staticmethod
-    def cleanup_duplicate_records(db: Session, employee_id: str, month: str):
-        """Remove duplicate records, keep only the latest one"""
-        duplicate_records = db.query(PayrollSetup).filter(
-            PayrollSetup.employee_id == employee_id,
-            PayrollSetup.month == month
-        ).order_by(PayrollSetup.created_at.desc()).all()
-        
-        if len(duplicate_records) > 1:
-            # Keep the first (latest) record, delete the rest
-            latest_record = duplicate_records[0]
-            for record in duplicate_records[1:]:
-                db.delete(record)
-            db.commit()
-            return latest_record
-        elif len(duplicate_records) == 1:
-            return duplicate_records[0]
-        return None
-    
     @staticmethod
     def delete_payslip(db: Session, employee_id: str, month: str):
         """Delete payslip by employee_id and month"""
@@ -830,6 +943,7 @@ class SalaryService:
         payroll_id = payroll_record.payroll_id
         db.delete(payroll_record)
         db.commit()
+        SalaryService.invalidate(employee_id)
         
         return {
             "message": "Payslip deleted successfully",
@@ -859,10 +973,7 @@ class SalaryService:
                 }
             )
         
-        components = payroll_record.salary_components or {"earnings": [], "deductions": []}
-        if isinstance(components, str):
-            import json
-            components = json.loads(components)
+        components = SalaryService.parse_salary_components(payroll_record.salary_components)
         
         return {
             "employee_id": employee_id,
@@ -897,7 +1008,9 @@ class SalaryService:
             if not employee:
                 raise HTTPException(status_code=404, detail="Employee not found")
             
-            annual_ctc = Decimal(employee.annual_ctc)
+            annual_ctc = SalaryService.annual_ctc_for(db, employee, month)
+            if annual_ctc is None:
+                raise HTTPException(status_code=400, detail="Invalid annual CTC value")
             
             components = payroll_record.salary_components or {"earnings": [], "deductions": []}
             if isinstance(components, str):
@@ -962,6 +1075,7 @@ class SalaryService:
             payroll_record.net_salary = payroll_record.total_earnings - payroll_record.total_deductions
             
             db.commit()
+            SalaryService.invalidate(employee_id)
             db.refresh(payroll_record)
             
             logger.info(f"Successfully deleted component and updated payroll")
@@ -1,3 +1,9 @@
+import os
+
+# Settings are read at import time; the suite runs against SQLite unless told otherwise
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -7,7 +13,7 @@ from sqlalchemy.pool import StaticPool
 from src.main import app
 from src.models.base import Base
 from src.models.session import get_db
-from src.models.employee import Department, Employee
+from src.models import Department, Employee
 
 # Test database URL (in-memory SQLite)
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
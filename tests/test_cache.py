@@ -0,0 +1,132 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+
+from src.core import cache as cache_module
+from src.core import security
+from src.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+
+    clock.now += 10
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    clock.now += 25
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_non_positive_ttl_is_not_cached(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1, ttl=0)
+    cache.set("b", 2, ttl=-1)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidation(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    for key, value in (("EMP001", 1), ("EMP002", 2), ("EMP003", 3)):
+        cache.set(key, value)
+
+    cache.delete("EMP001")
+    assert cache.get("EMP001") is None
+    assert cache.delete_where(lambda key, value: value >= 3) == 1
+    assert [key for key, _ in cache.items()] == ["EMP002"]
+
+    cache.clear()
+    assert cache.get("EMP002") is None
+
+
+def test_items_skip_expired_entries(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    cache.set("a", 1, ttl=5)
+    cache.set("b", 2)
+    clock.now += 10
+    assert cache.items() == [("b", 2)]
+
+
+def test_get_or_set_builds_once(clock):
+    cache = TTLCache(maxsize=10, ttl=30)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_set("key", build) == "value"
+    assert cache.get_or_set("key", build) == "value"
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    tokens = TTLCache(maxsize=10, ttl=300)
+    monkeypatch.setattr(security, "_verified_tokens", tokens)
+    return tokens
+
+
+def test_decode_token_caches_claims_by_token_hash(token_cache, monkeypatch):
+    token = security.create_access_token({"sub": "1", "email": "hr@company.com", "role": "HR_MANAGER"})
+    claims = security.decode_token(token)
+    assert claims["email"] == "hr@company.com"
+
+    keys = [key for key, _ in token_cache.items()]
+    assert keys == [hashlib.sha256(token.encode("utf-8")).hexdigest()]
+    assert token not in keys
+
+    # A cache hit does not verify the signature again
+    def fail(*args, **kwargs):
+        raise AssertionError("token decoded twice")
+
+    monkeypatch.setattr(security.jwt, "decode", fail)
+    assert security.decode_token(token) == claims
+
+
+def test_decode_token_does_not_cache_invalid_tokens(token_cache):
+    token = security.create_access_token({"sub": "1"})
+    with pytest.raises(JWTError):
+        security.decode_token(token[:-2] + ("aa" if not token.endswith("aa") else "bb"))
+    assert len(token_cache) == 0
+
+
+def test_decode_token_entry_never_outlives_the_token(token_cache, monkeypatch):
+    token = security.create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=2))
+    security.decode_token(token)
+    clock = FakeClock()
+    clock.now = cache_module.time.monotonic() + 3
+    monkeypatch.setattr(cache_module, "time", clock)
+    assert token_cache.items() == []
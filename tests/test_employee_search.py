@@ -0,0 +1,92 @@
+from datetime import date
+
+import pytest
+
+from src.core.security import create_access_token
+from src.models import Employee
+from src.services.employee_search_service import EmployeeSearchService
+
+# (employee_id, first_name, last_name, email_id, department_id)
+DIRECTORY = [
+    ("EMP001", "John", "Smith", "john.smith@company.com", 1),
+    ("EMP002", "Johnny", "Appleseed", "johnny@company.com", 2),
+    ("EMP003", "Alice", "Johnson", "alice.j@company.com", 1),
+    ("EMP004", "Smith", "Jones", "sjones@company.com", 1),
+    ("EMP005", "Kate", "Smitty", "kate@company.com", 2),
+    ("EMP010", "Jon", "Smyth", "jon.smyth@company.com", 1),
+]
+
+
+@pytest.fixture
+def directory(db_session):
+    db_session.add_all([
+        Employee(employee_id=employee_id, first_name=first_name, last_name=last_name, email_id=email_id,
+                 department_id=department_id, designation="Engineer", joining_date=date(2024, 1, 15),
+                 phone_number="1234567890", shift_id=1, employment_type="Full-time")
+        for employee_id, first_name, last_name, email_id, department_id in DIRECTORY
+    ])
+    db_session.commit()
+    return db_session
+
+
+def search_ids(db, term, department_id=None, page=1, size=20):
+    employees, matches = EmployeeSearchService.search(db, term, department_id, page, size)
+    return [employee.employee_id for employee in employees], matches
+
+
+def test_trigrams_pad_each_word_like_pg_trgm():
+    assert EmployeeSearchService.trigrams("Jo-e") == ["  j", " jo", "jo ", "  e", " e "]
+
+
+@pytest.mark.parametrize("term, document, expected", [
+    # Values from the pg_trgm documentation
+    ("word", "two words", 0.8),
+    ("word", "word", 1.0),
+    ("word", "", 0.0),
+])
+def test_word_similarity_matches_pg_trgm(term, document, expected):
+    assert EmployeeSearchService.word_similarity(term, document) == pytest.approx(expected)
+
+
+def test_exact_id_and_email_rank_first(directory):
+    assert search_ids(directory, "EMP001")[0][0] == "EMP001"
+    assert search_ids(directory, "alice.j@company.com")[0][0] == "EMP003"
+
+
+def test_name_prefix_ranks_above_word_prefix_and_fuzzy_matches(directory):
+    # Starts with the term, then has a word starting with it, then only similar
+    assert search_ids(directory, "smith") == (["EMP004", "EMP001", "EMP005"], 3)
+    assert search_ids(directory, "john") == (["EMP001", "EMP002", "EMP003"], 3)
+
+
+def test_fuzzy_match_tolerates_typos(directory):
+    # "Smitty" is not close enough
+    assert search_ids(directory, "smithe") == (["EMP001", "EMP004"], 2)
+    assert search_ids(directory, "nobody") == ([], 0)
+
+
+def test_every_word_of_the_term_is_a_prefix(directory):
+    ids, matches = search_ids(directory, "jo sm")
+    assert sorted(ids) == ["EMP001", "EMP004", "EMP010"]
+    assert matches == 3
+
+
+def test_department_filter(directory):
+    assert search_ids(directory, "john", department_id=2) == (["EMP002"], 1)
+
+
+def test_pages_slice_the_ranked_matches(directory):
+    assert search_ids(directory, "smith", page=1, size=2) == (["EMP004", "EMP001"], 3)
+    assert search_ids(directory, "smith", page=2, size=2) == (["EMP005"], 3)
+    assert search_ids(directory, "smith", page=3, size=2) == ([], 3)
+
+
+def test_directory_route_uses_ranked_search(client, directory):
+    token = create_access_token({"sub": "1", "email": "hr@company.com", "role": "HR_MANAGER"})
+    client.headers["Authorization"] = f"Bearer {token}"
+    response = client.get("/api/v1/employees", params={"search": "smith", "size": 2})
+    assert response.status_code == 200
+    assert [employee["employee_id"] for employee in response.json()["employees"]] == ["EMP004", "EMP001"]
+
+    response = client.get("/api/v1/employees", params={"search": "john", "department": 2})
+    assert [employee["employee_id"] for employee in response.json()["employees"]] == ["EMP002"]
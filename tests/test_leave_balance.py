@@ -0,0 +1,108 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from src.services.calendar_service import CalendarService
+from src.services.leave_balance_service import LeaveBalanceService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def register_functions(connection, _):
+        connection.create_function("NOW", 0, lambda: str(datetime.now()))
+
+    with engine.begin() as connection:
+        connection.execute(text("""
+            CREATE TABLE leave_balances (
+                employee_id VARCHAR(50), leave_type VARCHAR(20), year INTEGER,
+                used INTEGER NOT NULL DEFAULT 0, pending INTEGER NOT NULL DEFAULT 0, updated_at TIMESTAMP,
+                PRIMARY KEY (employee_id, leave_type, year)
+            )
+        """))
+        connection.execute(text("CREATE TABLE employees (employee_id VARCHAR(50), shift_id INTEGER)"))
+        connection.execute(text("CREATE TABLE shift_master (shift_id INTEGER, working_days VARCHAR(100))"))
+        connection.execute(text("CREATE TABLE events_holidays (date DATE, type VARCHAR(50))"))
+        connection.execute(text("INSERT INTO employees (employee_id) VALUES ('EMP001')"))
+        connection.execute(text("INSERT INTO events_holidays (date, type) VALUES ('2027-01-01', 'Public Holiday')"))
+    CalendarService.invalidate()
+    with Session(engine) as session:
+        yield session
+    CalendarService.invalidate()
+
+
+def ledger(db):
+    rows = db.execute(text("SELECT leave_type, year, used, pending FROM leave_balances ORDER BY leave_type, year")).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def change(db, old_status, new_status, days=3, leave_type="Casual Leave"):
+    LeaveBalanceService.record_status_change(db, "EMP001", leave_type, date(2026, 5, 4), old_status, new_status, days)
+
+
+def test_new_request_is_pending(db):
+    change(db, None, "PENDING")
+    assert ledger(db) == [("casual", 2026, 0, 3)]
+
+
+def test_approval_moves_days_from_pending_to_used(db):
+    change(db, None, "PENDING")
+    change(db, "PENDING", "APPROVED")
+    assert ledger(db) == [("casual", 2026, 3, 0)]
+
+
+def test_rejection_releases_pending_days(db):
+    change(db, None, "PENDING")
+    change(db, "pending", "Rejected")
+    assert ledger(db) == [("casual", 2026, 0, 0)]
+
+
+def test_revoking_an_approval_returns_used_days(db):
+    change(db, None, "PENDING")
+    change(db, "PENDING", "APPROVED")
+    change(db, "APPROVED", "REJECTED")
+    assert ledger(db) == [("casual", 2026, 0, 0)]
+
+
+def test_repeated_status_is_a_no_op(db):
+    change(db, None, "PENDING")
+    change(db, "PENDING", "APPROVED")
+    # A second approval of an already approved request must not debit again
+    change(db, "APPROVED", "APPROVED")
+    assert ledger(db) == [("casual", 2026, 3, 0)]
+
+
+def test_unknown_leave_type_is_ignored(db):
+    change(db, None, "PENDING", leave_type="Bereavement")
+    assert ledger(db) == []
+
+
+def test_days_per_year_are_charged_to_each_year(db):
+    change(db, None, "APPROVED", days={2026: 4, 2027: 2}, leave_type="Earned")
+    assert ledger(db) == [("earned", 2026, 4, 0), ("earned", 2027, 2, 0)]
+
+
+def test_leave_days_splits_a_leave_across_new_year(db):
+    leave = SimpleNamespace(employee_id="EMP001", start_date=date(2026, 12, 28), end_date=date(2027, 1, 5),
+                            employee_used_leaves=None)
+    # Mon 28 - Thu 31 Dec; Fri 1 Jan is a holiday, then Mon 4 and Tue 5 Jan
+    assert LeaveBalanceService.leave_days(db, leave) == {2026: 4, 2027: 2}
+    assert leave.employee_used_leaves == 6
+
+
+def test_leave_days_treats_zero_as_unsized(db):
+    leave = SimpleNamespace(employee_id="EMP001", start_date=date(2026, 5, 4), end_date=date(2026, 5, 8),
+                            employee_used_leaves=0)
+    assert LeaveBalanceService.leave_days(db, leave) == {2026: 5}
+    assert leave.employee_used_leaves == 5
+
+
+def test_leave_days_keeps_a_stored_size(db):
+    leave = SimpleNamespace(employee_id="EMP001", start_date=date(2026, 5, 4), end_date=date(2026, 5, 8),
+                            employee_used_leaves=2)
+    assert LeaveBalanceService.leave_days(db, leave) == {2026: 2}
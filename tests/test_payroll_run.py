@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.services.payroll_run_service import PayrollRunService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("""
+            CREATE TABLE payroll_setup (
+                payroll_id INTEGER PRIMARY KEY AUTOINCREMENT, employee_id VARCHAR(50) NOT NULL,
+                month VARCHAR(20), pay_period DATE, provident_fund_percentage NUMERIC(5,2), salary_components TEXT
+            )
+        """))
+    with Session(engine) as session:
+        yield session
+
+
+def add_payroll(db, month, pay_period, pf, employee_id="EMP001"):
+    db.execute(text("""
+        INSERT INTO payroll_setup (employee_id, month, pay_period, provident_fund_percentage, salary_components)
+        VALUES (:emp_id, :month, :pay_period, :pf, '{}')
+    """), {"emp_id": employee_id, "month": month, "pay_period": pay_period, "pf": pf})
+
+
+def prior_pf(db, month, pay_period):
+    return {employee_id: float(row.provident_fund_percentage)
+            for employee_id, row in PayrollRunService.latest_prior(db, month, pay_period).items()}
+
+
+def test_backfilled_month_carries_forward_the_earlier_period(db):
+    add_payroll(db, "2026-01", "2026-01-01", 10)
+    add_payroll(db, "2026-05", "2026-05-01", 12)
+    # Inserted last, but paid earliest
+    add_payroll(db, "2025-12", "2025-12-01", 9)
+
+    assert prior_pf(db, "2026-03", date(2026, 3, 1)) == {"EMP001": 10}
+    assert prior_pf(db, "2026-06", date(2026, 6, 1)) == {"EMP001": 12}
+    assert prior_pf(db, "2025-11", date(2025, 11, 1)) == {}
+
+
+def test_rows_without_a_pay_period_only_stand_in_for_other_months(db):
+    add_payroll(db, "Spring bonus", None, 8)
+    add_payroll(db, "2026-05", "2026-05-01", 12, employee_id="EMP002")
+
+    assert prior_pf(db, "2026-03", date(2026, 3, 1)) == {"EMP001": 8}
+    assert prior_pf(db, "Spring bonus", None) == {}
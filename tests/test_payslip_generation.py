@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+from services import payslip_service
+from services.payslip_service import PayslipService
+
+
+@pytest.fixture(autouse=True)
+def payslip_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(payslip_service.settings, "payslip_dir", str(tmp_path))
+    return tmp_path
+
+
+def test_a_month_has_one_run_at_a_time():
+    lock = PayslipService.claim_generation("April 2026")
+    assert os.path.basename(lock) == "April_2026.lock"
+    with pytest.raises(HTTPException) as raised:
+        PayslipService.claim_generation("April 2026")
+    assert raised.value.status_code == 409
+
+    # Other months are independent
+    PayslipService.claim_generation("2026-05")
+
+    PayslipService.release_generation(lock)
+    assert PayslipService.claim_generation("April 2026") == lock
+
+
+def test_lock_of_a_finished_process_is_reclaimed():
+    lock = PayslipService.claim_generation("2026-04")
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    PayslipService.record_generation_pid(lock, process.pid)
+    process.wait()
+
+    assert PayslipService.claim_generation("2026-04") == lock
+    with open(lock) as held:
+        assert held.read() == str(os.getpid())
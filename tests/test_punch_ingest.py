@@ -0,0 +1,97 @@
+import io
+from datetime import date, datetime
+
+from src.services.punch_ingest_service import PunchEvent, PunchIngestService
+
+
+def at(day, clock):
+    return datetime.fromisoformat(f"{day}T{clock}")
+
+
+def test_pairs_first_in_with_last_out():
+    events = [
+        PunchEvent("EMP001", at("2026-10-05", "09:02"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "13:00"), "out"),
+        PunchEvent("EMP001", at("2026-10-05", "13:45"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "18:10"), "out"),
+    ]
+    spans, duplicates = PunchIngestService.pair(events)
+    assert spans == {("EMP001", date(2026, 10, 5)): (at("2026-10-05", "09:02"), at("2026-10-05", "18:10"))}
+    assert duplicates == 0
+
+
+def test_out_of_order_events_are_sorted_first():
+    events = [
+        PunchEvent("EMP001", at("2026-10-05", "18:10"), "out"),
+        PunchEvent("EMP002", at("2026-10-05", "10:00"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "09:02"), "in"),
+        PunchEvent("EMP002", at("2026-10-05", "08:55"), "in"),
+    ]
+    spans, _ = PunchIngestService.pair(events)
+    assert spans[("EMP001", date(2026, 10, 5))] == (at("2026-10-05", "09:02"), at("2026-10-05", "18:10"))
+    assert spans[("EMP002", date(2026, 10, 5))] == (at("2026-10-05", "08:55"), None)
+
+
+def test_unpaired_punches():
+    events = [
+        # In without an out: the session stays open
+        PunchEvent("EMP001", at("2026-10-05", "09:00"), "in"),
+        # Only exits: nothing to open a session with
+        PunchEvent("EMP002", at("2026-10-05", "17:00"), "out"),
+        # An exit before the first entry does not close the session
+        PunchEvent("EMP003", at("2026-10-05", "07:30"), "out"),
+        PunchEvent("EMP003", at("2026-10-05", "09:00"), "in"),
+    ]
+    spans, _ = PunchIngestService.pair(events)
+    assert spans == {
+        ("EMP001", date(2026, 10, 5)): (at("2026-10-05", "09:00"), None),
+        ("EMP003", date(2026, 10, 5)): (at("2026-10-05", "09:00"), None),
+    }
+
+
+def test_repeated_reads_within_the_window_are_duplicates():
+    events = [
+        PunchEvent("EMP001", at("2026-10-05", "09:00:00"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "09:00:20"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "09:00:50"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "18:00:00"), "out"),
+        PunchEvent("EMP001", at("2026-10-05", "18:05:00"), "out"),
+    ]
+    spans, duplicates = PunchIngestService.pair(events, dedupe_seconds=60)
+    assert duplicates == 2
+    assert spans[("EMP001", date(2026, 10, 5))] == (at("2026-10-05", "09:00:00"), at("2026-10-05", "18:05:00"))
+
+
+def test_events_without_direction_open_and_close():
+    events = [
+        PunchEvent("EMP001", at("2026-10-05", "17:58"), None),
+        PunchEvent("EMP001", at("2026-10-05", "09:05"), None),
+    ]
+    spans, _ = PunchIngestService.pair(events)
+    assert spans[("EMP001", date(2026, 10, 5))] == (at("2026-10-05", "09:05"), at("2026-10-05", "17:58"))
+
+
+def test_each_day_is_paired_separately():
+    events = [
+        PunchEvent("EMP001", at("2026-10-05", "09:00"), "in"),
+        PunchEvent("EMP001", at("2026-10-06", "18:00"), "out"),
+    ]
+    spans, _ = PunchIngestService.pair(events)
+    assert spans == {("EMP001", date(2026, 10, 5)): (at("2026-10-05", "09:00"), None)}
+
+
+def test_parse_rejects_malformed_records():
+    log = io.StringIO(
+        "employee_id,timestamp,direction\n"
+        "EMP001,2026-10-05T09:00:00,IN\n"
+        "EMP001,not-a-time,out\n"
+        ",2026-10-05T18:00:00,out\n"
+        "EMP001,2026-10-05T18:00:00,sideways\n"
+        "EMP001,2026-10-05T18:00:00,checkout\n"
+    )
+    events, rejected = PunchIngestService.parse(log, "csv")
+    assert rejected == 3
+    assert events == [
+        PunchEvent("EMP001", at("2026-10-05", "09:00"), "in"),
+        PunchEvent("EMP001", at("2026-10-05", "18:00"), "out"),
+    ]
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime, time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from src.services.punch_service import PunchResult, PunchService
+
+# SQLite stand-ins for the PostgreSQL functions the punch statements use
+sqlite3.register_adapter(time, str)
+
+SCHEMA = [
+    """CREATE TABLE attendance (
+        attendance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id VARCHAR(50) NOT NULL,
+        attendance_date DATE NOT NULL,
+        punch_in TIME,
+        punch_out TIME,
+        status VARCHAR(20),
+        work_hours NUMERIC(5,2),
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP
+    )""",
+    "CREATE UNIQUE INDEX uq_attendance_open_session ON attendance (employee_id, attendance_date) WHERE punch_out IS NULL",
+    """CREATE TABLE idempotency_keys (
+        idempotency_key VARCHAR(255) PRIMARY KEY,
+        scope VARCHAR(50) NOT NULL,
+        employee_id VARCHAR(50) NOT NULL,
+        response TEXT,
+        created_at TIMESTAMP NOT NULL
+    )""",
+    """CREATE TABLE attendance_daily_summary (
+        attendance_date DATE NOT NULL, shard SMALLINT NOT NULL DEFAULT 0,
+        records INTEGER NOT NULL DEFAULT 0, present INTEGER NOT NULL DEFAULT 0, late INTEGER NOT NULL DEFAULT 0,
+        absent INTEGER NOT NULL DEFAULT 0, half_day INTEGER NOT NULL DEFAULT 0, on_leave INTEGER NOT NULL DEFAULT 0,
+        work_hours NUMERIC(10,2) NOT NULL DEFAULT 0, updated_at TIMESTAMP,
+        PRIMARY KEY (attendance_date, shard)
+    )""",
+    """CREATE TABLE attendance_monthly_summary (
+        employee_id VARCHAR(50) NOT NULL, month_start DATE NOT NULL,
+        records INTEGER NOT NULL DEFAULT 0, present INTEGER NOT NULL DEFAULT 0, late INTEGER NOT NULL DEFAULT 0,
+        absent INTEGER NOT NULL DEFAULT 0, half_day INTEGER NOT NULL DEFAULT 0, on_leave INTEGER NOT NULL DEFAULT 0,
+        work_hours NUMERIC(10,2) NOT NULL DEFAULT 0, updated_at TIMESTAMP,
+        PRIMARY KEY (employee_id, month_start)
+    )""",
+]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """File-backed SQLite, so each thread gets its own connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'punch.db'}", connect_args={"timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def register_functions(connection, _):
+        connection.create_function("NOW", 0, lambda: str(datetime.now()))
+        connection.create_function("hashtext", 1, lambda value: zlib.crc32(value.encode()) - 2 ** 31)
+
+    with engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.execute(text(statement))
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _attendance_rows(session_factory, employee_id):
+    with session_factory() as db:
+        return db.execute(text("SELECT attendance_id FROM attendance WHERE employee_id = :emp_id"),
+                          {"emp_id": employee_id}).fetchall()
+
+
+def test_concurrent_punch_in_creates_one_session(session_factory):
+    barrier = threading.Barrier(2)
+    results, errors = [], []
+
+    def punch():
+        with session_factory() as db:
+            barrier.wait()
+            try:
+                results.append(PunchService.punch_in(db, "EMP001"))
+            except HTTPException as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=punch) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 1
+    assert [(e.status_code, e.detail) for e in errors] == [(400, "Already punched in")]
+    assert len(_attendance_rows(session_factory, "EMP001")) == 1
+    with session_factory() as db:
+        assert db.execute(text("SELECT SUM(records), SUM(present) FROM attendance_daily_summary")).fetchone() == (1, 1)
+
+
+def test_idempotency_key_replays_first_result(session_factory):
+    with session_factory() as db:
+        first = PunchService.punch_in(db, "EMP001", idempotency_key="kiosk-1")
+    with session_factory() as db:
+        retry = PunchService.punch_in(db, "EMP001", idempotency_key="kiosk-1")
+
+    assert not first.replayed
+    assert retry.replayed
+    assert retry.attendance_id == first.attendance_id
+    assert retry.attendance_date == first.attendance_date
+    assert len(_attendance_rows(session_factory, "EMP001")) == 1
+
+
+def test_idempotency_key_rejects_a_different_request(session_factory):
+    with session_factory() as db:
+        PunchService.punch_in(db, "EMP001", idempotency_key="kiosk-1")
+    with session_factory() as db:
+        with pytest.raises(HTTPException) as raised:
+            PunchService.punch_in(db, "EMP002", idempotency_key="kiosk-1")
+    assert raised.value.status_code == 422
+    assert _attendance_rows(session_factory, "EMP002") == []
+
+
+def test_replayed_punch_out_keeps_the_real_timestamp():
+    # Punched in at 22:00 on the 10th, out at 06:00 on the 11th
+    result = PunchResult(7, date(2026, 5, 10), time(22, 0), time(6, 0), 8.0, datetime(2026, 5, 11, 6, 0))
+    replayed = PunchResult.from_json(result.to_json())
+    assert replayed.punched_out_at == datetime(2026, 5, 11, 6, 0)
+    assert replayed.attendance_date == date(2026, 5, 10)
+    assert replayed.replayed
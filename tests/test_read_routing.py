@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from src.models import Employee
+from src.models.session import RoutingSession
+
+primary = create_engine("sqlite://")
+replica = create_engine("sqlite://")
+
+
+@pytest.fixture
+def session():
+    factory = sessionmaker(class_=RoutingSession, info={"primary_bind": primary, "replica_bind": replica})
+    with factory() as db:
+        yield db
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "  select employee_id FROM employees WHERE updated_at > :since",
+    "WITH recent AS (SELECT 1) SELECT * FROM recent",
+    "(SELECT 1) UNION (SELECT 2)",
+])
+def test_text_queries_read_from_the_replica(session, sql):
+    assert session.get_bind(clause=text(sql)) is replica
+    assert not session.info.get("wrote")
+
+
+@pytest.mark.parametrize("sql", [
+    "UPDATE attendance SET punch_out = :now WHERE attendance_id = :id",
+    "INSERT INTO leave_balances (employee_id) VALUES (:emp_id) ON CONFLICT DO NOTHING",
+    "DELETE FROM idempotency_keys WHERE created_at < :expired_before",
+    "WITH moved AS (DELETE FROM staging RETURNING *) SELECT COUNT(*) FROM moved",
+    "SELECT * FROM leave_management WHERE leave_id = :id FOR UPDATE",
+    "CALL refresh_rollups()",
+])
+def test_text_writes_route_to_the_primary_for_the_rest_of_the_session(session, sql):
+    assert session.get_bind(clause=text(sql)) is primary
+    assert session.get_bind(clause=text("SELECT 1")) is primary
+
+
+def test_orm_statements(session):
+    assert session.get_bind(clause=select(Employee)) is replica
+    assert session.get_bind(clause=update(Employee).values(location="Pune")) is primary
+    assert session.get_bind(clause=select(Employee)) is primary
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.services.calendar_service import CalendarService, WorkingCalendar, parse_working_days
+
+MON_FRI = (True,) * 5 + (False,) * 2
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("Monday-Friday", MON_FRI),
+    ("Mon to Fri", MON_FRI),
+    ("Mon, Wed, Fri", (True, False, True, False, True, False, False)),
+    ("Monday and Saturday", (True, False, False, False, False, True, False)),
+    ("Sun-Thu", (True, True, True, True, False, False, True)),
+    ("Fri-Mon", (True, False, False, False, True, True, True)),
+    ("", MON_FRI),
+    (None, MON_FRI),
+    ("flexible", MON_FRI),
+])
+def test_parse_working_days(pattern, expected):
+    assert parse_working_days(pattern) == expected
+
+
+def test_count_skips_weekends_and_holidays():
+    calendar = WorkingCalendar(2026, MON_FRI, holidays=[date(2026, 1, 26), date(2026, 1, 31), date(2025, 12, 25)])
+    # January 2026 has 22 weekdays; 26 Jan is a Monday, 31 Jan a Saturday
+    assert calendar.count(date(2026, 1, 1), date(2026, 1, 31)) == 21
+    assert not calendar.is_working_day(date(2026, 1, 26))
+    assert calendar.is_working_day(date(2026, 1, 27))
+
+
+def test_count_single_days_and_empty_spans():
+    calendar = WorkingCalendar(2026, MON_FRI)
+    assert calendar.count(date(2026, 3, 2), date(2026, 3, 2)) == 1  # Monday
+    assert calendar.count(date(2026, 3, 7), date(2026, 3, 8)) == 0  # weekend
+    assert calendar.count(date(2026, 3, 9), date(2026, 3, 2)) == 0
+
+
+def test_count_is_clipped_to_the_calendar_year():
+    calendar = WorkingCalendar(2026, MON_FRI)
+    assert calendar.count(date(2025, 12, 1), date(2026, 1, 2)) == 2  # Thu 1 and Fri 2 Jan
+
+
+def test_leap_year_has_366_days():
+    calendar = WorkingCalendar(2028, (True,) * 7)
+    assert calendar.count(date(2028, 1, 1), date(2028, 12, 31)) == 366
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE events_holidays (date DATE, type VARCHAR(50))"))
+        connection.execute(text("""
+            INSERT INTO events_holidays (date, type) VALUES
+                ('2026-12-25', 'Public Holiday'),
+                ('2027-01-01', 'Public Holiday'),
+                ('2026-12-31', 'Optional Holiday'),
+                ('2026-12-30', 'Event')
+        """))
+    CalendarService.invalidate()
+    with Session(engine) as session:
+        yield session
+    CalendarService.invalidate()
+
+
+def test_business_days_across_years_and_holidays(db):
+    # 21 Dec 2026 (Mon) to 8 Jan 2027 (Fri): 15 weekdays less Christmas and New Year's Day;
+    # optional holidays and events are working days
+    assert CalendarService.business_days(db, date(2026, 12, 21), date(2027, 1, 8)) == 13
+    assert CalendarService.business_days(db, date(2026, 12, 21), date(2027, 1, 8), "Monday-Saturday") == 15
+
+
+def test_calendars_are_rebuilt_after_invalidate(db):
+    assert CalendarService.business_days(db, date(2026, 12, 24), date(2026, 12, 24)) == 1
+    db.execute(text("INSERT INTO events_holidays (date, type) VALUES ('2026-12-24', 'Public Holiday')"))
+    assert CalendarService.business_days(db, date(2026, 12, 24), date(2026, 12, 24)) == 1
+    CalendarService.invalidate()
+    assert CalendarService.business_days(db, date(2026, 12, 24), date(2026, 12, 24)) == 0